@@ -0,0 +1,100 @@
+"""
+Flood server with connections that never log in and measure login latency of real users.
+
+Flood connections are opened in waves and either stay silent or send garbage.
+Server is started with small login timeout and connection cap, so idle sockets are
+closed by server instead of holding heroes and queues.
+
+Example: python -m benchmarks.bench_admission --flood 5000 --max-connections 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+from mood.client import engine
+from mood.common import protocol
+from .bench_load import percentile, rss_megabytes, start_server
+
+argparser = argparse.ArgumentParser(description="Connection flood test of MOOD server.")
+argparser.add_argument("--flood", type=int, default=2000, help="number of connections that never log in")
+argparser.add_argument("--users", type=int, default=50, help="number of real users logging in during flood")
+argparser.add_argument("--login-timeout", type=float, default=1, help="login timeout of started server")
+argparser.add_argument("--max-connections", type=int, default=1000, help="connection cap of started server")
+argparser.add_argument("--host", default="localhost", help="server host")
+argparser.add_argument("--width", type=int, default=10, help="field width of started server")
+argparser.add_argument("--height", type=int, default=10, help="field height of started server")
+
+
+async def intruder(args, number, closed):
+    """Open connection, send nothing or garbage and wait until server closes it."""
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        closed["refused"] = closed.get("refused", 0) + 1
+        return
+
+    if number % 2:
+        writer.write(b"\x00garbage\n")
+
+    try:
+        await asyncio.wait_for(reader.read(), args.login_timeout * 5)
+        closed["closed"] = closed.get("closed", 0) + 1
+    except (asyncio.TimeoutError, ConnectionError):
+        closed["lingering"] = closed.get("lingering", 0) + 1
+    finally:
+        writer.close()
+
+
+async def user(args, number, latencies):
+    """Log in, move once and measure time until reply."""
+    await asyncio.sleep(number * 0.01)
+    start = time.perf_counter()
+
+    try:
+        connection = await engine.Connection.open(args.host, args.port, f"user{number}")
+        connection.send(protocol.Move(0, 1))
+        await connection.expect("Moved to", timeout=5)
+        latencies.append(time.perf_counter() - start)
+        await connection.close()
+    except (OSError, ValueError, asyncio.TimeoutError):
+        latencies.append(None)
+
+
+async def flood(args):
+    """Run intruders and users together, return results."""
+    closed = {}
+    latencies = []
+    await asyncio.gather(*(intruder(args, number, closed) for number in range(args.flood)),
+                         *(user(args, number, latencies) for number in range(args.users)))
+    served = sorted(value for value in latencies if value is not None)
+
+    return {
+        "flood": args.flood,
+        "max_connections": args.max_connections,
+        "login_timeout": args.login_timeout,
+        "intruders": closed,
+        "users_served": len(served),
+        "users_failed": len(latencies) - len(served),
+        "login_p50_ms": percentile(served, 0.5) * 1000 if served else None,
+        "login_p99_ms": percentile(served, 0.99) * 1000 if served else None,
+        "server_rss_mb": rss_megabytes(args.pid),
+    }
+
+
+def main(argv=None):
+    """Run benchmark and print results."""
+    args = argparser.parse_args(argv)
+    server = start_server(args, "--login-timeout", str(args.login_timeout),
+                          "--max-connections", str(args.max_connections))
+
+    try:
+        results = asyncio.run(flood(args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
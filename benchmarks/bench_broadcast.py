@@ -0,0 +1,79 @@
+"""Measure cost of one broadcast with many simulated clients."""
+import asyncio
+import random
+import time
+from mood.server.server import Field, Hero, LOCALES, ngettext
+from mood.server.broadcast import Broadcaster
+from mood.server.outbox import Outbox
+
+REPEAT = 20
+WIDTH = HEIGHT = 1000
+
+
+def make_clients(count):
+    """Create broadcaster with count heroes spread over big field."""
+    desk = Field()
+    clients = Broadcaster(region_size=16, width=WIDTH, height=HEIGHT)
+
+    for i in range(count):
+        hero = Hero(desk, f"bot{i}")
+        hero.set_locale(random.choice(list(LOCALES)))
+        hero.set_position(random.randrange(WIDTH), random.randrange(HEIGHT))
+        clients.subscribe(hero, Outbox(limit=REPEAT))
+
+    return clients
+
+
+def drain(clients):
+    """Empty all queues."""
+    for queue in clients.values():
+        while not queue.empty():
+            queue.get_nowait()
+
+
+def notice(locale):
+    """Build localized message about added monster."""
+    return ngettext(locale, 'User {} added monster {} with {} hp',
+                    'User {} added monster {} with {} hps', 15).format("bot0", "daemon", 15)
+
+
+async def per_client(clients):
+    """Old style fan-out: format and await put for every client."""
+    for cli, el in clients.items():
+        await el.put(notice(cli.get_locale()))
+
+
+async def measure(clients, action):
+    """Return average time in milliseconds of one broadcast."""
+    total = 0
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await action()
+        total += time.perf_counter() - start
+        drain(clients)
+
+    return total / REPEAT * 1000
+
+
+async def main():
+    """Print broadcast cost table."""
+    print(f"{'clients':>8} {'per-client':>12} {'publish':>12} {'scoped':>12}")
+
+    for count in (1000, 10000):
+        clients = make_clients(count)
+        old = await measure(clients, lambda: per_client(clients))
+
+        async def everyone():
+            clients.publish(notice)
+
+        async def nearby():
+            clients.publish("daemon moved one cell up", cell=(3, 4))
+
+        new = await measure(clients, everyone)
+        scoped = await measure(clients, nearby)
+        print(f"{count:>8} {old:>10.3f}ms {new:>10.3f}ms {scoped:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Measure start up and lookups of monster catalogue with thousands of custom cowfiles."""
+import os
+import shutil
+import tempfile
+import time
+import cowsay
+from mood.common import custom_monsters
+from mood.common.catalogue import Catalogue
+
+LOOKUPS = 1000
+
+
+def make_cows(directory, count):
+    """Write count cowfiles to directory."""
+    text = open(os.path.join(cowsay.COW_PEN, "tux.cow")).read()
+
+    for i in range(count):
+        with open(os.path.join(directory, f"monster{i}.cow"), "w") as file:
+            file.write(text)
+
+
+def old_lookup(directory, name):
+    """Check name like client did before catalogue, listing cows on every call."""
+    return name in cowsay.list_cows() + cowsay.list_cows(directory) or name in custom_monsters
+
+
+def measure(function, repeat=1):
+    """Return average time of function call in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    """Print catalogue timings."""
+    print(f"{'cowfiles':>9} {'list_cows':>12} {'cold index':>12} {'cached index':>13} "
+          f"{'lookup':>10} {'complete':>10}")
+
+    for count in (100, 1000, 10000):
+        cows, cache = tempfile.mkdtemp(), tempfile.mkdtemp()
+        try:
+            make_cows(cows, count)
+            name = f"monster{count - 1}"
+            old = measure(lambda: old_lookup(cows, name), 10)
+            cold = measure(lambda: Catalogue([cows], cache).index())
+            cached = measure(lambda: Catalogue([cows], cache).index(), 10)
+            catalogue = Catalogue([cows], cache)
+            catalogue.names()
+            lookup = measure(lambda: name in catalogue, LOOKUPS)
+            complete = measure(lambda: catalogue.complete("monster99"), LOOKUPS)
+            print(f"{count:>9} {old:>10.3f}ms {cold:>10.3f}ms {cached:>11.3f}ms "
+                  f"{lookup * 1000:>8.3f}us {complete * 1000:>8.3f}us")
+        finally:
+            shutil.rmtree(cows)
+            shutil.rmtree(cache)
+
+
+if __name__ == "__main__":
+    main()
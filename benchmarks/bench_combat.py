@@ -0,0 +1,59 @@
+"""Measure cost of a tick in which many heroes attack one monster."""
+import time
+from mood.server import server as srv
+from mood.server.outbox import Outbox
+
+WATCHERS = 1000
+HP = 10 ** 9
+
+
+def setup(attackers):
+    """Create world with boss and clients, return it and attacking heroes."""
+    world = srv.World("arena", srv.Field(100, 100))
+    srv.Monster(0, 0, "boss", "Hi", HP, world.desk)
+    heroes = []
+
+    for i in range(WATCHERS):
+        hero = srv.Hero(world.desk, f"bot{i}")
+        hero.set_locale("en_US.UTF-8")
+        world.join(hero, Outbox(limit=1))
+        heroes.append(hero)
+
+    return world, heroes[:attackers]
+
+
+def one_by_one(world, heroes):
+    """Resolve every attack separately and announce it, as before batching."""
+    for hero in heroes:
+        (damage, hp), = srv.hit_monster(world, 0, 0, [("boss", 10)])
+        srv.notify_attacked(world, hero.name, "boss", "sword", damage, hp, exclude=hero)
+
+
+def batched(world, heroes):
+    """Resolve all attacks of tick in one step and announce them once."""
+    results = srv.hit_monster(world, 0, 0, [("boss", 10)] * len(heroes))
+    blows = [(hero.name, "sword", damage, hp) for hero, (damage, hp) in zip(heroes, results)]
+    srv.notify_fought(world, "boss", blows, exclude=set(heroes))
+
+
+def measure(action, world, heroes, repeat=5):
+    """Return average time of action in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        action(world, heroes)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    """Print cost of one tick of attacks on one monster."""
+    print(f"{'attackers':>10} {'one by one':>12} {'batched':>12}")
+
+    for attackers in (10, 100, 1000):
+        world, heroes = setup(attackers)
+        old = measure(one_by_one, world, heroes)
+        new = measure(batched, world, heroes)
+        print(f"{attackers:>10} {old:>10.3f}ms {new:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
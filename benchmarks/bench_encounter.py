@@ -0,0 +1,64 @@
+"""Measure how finding heroes that meet moved monsters scales with clients and moves."""
+import random
+import time
+from mood.server.server import Field, Hero
+from mood.server.broadcast import Broadcaster
+from mood.server.outbox import Outbox
+
+SIZE = 1000
+
+
+def make_clients(count):
+    """Create broadcaster with count heroes spread over field."""
+    desk = Field(SIZE, SIZE)
+    clients = Broadcaster(width=SIZE, height=SIZE)
+
+    for i in range(count):
+        hero = Hero(desk, f"bot{i}")
+        hero.set_position(random.randrange(SIZE), random.randrange(SIZE))
+        clients.subscribe(hero, Outbox())
+
+    return clients
+
+
+def scan(clients, cells):
+    """Compare every moved monster with every client, as roaming_monster did."""
+    return sum(1 for cell in cells for hero in clients.keys() if hero.get_position() == cell)
+
+
+def grouped(clients, cells):
+    """Group all clients by position once per tick."""
+    heroes = {}
+    for hero in clients.keys():
+        heroes.setdefault(hero.get_position(), []).append(hero)
+    return sum(len(heroes.get(cell, ())) for cell in cells)
+
+
+def indexed(clients, cells):
+    """Look moved monsters up in cell index of broadcaster."""
+    return sum(len(clients.at(*cell)) for cell in cells)
+
+
+def measure(function, clients, cells):
+    """Return time of one call in milliseconds."""
+    start = time.perf_counter()
+    function(clients, cells)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Print time of encounter detection for one tick."""
+    print(f"{'clients':>8} {'moves':>6} {'scan':>12} {'grouped':>12} {'indexed':>12}")
+
+    for count in (1000, 10000, 100000):
+        clients = make_clients(count)
+        for moves in (10, 100, 1000):
+            cells = [(random.randrange(SIZE), random.randrange(SIZE)) for _ in range(moves)]
+            times = [None if function is scan and count * moves > 10 ** 7 else measure(function, clients, cells)
+                     for function in (scan, grouped, indexed)]
+            columns = " ".join("           -" if value is None else f"{value:>10.3f}ms" for value in times)
+            print(f"{count:>8} {moves:>6} {columns}")
+
+
+if __name__ == "__main__":
+    main()
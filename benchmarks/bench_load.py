@@ -0,0 +1,184 @@
+"""
+Load server with many bot clients and measure throughput and latency.
+
+Bots are engine.Connection instances, they log in with binary codec and send commands chosen by weighted mix.
+Commands answered by server (move, addmon, attack) are sent one at a time
+and their round trip is measured, sayall is counted without waiting.
+Results are printed as JSON and optionally written to file.
+
+Example: python -m benchmarks.bench_load --bots 200 --duration 20 --mix move=6,attack=2,addmon=1,sayall=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from mood.client import engine
+from mood.common import protocol
+
+NAMES = ["tux", "cheese", "daemon"]
+WEAPONS = ["sword", "spear", "axe"]
+REPLIES = {"move": ("Moved to",), "addmon": ("Added monster",), "attack": ("Attacked", "No ")}
+
+argparser = argparse.ArgumentParser(description="Load test of MOOD server.")
+argparser.add_argument("--bots", type=int, default=50, help="number of bot clients")
+argparser.add_argument("--duration", type=float, default=5, help="seconds of load")
+argparser.add_argument("--mix", default="move=6,attack=2,addmon=1,sayall=1", help="weights of commands")
+argparser.add_argument("--host", default="localhost", help="server host")
+argparser.add_argument("--port", type=int, help="port of running server, by default new server is started")
+argparser.add_argument("--pid", type=int, help="pid of running server to measure its memory")
+argparser.add_argument("--width", type=int, default=10, help="field width of started server")
+argparser.add_argument("--height", type=int, default=10, help="field height of started server")
+argparser.add_argument("--timeout", type=float, default=5, help="seconds to wait for reply")
+argparser.add_argument("--output", help="file to write JSON results to")
+
+
+def parse_mix(text):
+    """Return commands and their weights from string like move=6,attack=2."""
+    mix = dict(item.split("=") for item in text.split(","))
+    unknown = set(mix) - {"move", "attack", "addmon", "sayall"}
+
+    if unknown:
+        raise ValueError(f"Unknown commands in mix: {', '.join(sorted(unknown))}")
+    return {command: float(weight) for command, weight in mix.items()}
+
+
+def make_command(kind, width, height):
+    """Return random protocol command of kind."""
+    match kind:
+        case "move":
+            return protocol.Move(*random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)]))
+        case "attack":
+            return protocol.Attack(random.choice(NAMES), random.choice(WEAPONS))
+        case "addmon":
+            return protocol.AddMonster(random.choice(NAMES), "Hello", random.randint(1, 30),
+                                       random.randrange(width), random.randrange(height))
+        case "sayall":
+            return protocol.SayAll("hello")
+
+
+async def bot(number, args, mix, deadline, latencies, counts):
+    """Connect to server and send random commands until deadline."""
+    connection = await engine.Connection.open(args.host, args.port, f"bot{number}", "binary")
+    kinds, weights = list(mix), list(mix.values())
+
+    try:
+        while time.perf_counter() < deadline:
+            kind = random.choices(kinds, weights)[0]
+            start = time.perf_counter()
+            connection.send(make_command(kind, args.width, args.height))
+            await connection.drain()
+
+            if kind in REPLIES:
+                try:
+                    await connection.expect(*REPLIES[kind], timeout=args.timeout)
+                except asyncio.TimeoutError:
+                    counts["timeouts"] = counts.get("timeouts", 0) + 1
+                    continue
+                latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            else:
+                await asyncio.sleep(0)
+
+            counts[kind] = counts.get(kind, 0) + 1
+    finally:
+        await connection.close()
+
+
+def percentile(values, part):
+    """Return value below which part of sorted values lie."""
+    return values[min(len(values) - 1, int(len(values) * part))] if values else None
+
+
+def rss_megabytes(pid):
+    """Return resident memory of process in megabytes or None if it can not be read."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, TypeError):
+        return None
+
+
+async def load(args, mix):
+    """Run all bots and return results."""
+    latencies = {}
+    counts = {}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(bot(number, args, mix, deadline, latencies, counts) for number in range(args.bots)))
+    elapsed = time.perf_counter() - start
+    timeouts = counts.pop("timeouts", 0)
+    every = [value for values in latencies.values() for value in values]
+
+    def summary(values):
+        values = sorted(values)
+        return {"p50_ms": percentile(values, 0.5) * 1000, "p99_ms": percentile(values, 0.99) * 1000}
+
+    return {
+        "bots": args.bots,
+        "duration": elapsed,
+        "mix": mix,
+        "commands": sum(counts.values()),
+        "commands_per_second": sum(counts.values()) / elapsed,
+        "timeouts": timeouts,
+        "latency": summary(every) if every else None,
+        "per_command": {kind: {"count": counts[kind], **(summary(latencies[kind]) if kind in latencies else {})}
+                        for kind in counts},
+        "server_rss_mb": rss_megabytes(args.pid),
+    }
+
+
+def free_port():
+    """Return port that is free now."""
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, *options):
+    """Start server process for benchmark with additional command line options and wait until it accepts connections."""
+    args.port = free_port()
+    server = subprocess.Popen([sys.executable, "-c", "from mood.server.__main__ import server; server()",
+                               "--port", str(args.port), "--width", str(args.width), "--height", str(args.height),
+                               "--queue-limit", "4096", *options], stdout=subprocess.DEVNULL)
+    args.pid = server.pid
+
+    for _ in range(100):
+        try:
+            socket.create_connection((args.host, args.port)).close()
+            return server
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+def main(argv=None):
+    """Run benchmark and print results."""
+    args = argparser.parse_args(argv)
+    mix = parse_mix(args.mix)
+    server = start_server(args) if args.port is None else None
+
+    try:
+        results = asyncio.run(load(args, mix))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    text = json.dumps(results, indent=2)
+    print(text)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + os.linesep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure cost of localized broadcast with clients of mixed locales."""
+import random
+import time
+from mood.server.server import Field, Hero, LOCALES, ngettext
+from mood.server.broadcast import Broadcaster
+from mood.server.outbox import Outbox
+
+REPEAT = 20
+MIXES = {"en": {"en_US.UTF-8": 1}, "ru": {"ru_RU.UTF-8": 1}, "mixed": {"en_US.UTF-8": 1, "ru_RU.UTF-8": 1}}
+
+
+def make_clients(count, mix):
+    """Create broadcaster with count heroes, locales are chosen by weights of mix."""
+    desk = Field()
+    clients = Broadcaster()
+    locales, weights = list(mix), list(mix.values())
+
+    for i in range(count):
+        hero = Hero(desk, f"bot{i}")
+        hero.set_locale(random.choices(locales, weights)[0])
+        clients.subscribe(hero, Outbox(limit=REPEAT))
+
+    return clients
+
+
+def notice(locale):
+    """Build localized message about attack with memoized template."""
+    return ngettext(locale, "User {} attacked monster {} with {}, damage {} hp",
+                    "User {} attacked monster {} with {}, damage {} hps", 10).format("bot0", "daemon", "sword", 10)
+
+
+def uncached(locale):
+    """Build the same message looking it up in catalog every time."""
+    return LOCALES.translation(locale).ngettext("User {} attacked monster {} with {}, damage {} hp",
+                                                "User {} attacked monster {} with {}, damage {} hps",
+                                                10).format("bot0", "daemon", "sword", 10)
+
+
+def per_client(clients, build):
+    """Fan-out that renders message for every client."""
+    for hero, queue in clients.items():
+        queue.put_nowait(build(hero.get_locale()))
+
+
+def measure(clients, action):
+    """Return average time in milliseconds of one broadcast."""
+    total = 0
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        action()
+        total += time.perf_counter() - start
+        for queue in clients.values():
+            while not queue.empty():
+                queue.get_nowait()
+
+    return total / REPEAT * 1000
+
+
+def main():
+    """Print localized broadcast cost table."""
+    if "ru_RU.UTF-8" not in LOCALES:
+        print("Russian catalog is not compiled, run doit compile first")
+        return
+
+    print(f"{'clients':>8} {'mix':>6} {'lookup':>12} {'memoized':>12} {'publish':>12}")
+
+    for count in (1000, 10000):
+        for label, mix in MIXES.items():
+            clients = make_clients(count, mix)
+            lookup = measure(clients, lambda: per_client(clients, uncached))
+            memoized = measure(clients, lambda: per_client(clients, notice))
+            once = measure(clients, lambda: clients.publish(notice))
+            print(f"{count:>8} {label:>6} {lookup:>10.3f}ms {memoized:>10.3f}ms {once:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare memory used by 100k monsters in different representations."""
+import random
+import tracemalloc
+from mood.server.server import Field, Monster
+from mood.server.store import MonsterStore
+
+COUNT = 100000
+NAMES = ["cheese", "daemon", "dragon", "jgsbat", "tux"]
+PHRASES = [f"Phrase number {i}" for i in range(100)]
+
+
+class DictMonster:
+    """Monster with instance dict, as it was before MonsterStore."""
+
+    def __init__(self, x, y, name, phrase, hp, field):
+        """Keep all attributes in instance dict."""
+        self.field = field
+        self.x = x
+        self.y = y
+        self.name = name
+        self.phrase = phrase
+        self.hp = hp
+
+
+class SlotsMonster:
+    """Monster with __slots__ instead of instance dict."""
+
+    __slots__ = ("field", "x", "y", "name", "phrase", "hp")
+
+    def __init__(self, x, y, name, phrase, hp, field):
+        """Keep all attributes in slots."""
+        self.field = field
+        self.x = x
+        self.y = y
+        self.name = name
+        self.phrase = phrase
+        self.hp = hp
+
+
+def attributes():
+    """Return attributes of monsters, names and phrases are built per monster as they come from network."""
+    return [(i % 1000, i // 1000, "".join(random.choice(NAMES)), "".join(random.choice(PHRASES)), 100)
+            for i in range(COUNT)]
+
+
+def measure(build):
+    """Return megabytes kept alive by monsters built by function."""
+    tracemalloc.start()
+    data = attributes()
+    kept = build(data)
+    del data
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / 2 ** 20
+
+
+def objects(cls):
+    """Return function creating list of monster objects of class cls."""
+    return lambda data: [cls(*args, None) for args in data]
+
+
+def store(data):
+    """Put all monsters in MonsterStore."""
+    monsters = MonsterStore()
+    for args in data:
+        monsters.add(*args)
+    return monsters
+
+
+def field(data):
+    """Put all monsters on field with spatial index."""
+    desk = Field(1000, COUNT // 1000)
+    for args in data:
+        Monster(*args, desk)
+    return desk
+
+
+def main():
+    """Print memory table."""
+    print(f"{'representation':>16} {'memory':>10}")
+
+    for name, build in [("dict objects", objects(DictMonster)), ("__slots__", objects(SlotsMonster)),
+                        ("MonsterStore", store), ("Field + index", field)]:
+        print(f"{name:>16} {measure(build):>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measure outbound throughput per connection of old and new ways of writing message batches."""
+import asyncio
+import time
+from mood.common import protocol
+
+DRAIN_TIMEOUT = 10
+WRITE_BUFFER = 64 * 1024
+SECONDS = 1
+
+
+def old_batch(messages, codec):
+    """Join batch of str messages into one buffer, as server did before pre-encoded chunks."""
+    res = messages[0]
+    for message in messages[1:]:
+        res += "\n" + message
+    return [res.encode()] if codec == "text" else [protocol.ENCODERS[codec](messages)]
+
+
+async def old_send(writer, messages, codec):
+    """Write batch encoded for this connection and drain after every batch."""
+    writer.write(b"".join(old_batch(messages, codec)))
+    await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+
+
+async def new_send(writer, messages, codec):
+    """Write shared encoded messages with writelines, drain only when transport buffer is full."""
+    writer.writelines(protocol.CHUNKERS[codec](messages))
+    if writer.transport.get_write_buffer_size() >= WRITE_BUFFER:
+        await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+
+
+async def sink(reader, received):
+    """Read and count bytes until connection is closed."""
+    while data := await reader.read(1 << 16):
+        received[0] += len(data)
+
+
+async def measure(send, codec, connections, batch, size):
+    """Return megabytes per second received by one connection."""
+    accepted = asyncio.Queue()
+    server = await asyncio.start_server(lambda reader, writer: accepted.put_nowait(writer), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    received = [0]
+    readers = []
+    clients = []
+
+    for _ in range(connections):
+        reader, client = await asyncio.open_connection("127.0.0.1", port)
+        readers.append(asyncio.create_task(sink(reader, received)))
+        clients.append(client)
+    writers = [await accepted.get() for _ in range(connections)]
+
+    text = ["x" * size for _ in range(batch)]
+    shared = [message.encode() for message in text]
+    messages = text if send is old_send else shared
+    deadline = time.perf_counter() + SECONDS
+    start = time.perf_counter()
+
+    while time.perf_counter() < deadline:
+        for writer in writers:
+            await send(writer, messages, codec)
+        await asyncio.sleep(0)
+
+    for writer in writers:
+        await writer.drain()
+        writer.close()
+    await asyncio.gather(*readers)
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        client.close()
+
+    server.close()
+    await server.wait_closed()
+    return received[0] / elapsed / connections / 2 ** 20
+
+
+async def main():
+    """Print throughput table."""
+    print(f"{'codec':>7} {'conns':>6} {'batch':>6} {'size':>6} {'old MB/s':>10} {'new MB/s':>10}")
+
+    for codec in ("text", "binary"):
+        for connections, batch, size in ((1, 1, 100), (1, 64, 100), (1, 16, 2000), (100, 16, 100), (100, 4, 2000)):
+            old = await measure(old_send, codec, connections, batch, size)
+            new = await measure(new_send, codec, connections, batch, size)
+            print(f"{codec:>7} {connections:>6} {batch:>6} {size:>6} {old:>10.1f} {new:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
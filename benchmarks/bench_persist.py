@@ -0,0 +1,64 @@
+"""Measure saving and recovery of world with many monsters."""
+import asyncio
+import random
+import tempfile
+import time
+from mood.server.server import Field, Monster, change_field
+from mood.server import persist, simulation
+
+SIZE = 2000
+TICKS = 10
+
+
+def make_field(count):
+    """Create field with count monsters on random cells."""
+    desk = Field(SIZE, SIZE)
+
+    for n in random.sample(range(SIZE * SIZE), count):
+        Monster(n % SIZE, n // SIZE, random.choice(["cheese", "tux", "daemon"]), "Hi", 10, desk)
+
+    return desk
+
+
+async def save(desk, directory):
+    """Save snapshot and log of several ticks moving tenth of monsters, return timings in seconds."""
+    journal = persist.Journal(directory)
+    journal.recover(Field(SIZE, SIZE), change_field)
+    journal.start(desk)
+
+    start = time.perf_counter()
+    await journal.snapshot(desk)
+    snapshot = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        moves = simulation.plan_moves(desk, 0.1)
+        desk.move_characters(moves)
+        journal.append(("moves", moves))
+        await journal.flush()
+    log = time.perf_counter() - start
+
+    journal.task.cancel()
+    return snapshot, log
+
+
+def main():
+    """Print timing table."""
+    print(f"{'monsters':>9} {'snapshot':>10} {'log':>10} {'recover':>10}")
+
+    for count in (10000, 100000, 1000000):
+        desk = make_field(count)
+
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot, log = asyncio.run(save(desk, directory))
+            start = time.perf_counter()
+            field = Field()
+            persist.Journal(directory).recover(field, change_field, compact=False)
+            recover = time.perf_counter() - start
+
+        assert len(field) == count
+        print(f"{count:>9} {snapshot:>9.2f}s {log:>9.2f}s {recover:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Compare command parsing with shlex and with protocol parser."""
+import shlex
+import time
+from mood.common import protocol
+
+REPEAT = 20000
+LINES = ["move 0 1", "move -1 0", "attack daemon sword", "addmon daemon phrase 'What a hell' hp 100 coords 0 1",
+         "sayall hello", "movemonsters off", "locale ru_RU.UTF-8"]
+
+
+def with_shlex(line):
+    """Parse line the way server did before protocol module."""
+    match shlex.split(line):
+        case ["move", a, b]:
+            return int(a), int(b)
+        case ["addmon", name, "phrase", phrase, "hp", hp, "coords", x, y]:
+            return name, phrase, int(hp), int(x), int(y)
+        case ["attack", name, weapon]:
+            return name, weapon
+        case ["sayall", text] | ["movemonsters", text] | ["locale", text]:
+            return text
+
+
+def measure(parse, line):
+    """Return microseconds to parse line."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        parse(line)
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    """Print parsing time table."""
+    print(f"{'command':>14} {'shlex':>10} {'protocol':>10}")
+
+    for line in LINES:
+        print(f"{line.split()[0]:>14} {measure(with_shlex, line):>8.2f}us {measure(protocol.parse, line):>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
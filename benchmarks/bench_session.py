@@ -0,0 +1,60 @@
+"""Measure per command overhead of MUD session loop over loopback connection."""
+import asyncio
+import sys
+import time
+from mood.common import protocol
+from mood.server import server as srv
+
+COMMANDS = 20000
+BATCH = 200
+
+
+async def session(port, codec, command):
+    """Return microseconds per command sent in pipelined batches, every command gets one reply."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(protocol.Login("bench", codec).encode())
+    await reader.readline()
+    data = command.encode() if codec == "text" else protocol.pack(protocol.COMMAND, command.encode().rstrip())
+    marker = b"Moved to"
+    start = time.perf_counter()
+
+    for _ in range(COMMANDS // BATCH):
+        writer.write(data * BATCH)
+        replies = 0
+        while replies < BATCH:
+            replies += (await reader.read(1 << 16)).count(marker)
+
+    elapsed = time.perf_counter() - start
+    writer.write(protocol.Quit().encode() if codec == "text" else protocol.pack(protocol.COMMAND, b"quit"))
+    await reader.read()
+    writer.close()
+    return elapsed / COMMANDS * 10 ** 6
+
+
+async def measure(transport, codec):
+    """Return microseconds per move command."""
+    srv.lobby = srv.World(srv.LOBBY, srv.Field())
+    srv.worlds = {srv.LOBBY: srv.lobby}
+    srv.TRANSPORT = transport
+    server = await srv.listen("127.0.0.1", 0)
+    try:
+        return await session(server.sockets[0].getsockname()[1], codec, "move 1 0\n")
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def main(transports):
+    """Print table of per command costs."""
+    sys.stdout, output = open("/dev/null", "w"), sys.stdout
+    results = [(transport, codec, await measure(transport, codec))
+               for transport in transports for codec in ("text", "binary")]
+    sys.stdout = output
+
+    print(f"{'transport':>10} {'codec':>7} {'us/command':>11}")
+    for transport, codec, cost in results:
+        print(f"{transport:>10} {codec:>7} {cost:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or ["streams", "protocol"]))
@@ -0,0 +1,97 @@
+"""Compare bytes and time of per tick diffs with resending full snapshots to synced clients."""
+import asyncio
+import random
+import time
+from mood.server.server import Field, Hero, Monster
+from mood.server.sync import StateSync
+
+SIZE = 200
+RADIUS = 10
+TICKS = 50
+
+
+class Counter:
+    """Queue replacement that only counts sent bytes."""
+
+    def __init__(self):
+        """Create empty counter."""
+        self.bytes = 0
+
+    def put_nowait(self, message):
+        """Count message size."""
+        self.bytes += len(message.encode())
+
+
+def populate(monsters):
+    """Return field with monsters on random cells."""
+    desk = Field(SIZE, SIZE)
+    for _ in range(monsters):
+        Monster(random.randrange(SIZE), random.randrange(SIZE), "tux", "Hello", 100, desk)
+    return desk
+
+
+def change(desk):
+    """Change random monster and return field change event."""
+    cell = desk.random_cell()
+    monster = desk.get_character(*cell)
+    if random.random() < 0.5:
+        monster.set_hp(max(1, monster.get_hp() - 1))
+        return ("hp", *cell, monster.get_hp())
+
+    new = desk.wrap(cell[0] + 1, cell[1])
+    if desk.check_position(*new):
+        return ("hp", *cell, monster.get_hp())
+    desk.move_characters([(cell, new, "right")])
+    return ("moves", [(cell, new, "right")])
+
+
+def run(clients, monsters, changes, mode):
+    """Return bytes sent per tick and milliseconds per tick."""
+    desk = populate(monsters)
+    sync = StateSync(desk, 0)
+    counters = []
+
+    for i in range(clients):
+        hero = Hero(desk, f"bot{i}")
+        hero.set_position(random.randrange(SIZE), random.randrange(SIZE))
+        counters.append(Counter())
+        sync.subscribe(hero, counters[-1], RADIUS)
+
+    sent = sum(counter.bytes for counter in counters)
+    start = time.perf_counter()
+
+    for _ in range(TICKS):
+        for _ in range(changes):
+            sync.record(change(desk))
+
+        if mode == "diff":
+            sync.flush()
+        else:
+            sync.changes.clear()
+            for hero, (queue, radius, center, *_) in sync.subscribers.items():
+                queue.put_nowait(sync.snapshot(center, radius))
+
+    elapsed = (time.perf_counter() - start) / TICKS * 1000
+    if sync.handle is not None:
+        sync.handle.cancel()
+    return (sum(counter.bytes for counter in counters) - sent) / TICKS, elapsed
+
+
+async def measure():
+    """Print table of costs for both ways of delivery."""
+    print(f"{'clients':>8} {'monsters':>9} {'changes':>8} {'snapshot':>14} {'diff':>14} {'snapshot':>10} {'diff':>10}")
+
+    for clients, monsters, changes in ((100, 2000, 10), (100, 2000, 200), (1000, 10000, 100), (1000, 10000, 1000)):
+        full_bytes, full_time = run(clients, monsters, changes, "snapshot")
+        diff_bytes, diff_time = run(clients, monsters, changes, "diff")
+        print(f"{clients:>8} {monsters:>9} {changes:>8} {full_bytes:>12.0f}B {diff_bytes:>12.0f}B "
+              f"{full_time:>8.2f}ms {diff_time:>8.2f}ms")
+
+
+def main():
+    """Run benchmark inside event loop, sync schedules its ticks on it."""
+    asyncio.run(measure())
+
+
+if __name__ == "__main__":
+    main()
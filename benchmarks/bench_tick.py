@@ -0,0 +1,49 @@
+"""Measure time of one monster movement tick against monster count."""
+import random
+import time
+from unittest.mock import patch
+from mood.server.server import Field, Monster
+from mood.server import simulation
+
+REPEAT = 5
+SIZE = 1000
+
+
+def make_field(count):
+    """Create big field with count monsters on random cells."""
+    desk = Field(SIZE, SIZE)
+
+    for n in random.sample(range(SIZE * SIZE), count):
+        Monster(n % SIZE, n // SIZE, "cheese", "Hi", 10, desk)
+
+    return desk
+
+
+def measure(desk):
+    """Return average milliseconds to plan and apply tick moving all monsters."""
+    total = 0
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        desk.move_characters(simulation.plan_moves(desk, 1.0))
+        total += time.perf_counter() - start
+
+    return total / REPEAT * 1000
+
+
+def main():
+    """Print tick time table."""
+    print(f"{'monsters':>9} {'numpy':>12} {'python':>12}")
+
+    for count in (1000, 10000, 100000):
+        desk = make_field(count)
+        fast = measure(desk) if simulation.numpy is not None else float("nan")
+
+        with patch.object(simulation, "numpy", None):
+            slow = measure(desk)
+
+        print(f"{count:>9} {fast:>10.2f}ms {slow:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measure cost of broadcast when the same clients are split into worlds of different size."""
+import time
+from mood.server import server as srv
+from mood.server.outbox import Outbox
+
+CLIENTS = 10000
+REPEAT = 20
+
+
+def make_worlds(size):
+    """Split CLIENTS heroes into worlds of size heroes."""
+    worlds = []
+
+    for number in range(CLIENTS // size):
+        world = srv.World(f"room{number}", srv.Field(srv.ROOM_WIDTH, srv.ROOM_HEIGHT))
+        for i in range(size):
+            hero = srv.Hero(world.desk, f"bot{number}_{i}")
+            hero.set_locale("en_US.UTF-8")
+            world.join(hero, Outbox(limit=1))
+        worlds.append(world)
+
+    return worlds
+
+
+def measure(worlds):
+    """Return average time in milliseconds of one message said in one world."""
+    total = 0
+
+    for number in range(REPEAT):
+        world = worlds[number % len(worlds)]
+        start = time.perf_counter()
+        srv.notify_said(world, "bot", "hello")
+        total += time.perf_counter() - start
+
+    return total / REPEAT * 1000
+
+
+def main():
+    """Print broadcast cost table."""
+    print(f"{'clients':>8} {'world size':>11} {'worlds':>7} {'sayall':>12}")
+
+    for size in (10, 100, 1000, CLIENTS):
+        worlds = make_worlds(size)
+        print(f"{CLIENTS:>8} {size:>11} {len(worlds):>7} {measure(worlds):>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -58,13 +58,38 @@ def task_test():
     return {
         'actions': [
             'python3 -m unittest ./tests/test_server.py',
-            'python3 -m unittest ./tests/test_client.py'
+            'python3 -m unittest ./tests/test_client.py',
+            'python3 -m unittest ./tests/test_field.py',
+            'python3 -m unittest ./tests/test_outbox.py',
+            'python3 -m unittest ./tests/test_cluster.py',
+            'python3 -m unittest ./tests/test_persist.py',
+            'python3 -m unittest ./tests/test_protocol.py',
+            'python3 -m unittest ./tests/test_metrics.py',
+            'python3 -m unittest ./tests/test_engine.py',
+            'python3 -m unittest ./tests/test_i18n.py',
+            'python3 -m unittest ./tests/test_combat.py',
+            'python3 -m unittest ./tests/test_broadcast.py',
+            'python3 -m unittest ./tests/test_worlds.py',
+            'python3 -m unittest ./tests/test_catalogue.py',
+            'python3 -m unittest ./tests/test_admission.py',
+            'python3 -m unittest ./tests/test_sync.py',
+            'python3 -m unittest ./tests/test_session.py',
+            'python3 -m unittest ./tests/test_startup.py'
         ],
-        'file_dep': ["./tests/test_server.py", "./tests/test_client.py"],
+        'file_dep': glob.glob("./tests/test_*.py"),
         'task_dep': ['i18n']
     }
 
 
+def task_bench():
+    """Run benchmarks."""
+    return {
+        'actions': [f'python3 -m benchmarks.{os.path.basename(f)[:-3]}'
+                    for f in sorted(glob.glob('./benchmarks/bench_*.py'))],
+        'verbosity': 2,
+    }
+
+
 def task_html():
     """Crete docs html."""
     return {
@@ -1,7 +1,11 @@
 """Start client."""
+import asyncio
 import socket
 import threading
 from ..client import client as cl
+from ..client import engine
+from ..common import protocol
+from ..common.catalogue import MONSTERS
 import argparse
 
 argparser = argparse.ArgumentParser()
@@ -10,8 +14,36 @@ argparser.add_argument("username", type=str, default='client1', help="Your usern
 argparser.add_argument("--file", type=str, help="Comands file")
 argparser.add_argument("--host", default='localhost', help="host addr")
 argparser.add_argument("--port", type=int, default=1337, help="connection port")
+argparser.add_argument("--replay", action="store_true",
+                       help="send commands from --file in batches without pauses and print statistics")
+argparser.add_argument("--batch", type=int, default=100, help="commands sent at once in replay mode")
+argparser.add_argument("--rate", type=float, default=0,
+                       help="maximum commands per second in replay mode, 0 is as fast as possible")
+argparser.add_argument("--ack", action="store_true", help="wait for server replies in replay mode")
+argparser.add_argument("--cows", action="append", default=[],
+                       help="directory with .cow files of additional monsters, may be repeated")
+argparser.add_argument("--engine", choices=["thread", "asyncio"], default="thread",
+                       help="blocking socket with reader thread or asyncio connection")
+argparser.add_argument("--codec", choices=protocol.CODECS,
+                       help="messages format: text lines, binary frames or binary frames with compression, "
+                            "binary by default with asyncio engine and in replay mode, text otherwise")
+
+
+def choose_codec(args):
+    """
+    Return codec of connection, default depends on engine.
+
+    Asyncio connection reads text codec in chunks that can split multi-line
+    messages like monster pictures, so it uses binary frames unless text is requested.
+    """
+    if args.codec is not None:
+        return args.codec
+    return "binary" if args.engine == "asyncio" or args.replay else "text"
+
 
 args = argparser.parse_args()
+args.codec = choose_codec(args)
+MONSTERS.extend(args.cows)
 
 
 name = args.username
@@ -19,15 +51,48 @@ host = args.host
 port = args.port
 
 
+async def play():
+    """Start client on asyncio connection."""
+    try:
+        connection = await engine.Connection.open(host, port, name, args.codec)
+    except ValueError:
+        print(f"User with name {name} already exists")
+        return
+
+    print(f'User {name} registered', end='\n\n')
+
+    if args.file and args.replay:
+        with open(args.file, "r") as f:
+            stats = await cl.replay(connection, f, args.batch, args.rate, args.ack)
+        await connection.close()
+        print(f"Sent {stats['commands']} commands in {stats['seconds']:.2f} s, "
+              f"{stats['commands_per_second']:.0f} commands/s")
+        if stats["p50_ms"] is not None:
+            print(f"Reply latency p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms, "
+                  f"missing replies {stats['missing_replies']}")
+    elif args.file:
+        with open(args.file, "r") as f:
+            await cl.play(connection, f, timeout=1)
+    else:
+        await cl.play(connection)
+
+
 def client():
     """Start client."""
+    if args.engine == "asyncio" or args.replay:
+        asyncio.run(play())
+        return
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.connect((host, port))
-        s.sendall(f'login {name}\n'.encode())
+        s.sendall(protocol.Login(name, args.codec).encode())
         f = int(s.recv(2).rstrip().decode())
         if f:
             print(f'User {name} registered', end='\n\n')
 
+            if args.codec != "text":
+                s = protocol.FramedSocket(s)
+
             if args.file:
                 with open(args.file, "r") as f:
                     cmd = cl.MUD(s, stdin=f, timeout=1)
@@ -0,0 +1,51 @@
+"""Copy of field around hero kept up to date by sync messages."""
+import json
+
+PREFIX = "sync "
+
+
+class Board:
+    """
+    Monsters around hero as known to client in sync with server.
+
+    Snapshot replaces the whole board, diff is applied only to the version it
+    was made from. Board that missed a diff must be refreshed by new sync command.
+    """
+
+    def __init__(self):
+        """Create empty board that waits for snapshot."""
+        self.version = None
+        self.center = None
+        self.radius = None
+        self.monsters = {}
+
+    def apply(self, message: str):
+        """
+        Apply snapshot or diff received from server.
+
+        :param message: message starting with "sync "
+        :return: False if diff does not follow board version and sync must be requested again
+        """
+        state = json.loads(message[len(PREFIX):])
+
+        if "monsters" in state:
+            self.center = tuple(state["center"])
+            self.radius = state["radius"]
+            self.monsters = {(x, y): (name, phrase, hp) for x, y, name, phrase, hp in state["monsters"]}
+        elif state["from"] != self.version:
+            return False
+        else:
+            for change in state["changes"]:
+                match change:
+                    case ["set", x, y, name, phrase, hp]:
+                        self.monsters[x, y] = (name, phrase, hp)
+                    case ["hp", x, y, hp]:
+                        name, phrase, _ = self.monsters[x, y]
+                        self.monsters[x, y] = (name, phrase, hp)
+                    case ["delete", x, y]:
+                        self.monsters.pop((x, y), None)
+                    case ["move", x, y, new_x, new_y]:
+                        self.monsters[new_x, new_y] = self.monsters.pop((x, y))
+
+        self.version = state["version"]
+        return True
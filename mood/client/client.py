@@ -1,9 +1,11 @@
 """Main functionality of client module."""
-import cowsay
-from ..common import custom_monsters
-import shlex
+from ..common import protocol
+from ..common.catalogue import MONSTERS
+import asyncio
 import cmd
+import collections
 import readline
+import threading
 import time
 import webbrowser
 from pathlib import Path
@@ -29,6 +31,176 @@ def read_chat(sock, cmd):
             return
 
 
+async def print_messages(connection, cmd):
+    """
+    Print messages received by asyncio connection until it is closed.
+
+    :param connection: engine.Connection instance
+    :param cmd: Command line instance
+    """
+    async for msg in connection:
+        print(f"\n{msg}\n{cmd.prompt}{readline.get_line_buffer()}", end="", flush=True)
+    print("Dead ^(")
+
+
+def read_input(loop, lines, prompt):
+    """
+    Read terminal lines and pass them to event loop, runs in daemon thread to keep readline editing.
+
+    :param loop: event loop
+    :param lines: asyncio queue for lines
+    :param prompt: command line prompt
+    """
+    while True:
+        try:
+            line = input(prompt)
+        except EOFError:
+            line = "EOF"
+        loop.call_soon_threadsafe(lines.put_nowait, line)
+        if line == "EOF":
+            return
+
+
+async def play(connection, stdin=None, timeout=0):
+    """
+    Run command line over asyncio connection, messages are printed as soon as they come.
+
+    :param connection: logged in engine.Connection
+    :param stdin: file with commands, terminal is used by default
+    :param timeout: pause between commands from file
+    """
+    shell = MUD(connection, timeout)
+    printer = asyncio.create_task(print_messages(connection, shell))
+    lines = asyncio.Queue()
+
+    if stdin is None:
+        print(shell.intro)
+        threading.Thread(target=read_input, args=[asyncio.get_running_loop(), lines, shell.prompt],
+                         daemon=True).start()
+    else:
+        shell.prompt = ""
+        for line in stdin:
+            lines.put_nowait(line.rstrip("\n"))
+        lines.put_nowait("EOF")
+
+    try:
+        while not printer.done():
+            getter = asyncio.create_task(lines.get())
+            await asyncio.wait([getter, printer], return_when=asyncio.FIRST_COMPLETED)
+
+            if not getter.done():
+                getter.cancel()
+                break
+            if shell.onecmd(getter.result()):
+                break
+
+            await connection.drain()
+            await asyncio.sleep(timeout)
+    finally:
+        printer.cancel()
+        await connection.close()
+
+
+class Recorder:
+    """Replacement of socket for MUD shell that collects command lines instead of sending them."""
+
+    def __init__(self):
+        """Create empty recorder."""
+        self.lines = []
+
+    def sendall(self, data: bytes):
+        """Remember command line."""
+        self.lines.append(data)
+
+
+ACKS = {
+    protocol.Move: ("Moved to",),
+    protocol.AddMonster: ("Added monster",),
+    protocol.Attack: ("Attacked", "No "),
+    protocol.MoveMonsters: ("Moving monsters",),
+    protocol.Locale: ("Set up locale", "Locale "),
+    protocol.Join: ("Joined world",),
+    protocol.Sync: ('sync {"version"', "Sync stopped"),
+}
+
+
+async def acknowledge(connection, pending, latencies):
+    """Wait for replies to sent commands in order, they are recognized by english prefixes."""
+    while pending:
+        msg = await connection.receive()
+        if msg.startswith(pending[0][1]):
+            latencies.append(time.perf_counter() - pending.popleft()[0])
+
+
+async def wait_replies(connection, pending, latencies, timeout):
+    """Wait for replies to all pending commands, return number of replies that did not come in time."""
+    try:
+        await asyncio.wait_for(acknowledge(connection, pending, latencies), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+    missing = len(pending)
+    pending.clear()
+    return missing
+
+
+async def replay(connection, lines, batch: int = 100, rate: float = 0, ack: bool = False, timeout: float = 5):
+    """
+    Send commands of MUD shell from lines without pauses and return statistics.
+
+    Lines are translated by MUD shell first, then sent in batches. Empty lines are skipped.
+    Replies are always awaited at the end, so time includes processing of all commands.
+
+    :param connection: logged in engine.Connection
+    :param lines: iterable of shell command lines
+    :param batch: number of commands sent before waiting for socket
+    :param rate: maximum commands per second, 0 sends as fast as possible
+    :param ack: wait for server replies after every batch and report their latency
+    :param timeout: seconds to wait for replies of one batch, or of all commands at the end without ack
+    :return: dict with number of commands, seconds, commands per second, latencies and missing replies
+    """
+    recorder = Recorder()
+    recorder.sendall(protocol.MoveMonsters("off").encode())
+    shell = MUD(recorder)
+
+    for line in lines:
+        if line.strip() and shell.onecmd(line.strip()):
+            break
+
+    commands = [(data, ACKS.get(type(protocol.parse(data.decode().strip())))) for data in recorder.lines]
+    pending = collections.deque()
+    latencies = []
+    missing = 0
+    start = time.perf_counter()
+
+    for first in range(0, len(commands), batch):
+        sent = time.perf_counter()
+        for data, prefixes in commands[first:first + batch]:
+            connection.sendall(data)
+            if prefixes:
+                pending.append((sent, prefixes))
+        await connection.drain()
+
+        if ack:
+            missing += await wait_replies(connection, pending, latencies, timeout)
+
+        if rate:
+            await asyncio.sleep(max(0, start + (first + batch) / rate - time.perf_counter()))
+
+    missing += await wait_replies(connection, pending, latencies, timeout)
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latencies) if ack else []
+
+    return {
+        "commands": len(commands),
+        "seconds": elapsed,
+        "commands_per_second": len(commands) / elapsed if elapsed else 0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p99_ms": latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000 if latencies else None,
+        "missing_replies": missing,
+    }
+
+
 def move_hero(direction: str, cmd_socket):
     """
     Move hero one cell.
@@ -47,7 +219,7 @@ def move_hero(direction: str, cmd_socket):
         case "right":
             x, y = 1, 0
 
-    cmd_socket.sendall(f"move {x} {y}\n".encode())
+    cmd_socket.sendall(protocol.Move(x, y).encode())
 
 
 def addmon(options: str, cmd_socket):
@@ -57,7 +229,7 @@ def addmon(options: str, cmd_socket):
     :param options: name, catch phrase, hp, coordinates of added monster
     :param cmd_socket: socket to communicate with server
     """
-    opt = shlex.split(options)
+    opt = protocol.split(options)
     name = opt[0]
     opt = opt[1:]
 
@@ -65,8 +237,7 @@ def addmon(options: str, cmd_socket):
         print('Invalid arguments')
         return
 
-    if (name not in cowsay.list_cows()) and \
-            (name not in custom_monsters):
+    if name not in MONSTERS:
         print('Cannot add unknown monster')
         return
 
@@ -83,7 +254,7 @@ def addmon(options: str, cmd_socket):
                 except Exception:
                     break
 
-                if (hp <= 0):
+                if hp <= 0 or hp > protocol.MAX_HP:
                     break
 
                 cnt = 2
@@ -102,7 +273,7 @@ def addmon(options: str, cmd_socket):
 
         opt = opt[cnt:]
     else:
-        cmd_socket.sendall(f"addmon {name} phrase '{phrase}' hp {hp} coords {x} {y}\n".encode())
+        cmd_socket.sendall(protocol.AddMonster(name, phrase, hp, x, y).encode())
         return
 
     print('Invalid arguments')
@@ -119,7 +290,7 @@ def attack(options: str, cmd_socket):
         print("Invalid arguments")
         return
 
-    args = shlex.split(options)
+    args = protocol.split(options)
     name = args[0]
     args = args[1:]
     weapon = "sword"
@@ -135,7 +306,7 @@ def attack(options: str, cmd_socket):
             print("Invalid arguments")
             return
 
-    cmd_socket.sendall(f'attack {name} {weapon}\n'.encode())
+    cmd_socket.sendall(protocol.Attack(name, weapon).encode())
 
 
 class MUD(cmd.Cmd):
@@ -157,7 +328,7 @@ class MUD(cmd.Cmd):
         self.cmd_timeout = timeout
 
         if self.cmd_timeout != 0:
-            self.cmd_socket.sendall("movemonsters off\n".encode())
+            self.cmd_socket.sendall(protocol.MoveMonsters("off").encode())
 
     def precmd(self, line):
         """
@@ -172,7 +343,7 @@ class MUD(cmd.Cmd):
     def do_EOF(self, args):
         """Initiate socket closure."""
         print('\n')
-        self.cmd_socket.sendall("quit\n".encode())
+        self.cmd_socket.sendall(protocol.Quit().encode())
         return True
 
     # move hero
@@ -205,13 +376,12 @@ class MUD(cmd.Cmd):
 
     def complete_attack(self, text, line, begidx, endidx):
         """Complete monster name and weapon for attack function."""
-        line = shlex.split(line)
-        res = cowsay.list_cows() + list(custom_monsters.keys())
+        line = protocol.split(line)
 
         if line[-1] == "with" or line[-2] == "with":
             return [i for i in armory if i.startswith(text)]
         elif line[-1] == "attack" or line[-2] == "attack":
-            return [i for i in res if i.startswith(text)]
+            return MONSTERS.complete(text)
 
     # add new monster on field
     def do_addmon(self, args):
@@ -235,21 +405,31 @@ class MUD(cmd.Cmd):
 
         :param args: message to send
         """
-        self.cmd_socket.sendall(f"sayall {args}\n".encode())
+        self.cmd_socket.sendall(protocol.SayAll(args).encode())
 
     def do_movemonsters(self, args):
         """Turn on/off random monsters movemets."""
-        self.cmd_socket.sendall(f"movemonsters {args}\n".encode())
+        self.cmd_socket.sendall(protocol.MoveMonsters(args).encode())
 
     def do_locale(self, args):
         """
         Set localization for messages that you will see.
 
-        Available locales: ru_RU.UTF-8, en_US.UTF-8.
+        Available locales are en_US.UTF-8 and ones compiled on server, like ru_RU.UTF-8.
 
         :param args: name of locale
         """
-        self.cmd_socket.sendall(f"locale {args}\n".encode())
+        self.cmd_socket.sendall(protocol.Locale(args).encode())
+
+    def do_join(self, args):
+        """
+        Go to another world, it is created if nobody plays there.
+
+        Everybody starts in world lobby.
+
+        :param args: name of world
+        """
+        self.cmd_socket.sendall(protocol.Join(args).encode())
 
     def do_documentation(self, args):
         """Open generated documentation."""
@@ -0,0 +1,139 @@
+"""Asyncio client connection, usable without terminal by bots and tests."""
+import asyncio
+import codecs
+import zlib
+from ..common import protocol
+
+
+class Connection:
+    """
+    Logged in connection to MOOD server.
+
+    Incoming stream is read by background task and split into whole messages
+    by frames for binary codecs. Text codec has no framing, every read is split
+    into lines. Receiving may be cancelled without breaking the stream, sending
+    never blocks, call drain to wait for socket.
+
+    :param reader: stream from server
+    :param writer: stream to server
+    :param name: user name
+    :param codec: "text", "binary" or "zlib"
+    """
+
+    def __init__(self, reader, writer, name: str, codec: str = "binary"):
+        """Wrap streams of connection that is already logged in."""
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+        self.codec = codec
+        self.inbox = asyncio.Queue()
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.pump = asyncio.create_task(self._pump())
+
+    @classmethod
+    async def open(cls, host: str, port: int, name: str, codec: str = "binary"):
+        """
+        Connect to server and log in.
+
+        :raises ValueError: user with this name is already logged in
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(protocol.Login(name, codec).encode())
+
+        if (await reader.readline()).strip() != b"1":
+            writer.close()
+            raise ValueError(f"User with name {name} already exists")
+
+        return cls(reader, writer, name, codec)
+
+    def sendall(self, data: bytes):
+        """Send command line, has the same signature as socket method so MUD shell can use connection."""
+        if self.codec == "text":
+            self.writer.write(data)
+        else:
+            self.writer.write(protocol.pack(protocol.COMMAND, data.rstrip(b"\n")))
+
+    def send(self, command):
+        """Send protocol command object."""
+        self.sendall(command.encode())
+
+    async def drain(self):
+        """Wait until sent data is passed to socket."""
+        await self.writer.drain()
+
+    async def _read(self):
+        """Return list of messages from next part of stream."""
+        if self.codec != "text":
+            while True:
+                kind, payload = await protocol.read_frame(self.reader)
+                if kind == protocol.MESSAGES:
+                    return protocol.decode_messages(payload)
+
+        data = await self.reader.read(65536)
+        if not data:
+            raise asyncio.IncompleteReadError(b"", None)
+
+        text = self.decoder.decode(data)
+        return text.split("\n") if text else []
+
+    async def _pump(self):
+        """Move messages from stream to inbox, None in inbox marks the end of connection."""
+        try:
+            while True:
+                for message in await self._read():
+                    self.inbox.put_nowait(message)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, zlib.error):
+            self.inbox.put_nowait(None)
+
+    async def receive(self, timeout: float = None):
+        """
+        Return next message from server.
+
+        :param timeout: seconds to wait for message, None waits forever
+        :raises ConnectionError: server closed connection
+        :raises asyncio.TimeoutError: no message came within timeout
+        """
+        message = await asyncio.wait_for(self.inbox.get(), timeout)
+
+        if message is None:
+            self.inbox.put_nowait(None)
+            raise ConnectionError("Connection closed by server")
+        return message
+
+    async def expect(self, *prefixes: str, timeout: float = None):
+        """
+        Skip messages until one starting with any of prefixes and return it.
+
+        :param timeout: seconds to wait for matching message, None waits forever
+        :raises asyncio.TimeoutError: no matching message came within timeout
+        """
+        async def skip():
+            while not (message := await self.receive()).startswith(prefixes):
+                pass
+            return message
+
+        return await asyncio.wait_for(skip(), timeout)
+
+    def __aiter__(self):
+        """Iterate over messages until connection is closed."""
+        return self
+
+    async def __anext__(self):
+        """Return next message or stop at the end of connection."""
+        try:
+            return await self.receive()
+        except ConnectionError:
+            raise StopAsyncIteration from None
+
+    async def close(self):
+        """Send quit and close connection."""
+        self.pump.cancel()
+
+        if not self.writer.is_closing():
+            self.send(protocol.Quit())
+            self.writer.close()
+
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
@@ -0,0 +1,169 @@
+"""Catalogue of monsters: cowsay cows, custom monsters and cowfiles from directories."""
+import bisect
+import hashlib
+import io
+import json
+import os
+import cowsay
+from . import custom_monsters
+
+BUILTIN = str(cowsay.COW_PEN)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "mood")
+VERSION = 1
+
+
+def directories_from_env(variable: str = "MOOD_COWPATH"):
+    """Return directories listed in environment variable, separated like PATH."""
+    return [path for path in os.environ.get(variable, "").split(os.pathsep) if path]
+
+
+class Catalogue:
+    """
+    Names of monsters and their pictures.
+
+    Monsters are cowsay cows, custom_monsters and .cow files from directories,
+    a file from later directory replaces monster with the same name. Name index
+    is built on first use and kept on disk under hash of directories state,
+    so it is rebuilt only when a cowfile is added, removed or renamed.
+    Cowfiles are read on first draw of monster and kept in memory, so edits
+    of a cowfile are picked up after restart.
+
+    :param directories: directories with .cow files
+    :param cache_dir: directory for index cache, None turns disk cache off
+    """
+
+    def __init__(self, directories=(), cache_dir: str = CACHE_DIR):
+        """Create catalogue, directories are not read until index is needed."""
+        self.directories = [BUILTIN, *directories]
+        self.cache_dir = cache_dir
+        self.paths = None
+        self.sorted = None
+        self.cows = {}
+
+    def extend(self, directories):
+        """Add directories with .cow files, index is rebuilt on next use."""
+        self.directories.extend(directories)
+        self.paths = None
+        self.sorted = None
+        self.cows.clear()
+
+    def fingerprint(self):
+        """Return hash of directories list and their modification times."""
+        state = []
+        for directory in self.directories:
+            try:
+                state.append((directory, os.stat(directory).st_mtime_ns))
+            except OSError:
+                state.append((directory, None))
+
+        return hashlib.sha256(json.dumps([VERSION, state]).encode()).hexdigest()
+
+    def scan(self):
+        """Return dict of monster names and paths of their cowfiles found in directories."""
+        paths = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".cow") and entry.is_file():
+                            paths[entry.name[:-4]] = entry.path
+            except OSError:
+                continue
+
+        return paths
+
+    def _cache_path(self, key: str):
+        """Return path of index cache file for hash key."""
+        return os.path.join(self.cache_dir, f"monsters-{key[:32]}.json")
+
+    def _load(self, key: str):
+        """Return cached index with hash key or None."""
+        try:
+            with open(self._cache_path(key)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        return data["paths"] if data.get("key") == key else None
+
+    def _save(self, key: str, paths):
+        """Write index to cache and remove indexes of older states, errors are ignored."""
+        path = self._cache_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "w") as file:
+                json.dump({"key": key, "paths": paths}, file)
+            os.replace(path + ".tmp", path)
+
+            for name in os.listdir(self.cache_dir):
+                if name.startswith("monsters-") and name.endswith(".json") and name != os.path.basename(path):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def index(self):
+        """Return dict of monster names and paths of their cowfiles, build it on first call."""
+        if self.paths is None:
+            if self.cache_dir is None:
+                self.paths = self.scan()
+            else:
+                key = self.fingerprint()
+                self.paths = self._load(key)
+                if self.paths is None:
+                    self.paths = self.scan()
+                    self._save(key, self.paths)
+
+        return self.paths
+
+    def names(self):
+        """Return sorted list of all monster names."""
+        if self.sorted is None:
+            self.sorted = sorted(self.index().keys() | custom_monsters.keys())
+        return self.sorted
+
+    def __contains__(self, name):
+        """Check that monster with name can be drawn."""
+        return name in self.index() or name in custom_monsters
+
+    def __len__(self):
+        """Return number of monsters."""
+        return len(self.names())
+
+    def complete(self, prefix: str):
+        """Return names of monsters starting with prefix."""
+        names = self.names()
+        start = bisect.bisect_left(names, prefix)
+        stop = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+        return names[start:stop]
+
+    def cowfile(self, name: str):
+        """
+        Return parsed cowfile of monster, file is read on first request.
+
+        :raises KeyError: there is no such monster
+        """
+        try:
+            return self.cows[name]
+        except KeyError:
+            pass
+
+        path = self.index().get(name)
+        if path is not None:
+            with open(path) as file:
+                cow = cowsay.read_dot_cow(file)
+        else:
+            cow = cowsay.read_dot_cow(io.StringIO(custom_monsters[name]))
+
+        self.cows[name] = cow
+        return cow
+
+    def draw(self, name: str, phrase: str):
+        """
+        Return picture of monster saying phrase.
+
+        :raises KeyError: there is no such monster
+        """
+        return cowsay.cowsay(phrase, cowfile=self.cowfile(name))
+
+
+MONSTERS = Catalogue(directories_from_env())
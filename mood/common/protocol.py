@@ -0,0 +1,397 @@
+"""Commands sent from client to server, their parser and binary framing."""
+import asyncio
+import re
+import shlex
+import struct
+import zlib
+from typing import NamedTuple
+
+QUOTES = re.compile(r"""["'\\]""")
+TOKEN = re.compile(r"""\s*(?:"([^"\\]*)"|'([^']*)'|([^\s"'\\]+))(?=\s|$)""")
+SIMPLE = re.compile(r"""(?:\s*(?:"[^"\\]*"|'[^']*'|[^\s"'\\]+)(?=\s|$))*\s*""")
+
+CODECS = ("text", "binary", "zlib")
+HEADER = struct.Struct("!BI")
+LENGTH = struct.Struct("!I")
+COMMAND, MESSAGES = 1, 2
+COMPRESSED = 0x80
+COMPRESS_MIN = 256
+MAX_FRAME = 1 << 20
+MAX_HP = (1 << 31) - 1
+
+
+def split(line: str):
+    """
+    Split command line into words like shlex.split.
+
+    Lines without quotes are split by whitespace, simple quoted words are read
+    with regular expression, only unusual quoting is passed to shlex.
+
+    :param line: command line
+    """
+    if not QUOTES.search(line):
+        return line.split()
+
+    if SIMPLE.fullmatch(line) is None:
+        return shlex.split(line)
+
+    return [double + single + bare for double, single, bare in TOKEN.findall(line)]
+
+
+class Login(NamedTuple):
+    """
+    First command of connection, registers user with name.
+
+    Codec is "text" for newline separated messages, "binary" for frames
+    and "zlib" for frames with compression of long messages.
+    """
+
+    name: str
+    codec: str = "text"
+
+    def encode(self):
+        """Return command line in bytes."""
+        if self.codec == "text":
+            return f"login {self.name}\n".encode()
+        return f"login {self.name} {self.codec}\n".encode()
+
+
+class Move(NamedTuple):
+    """Move hero by (dx, dy) cells."""
+
+    dx: int
+    dy: int
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"move {self.dx} {self.dy}\n".encode()
+
+
+class AddMonster(NamedTuple):
+    """Add monster on cell with (x, y) coordinates."""
+
+    name: str
+    phrase: str
+    hp: int
+    x: int
+    y: int
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"addmon {self.name} phrase '{self.phrase}' hp {self.hp} coords {self.x} {self.y}\n".encode()
+
+
+class Attack(NamedTuple):
+    """Attack monster with name on hero cell."""
+
+    name: str
+    weapon: str
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"attack {self.name} {self.weapon}\n".encode()
+
+
+class Quit(NamedTuple):
+    """Close connection."""
+
+    def encode(self):
+        """Return command line in bytes."""
+        return b"quit\n"
+
+
+class SayAll(NamedTuple):
+    """Send text to all users."""
+
+    text: str
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"sayall {self.text}\n".encode()
+
+
+class MoveMonsters(NamedTuple):
+    """Turn random monsters movements on or off."""
+
+    flag: str
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"movemonsters {self.flag}\n".encode()
+
+
+class Locale(NamedTuple):
+    """Set locale of messages for user."""
+
+    name: str
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"locale {self.name}\n".encode()
+
+
+class Join(NamedTuple):
+    """Move hero to world with name, world is created if there is no such world."""
+
+    name: str
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"join {self.name}\n".encode()
+
+
+class Sync(NamedTuple):
+    """
+    Receive snapshot of field around hero and then its changes.
+
+    Radius is half of side of square area, None stops sync.
+    """
+
+    radius: int = 5
+
+    def encode(self):
+        """Return command line in bytes."""
+        return f"sync {'off' if self.radius is None else self.radius}\n".encode()
+
+
+class Unknown(NamedTuple):
+    """Line that is not a valid command."""
+
+    text: str
+
+
+def _addmon(words):
+    """Build AddMonster from words after command name."""
+    match words:
+        case [name, "phrase", phrase, "hp", hp, "coords", x, y] if 0 < int(hp) <= MAX_HP:
+            return AddMonster(name, phrase, int(hp), int(x), int(y))
+
+
+def _single(command):
+    """Return builder of command with one word argument."""
+    return lambda words: command(*words) if len(words) == 1 else None
+
+
+def _sync(words):
+    """Build Sync from words after command name."""
+    match words:
+        case []:
+            return Sync()
+        case ["off"]:
+            return Sync(None)
+        case [radius] if int(radius) >= 0:
+            return Sync(int(radius))
+
+
+def _login(words):
+    """Build Login from words after command name."""
+    if len(words) in (1, 2) and words[1:] in ([], ["text"], ["binary"], ["zlib"]):
+        return Login(*words)
+
+
+BUILDERS = {
+    "login": _login,
+    "move": lambda words: Move(*map(int, words)) if len(words) == 2 else None,
+    "addmon": _addmon,
+    "attack": lambda words: Attack(*words) if len(words) == 2 else None,
+    "quit": lambda words: Quit() if not words else None,
+    "sayall": _single(SayAll),
+    "movemonsters": _single(MoveMonsters),
+    "locale": _single(Locale),
+    "join": _single(Join),
+    "sync": _sync,
+}
+
+
+def parse(line: str):
+    """
+    Return command object for line, Unknown if line is not a valid command.
+
+    :param line: command line without trailing newline
+    """
+    try:
+        words = split(line)
+        command = BUILDERS[words[0]](words[1:])
+    except (ValueError, KeyError, IndexError):
+        command = None
+
+    return Unknown(line) if command is None else command
+
+
+def pack(kind: int, payload: bytes, compress: bool = False):
+    """
+    Return frame with header and payload.
+
+    :param kind: frame type code
+    :param payload: frame data
+    :param compress: compress payload if it is long enough
+    """
+    if compress and len(payload) >= COMPRESS_MIN:
+        kind |= COMPRESSED
+        payload = zlib.compress(payload, 1)
+
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def unpack(kind: int, payload: bytes):
+    """
+    Return frame type code and payload of received frame, payload is decompressed.
+
+    :raises ValueError: decompressed payload is longer than MAX_FRAME
+    """
+    if kind & COMPRESSED:
+        inflater = zlib.decompressobj()
+        payload = inflater.decompress(payload, MAX_FRAME)
+        if inflater.unconsumed_tail:
+            raise ValueError("Frame is too long")
+        return kind & ~COMPRESSED, payload
+    return kind, payload
+
+
+def _encoded(messages):
+    """Return messages as bytes, messages that are already encoded are not copied."""
+    return [message if isinstance(message, bytes) else message.encode() for message in messages]
+
+
+def encode_text(messages):
+    """Return messages for text client, separated by newlines, messages may be str or UTF-8 bytes."""
+    return b"\n".join(_encoded(messages))
+
+
+def encode_messages(messages, compress: bool = False):
+    """Return one frame with batch of messages, messages may be str or UTF-8 bytes."""
+    encoded = _encoded(messages)
+    return pack(MESSAGES, b"".join(LENGTH.pack(len(data)) + data for data in encoded), compress)
+
+
+def chunk_text(messages):
+    """Return list of byte chunks with messages for text client, ready for writelines."""
+    chunks = []
+    for message in _encoded(messages):
+        chunks += (message, b"\n")
+    return chunks[:-1]
+
+
+def chunk_messages(messages, compress: bool = False):
+    """
+    Return list of byte chunks of one frame with batch of messages, ready for writelines.
+
+    Encoded messages are passed as they are, only headers are built for them.
+    Compressed frame is a single chunk.
+    """
+    encoded = _encoded(messages)
+    size = sum(map(len, encoded)) + LENGTH.size * len(encoded)
+
+    if compress and size >= COMPRESS_MIN:
+        return [encode_messages(encoded, True)]
+
+    chunks = [HEADER.pack(MESSAGES, size)]
+    for message in encoded:
+        chunks += (LENGTH.pack(len(message)), message)
+    return chunks
+
+
+def decode_messages(payload: bytes):
+    """Return messages from payload of MESSAGES frame."""
+    messages = []
+    offset = 0
+
+    while offset < len(payload):
+        size = LENGTH.unpack_from(payload, offset)[0]
+        offset += LENGTH.size
+        messages.append(payload[offset:offset + size].decode())
+        offset += size
+
+    return messages
+
+
+ENCODERS = {
+    "text": encode_text,
+    "binary": encode_messages,
+    "zlib": lambda messages: encode_messages(messages, True),
+}
+
+CHUNKERS = {
+    "text": chunk_text,
+    "binary": chunk_messages,
+    "zlib": lambda messages: chunk_messages(messages, True),
+}
+
+
+async def read_frame(reader, compressed: bool = True):
+    """
+    Read frame from asyncio stream.
+
+    :param compressed: accept compressed frames, clients never compress commands
+    :return: frame type code and decompressed payload
+    :raises asyncio.IncompleteReadError: stream ended
+    :raises ValueError: frame is longer than MAX_FRAME or is compressed when it is not accepted
+    """
+    kind, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_FRAME:
+        raise ValueError("Frame is too long")
+    if kind & COMPRESSED and not compressed:
+        raise ValueError("Frame is compressed")
+    return unpack(kind, await reader.readexactly(size))
+
+
+async def read_command(reader):
+    """
+    Read command line from COMMAND frame of asyncio stream.
+
+    :return: command line in bytes, empty bytes at the end of stream or after invalid frame
+    """
+    try:
+        kind, payload = await read_frame(reader, False)
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        reader.feed_eof()
+        return b""
+
+    return payload if kind == COMMAND else b"\n"
+
+
+class FramedSocket:
+    """
+    Blocking socket that sends commands and receives messages in frames.
+
+    Has sendall and recv like socket, so client code does not depend on codec.
+
+    :param sock: connected socket
+    """
+
+    def __init__(self, sock):
+        """Wrap socket."""
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def sendall(self, data: bytes):
+        """Send command line in COMMAND frame."""
+        self.sock.sendall(pack(COMMAND, data.rstrip(b"\n")))
+
+    def frame(self):
+        """Return type code and payload of next frame."""
+        while len(self.buffer) < HEADER.size or len(self.buffer) < HEADER.size + HEADER.unpack_from(self.buffer)[1]:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Connection closed")
+            self.buffer += data
+
+        kind, size = HEADER.unpack_from(self.buffer)
+        payload = bytes(self.buffer[HEADER.size:HEADER.size + size])
+        del self.buffer[:HEADER.size + size]
+        return unpack(kind, payload)
+
+    def recv_messages(self):
+        """Return list of messages from next MESSAGES frame."""
+        while True:
+            kind, payload = self.frame()
+            if kind == MESSAGES:
+                return decode_messages(payload)
+
+    def recv(self, size: int = 0):
+        """Return next batch of messages separated by newlines, size is ignored."""
+        return encode_text(self.recv_messages())
+
+    def close(self):
+        """Close socket."""
+        self.sock.close()
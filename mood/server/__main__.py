@@ -1,18 +1,177 @@
 """Start server and roaming_monster function."""
+import argparse
+import functools
 from ..server import server as srv
+from ..server import cluster
+from ..server import persist
+from ..server import metrics
+from ..server.startup import Startup, Timing, LOOPS
+from ..common.catalogue import MONSTERS
 
 port = 1337
 
+argparser = argparse.ArgumentParser()
 
-async def main(port):
-    """Start roaming_monster and asyncio server."""
-    srv.task = srv.asyncio.create_task(srv.roaming_monster())
+argparser.add_argument("--port", type=int, default=port, help="listening port")
+argparser.add_argument("--host", default="0.0.0.0", help="bind address")
+argparser.add_argument("--backlog", type=int, default=100, help="length of queue of connections not accepted yet")
+argparser.add_argument("--loop", choices=LOOPS, default="auto",
+                       help="event loop, auto uses uvloop when it is installed")
+argparser.add_argument("--nagle", dest="nodelay", action="store_false",
+                       help="let kernel join small writes with Nagle algorithm, they are sent at once by default")
+argparser.add_argument("--send-buffer", type=int, help="socket send buffer size in bytes")
+argparser.add_argument("--receive-buffer", type=int, help="socket receive buffer size in bytes")
+argparser.add_argument("--workers", type=int, default=1,
+                       help="number of worker processes, field columns are split between them")
+argparser.add_argument("--width", type=int, default=10, help="number of cells in field row")
+argparser.add_argument("--height", type=int, default=10, help="number of cells in field column")
+argparser.add_argument("--room-width", type=int, default=srv.ROOM_WIDTH,
+                       help="number of cells in field row of worlds created by join")
+argparser.add_argument("--room-height", type=int, default=srv.ROOM_HEIGHT,
+                       help="number of cells in field column of worlds created by join")
+argparser.add_argument("--tick-interval", type=float, default=srv.TICK_INTERVAL,
+                       help="seconds between monster movements in every world")
+argparser.add_argument("--tick-fraction", type=float, default=srv.TICK_FRACTION,
+                       help="part of monsters moved every tick, by default one monster moves")
+argparser.add_argument("--combat-interval", type=float, default=0,
+                       help="seconds during which attacks on one cell are collected and resolved together")
+argparser.add_argument("--sync-interval", type=float, default=srv.SYNC_INTERVAL,
+                       help="seconds during which field changes are collected into one diff for synced clients")
+argparser.add_argument("--queue-limit", type=int, default=srv.QUEUE_LIMIT,
+                       help="maximum number of messages queued for one client")
+argparser.add_argument("--queue-policy", choices=["oldest", "newest"], default=srv.QUEUE_POLICY,
+                       help="which message to drop when client queue is full")
+argparser.add_argument("--drain-timeout", type=float, default=srv.DRAIN_TIMEOUT,
+                       help="seconds a client may not read before disconnect")
+argparser.add_argument("--flush-window", type=float, default=srv.FLUSH_WINDOW,
+                       help="seconds sender waits after first queued message to write more messages together")
+argparser.add_argument("--write-buffer", type=int, default=srv.WRITE_BUFFER,
+                       help="bytes buffered for client before sender waits for him to read them")
+argparser.add_argument("--transport", choices=["streams", "protocol"], default="streams",
+                       help="serve connections with asyncio streams or with lighter asyncio.Protocol")
+argparser.add_argument("--login-timeout", type=float, default=srv.LOGIN_TIMEOUT,
+                       help="seconds a new connection may wait before login")
+argparser.add_argument("--max-connections", type=int, default=srv.MAX_CONNECTIONS,
+                       help="maximum number of open connections, new ones are closed at once")
+argparser.add_argument("--admin-port", type=int,
+                       help="local port with metrics in Prometheus format, worker n uses port + n")
+argparser.add_argument("--metrics-sample", type=float, default=1,
+                       help="part of commands and renders that are timed, 0 turns counters and timings off")
+argparser.add_argument("--cows", action="append", default=[],
+                       help="directory with .cow files of additional monsters, may be repeated")
+argparser.add_argument("--world", help="directory where lobby world is saved, it is not saved by default")
+argparser.add_argument("--flush-interval", type=float, default=1,
+                       help="seconds between writes of world changes to disk")
+argparser.add_argument("--snapshot-interval", type=float, default=300,
+                       help="seconds between full snapshots of world")
+
+
+async def main(startup, index=None, count=1, path=None, admin_port=None, timing=None):
+    """
+    Start roaming_monster and asyncio server.
+
+    :param startup: listening address and socket options
+    :param index: number of worker in multi-process mode
+    :param count: number of workers
+    :param path: unix socket of workers hub
+    :param admin_port: port of metrics endpoint, None if metrics are not served
+    :param timing: timing of start that is reported when server listens
+    """
+    if timing is not None:
+        timing.mark("loop")
+
+    srv.lobby.task = srv.asyncio.create_task(srv.roaming_monster(srv.lobby))
     await srv.asyncio.sleep(0)
-    server = await srv.asyncio.start_server(srv.mud, '0.0.0.0', port)
+
+    if srv.journal is not None:
+        srv.journal.start(srv.lobby.desk)
+
+    if admin_port is not None:
+        await metrics.serve(srv.metrics, admin_port)
+
+    if path is not None:
+        srv.shard = await cluster.Shard.connect(path, index, count, srv.lobby.desk.width)
+
+    server = await startup.listen(srv.mud)
+
+    if timing is not None:
+        timing.mark("listen")
+        host, port = server.sockets[0].getsockname()[:2]
+        worker = "" if index is None else f"worker {index} "
+        print(f"{worker}listening on {host}:{port} with {startup.loop_name()} loop and {startup.transport}, "
+              f"{timing.report()}")
+
     async with server:
-        await server.serve_forever()
+        if srv.shard is None:
+            await server.serve_forever()
+        else:
+            await srv.asyncio.wait([srv.asyncio.create_task(server.serve_forever()),
+                                    srv.asyncio.create_task(srv.shard.listen(srv.handle_shard_message))],
+                                   return_when=srv.asyncio.FIRST_COMPLETED)
+
+
+def configure(args, journaled=True):
+    """
+    Set server module options from parsed command line.
+
+    :param args: parsed command line
+    :param journaled: write changes of world to disk if it is loaded from disk
+    """
+    MONSTERS.extend(args.cows)
+    desk = srv.Field(args.width, args.height)
+
+    if args.world is not None:
+        journal = persist.Journal(args.world, args.flush_interval, args.snapshot_interval)
+        journal.recover(desk, srv.change_field, journaled)
+        srv.journal = journal if journaled else None
+
+    srv.TICK_INTERVAL = args.tick_interval
+    srv.TICK_FRACTION = args.tick_fraction
+    srv.COMBAT_INTERVAL = args.combat_interval
+    srv.SYNC_INTERVAL = args.sync_interval
+    srv.ROOM_WIDTH = args.room_width
+    srv.ROOM_HEIGHT = args.room_height
+    srv.lobby = srv.World(srv.LOBBY, desk)
+    srv.worlds = {srv.LOBBY: srv.lobby}
+    srv.QUEUE_LIMIT = args.queue_limit
+    srv.QUEUE_POLICY = args.queue_policy
+    srv.DRAIN_TIMEOUT = args.drain_timeout
+    srv.FLUSH_WINDOW = args.flush_window
+    srv.WRITE_BUFFER = args.write_buffer
+    srv.LOGIN_TIMEOUT = args.login_timeout
+    srv.MAX_CONNECTIONS = args.max_connections
+
+    if args.admin_port is not None:
+        srv.metrics.rate = args.metrics_sample
+
+
+def worker(args, index, count, path):
+    """Run one worker process of multi-process server, only first worker writes world to disk."""
+    timing = Timing()
+    configure(args, index == 0)
+    timing.mark("configure")
+    admin_port = None if args.admin_port is None else args.admin_port + index
+    startup = options(args, reuse_port=True)
+    startup.run(lambda: main(startup, index, count, path, admin_port, timing))
+
+
+def options(args, reuse_port=False):
+    """Return startup options from parsed command line."""
+    return Startup(args.host, args.port, args.backlog, args.loop, args.transport, args.nodelay,
+                   args.send_buffer, args.receive_buffer, reuse_port)
 
 
 def server():
     """Start server."""
-    srv.asyncio.run(main(port))
+    timing = Timing()
+    args = argparser.parse_args()
+
+    if args.workers > 1:
+        if args.world is not None:
+            persist.Journal(args.world).recover(srv.Field(args.width, args.height), srv.change_field)
+        cluster.run(args.workers, functools.partial(worker, args))
+    else:
+        configure(args)
+        timing.mark("configure")
+        startup = options(args)
+        startup.run(lambda: main(startup, admin_port=args.admin_port, timing=timing))
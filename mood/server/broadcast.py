@@ -0,0 +1,180 @@
+"""Fan-out of messages to connected clients."""
+
+
+class Broadcaster:
+    """
+    Registry of clients outbound queues, that delivers messages to them.
+
+    Heroes are grouped by square regions of field, so message about
+    some cell wakes only heroes in the same or adjacent regions.
+    Heroes are also indexed by cells they stand on, so heroes
+    meeting a monster are found without scanning all clients.
+
+    :param region_size: side of square region of field
+    :param width: field width, used to wrap regions around field edges
+    :param height: field height, used to wrap regions around field edges
+    """
+
+    def __init__(self, region_size: int = 16, width: int = 10, height: int = 10):
+        """Create empty registry."""
+        self.region_size = region_size
+        self.columns = -(-width // region_size)
+        self.rows = -(-height // region_size)
+        self.queues = {}
+        self.regions = {}
+        self.where = {}
+        self.cells = {}
+        self.spots = {}
+        self.names = {}
+
+    def __getitem__(self, hero):
+        """Return outbound queue of hero."""
+        return self.queues[hero]
+
+    def __contains__(self, hero):
+        """Check that hero is subscribed."""
+        return hero in self.queues
+
+    def __len__(self):
+        """Return number of subscribed heroes."""
+        return len(self.queues)
+
+    def __iter__(self):
+        """Iterate over subscribed heroes."""
+        return iter(self.queues)
+
+    def keys(self):
+        """Return subscribed heroes."""
+        return self.queues.keys()
+
+    def values(self):
+        """Return outbound queues."""
+        return self.queues.values()
+
+    def items(self):
+        """Return pairs of hero and his outbound queue."""
+        return self.queues.items()
+
+    def find(self, name: str):
+        """Return subscribed hero with name or None."""
+        return self.names.get(name) if name else None
+
+    def region(self, x: int, y: int):
+        """Return region that contains cell with (x, y) coordinates."""
+        return (x // self.region_size, y // self.region_size)
+
+    def subscribe(self, hero, queue):
+        """
+        Start delivering messages to hero.
+
+        :param hero: hero instance
+        :param queue: hero outbound queue
+        """
+        cell = hero.get_position()
+        region = self.region(*cell)
+        self.queues[hero] = queue
+        self.where[hero] = region
+        self.regions.setdefault(region, {})[hero] = queue
+        self.spots[hero] = cell
+        self.cells.setdefault(cell, {})[hero] = queue
+
+        if hero.name:
+            self.names[hero.name] = hero
+
+    def unsubscribe(self, hero):
+        """Stop delivering messages to hero."""
+        del self.queues[hero]
+
+        if self.names.get(hero.name) is hero:
+            del self.names[hero.name]
+        region = self.where.pop(hero)
+        members = self.regions[region]
+        del members[hero]
+
+        if not members:
+            del self.regions[region]
+
+        cell = self.spots.pop(hero)
+        members = self.cells[cell]
+        del members[hero]
+
+        if not members:
+            del self.cells[cell]
+
+    def relocate(self, hero):
+        """Update region and cell of hero after he has moved."""
+        cell = hero.get_position()
+        old = self.spots[hero]
+
+        if cell != old:
+            queue = self.cells[old].pop(hero)
+            if not self.cells[old]:
+                del self.cells[old]
+            self.spots[hero] = cell
+            self.cells.setdefault(cell, {})[hero] = queue
+
+        region = self.region(*cell)
+        old = self.where[hero]
+
+        if region != old:
+            queue = self.regions[old].pop(hero)
+            if not self.regions[old]:
+                del self.regions[old]
+            self.where[hero] = region
+            self.regions.setdefault(region, {})[hero] = queue
+
+    def at(self, x: int, y: int):
+        """Return dict of heroes standing on cell with (x, y) coordinates and their queues."""
+        return self.cells.get((x, y), {})
+
+    def audience(self, x: int, y: int):
+        """Return heroes and queues in regions around cell with (x, y) coordinates."""
+        cx, cy = self.region(x, y)
+        seen = set()
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                region = ((cx + dx) % self.columns, (cy + dy) % self.rows)
+                if region not in seen:
+                    seen.add(region)
+                    yield from self.regions.get(region, {}).items()
+
+    def publish(self, message, cell=None, exclude=None, key=None):
+        """
+        Put message to queues of all subscribers without waiting.
+
+        Message may be a string or a function that takes locale and returns
+        a string. Such function is called once per distinct locale. Message is
+        encoded to UTF-8 once and all queues share the same bytes.
+
+        :param message: string, bytes or function building string for locale
+        :param cell: if set, deliver only to heroes near this cell
+        :param exclude: hero or set of heroes that must not receive message
+        :param key: coalescing key, queued message with same key is replaced
+        :return: number of heroes that received message
+        """
+        recipients = self.queues.items() if cell is None else self.audience(*cell)
+        excluded = exclude if isinstance(exclude, (set, frozenset)) else ()
+        texts = {}
+        count = 0
+
+        if isinstance(message, str):
+            message = message.encode()
+
+        for hero, queue in recipients:
+            if hero is exclude or hero in excluded:
+                continue
+
+            if callable(message):
+                locale = hero.get_locale()
+                try:
+                    text = texts[locale]
+                except KeyError:
+                    text = texts[locale] = message(locale).encode()
+            else:
+                text = message
+
+            queue.put_nowait(text, key)
+            count += 1
+
+        return count
@@ -0,0 +1,96 @@
+"""Cache of rendered monster encounter pictures."""
+from collections import OrderedDict
+from ..common.catalogue import MONSTERS
+
+
+class EncounterCache:
+    """
+    LRU cache of cowsay pictures keyed by (monster name, phrase).
+
+    Picture is also kept encoded to UTF-8 once it was sent, so heroes meeting
+    the same monster share one immutable payload instead of encoding it each.
+
+    :param size: maximum number of pictures kept in cache, 0 disables caching
+    :param catalogue: monsters that can be drawn, shared MONSTERS catalogue by default
+    """
+
+    def __init__(self, size: int = 256, catalogue=None):
+        """Create empty cache."""
+        self.size = size
+        self.catalogue = MONSTERS if catalogue is None else catalogue
+        self.pictures = OrderedDict()
+        self.payloads = {}
+        self.hits = 0
+        self.misses = 0
+
+    def known(self, name: str):
+        """Check that monster with such name can be drawn."""
+        return name in self.catalogue
+
+    def draw(self, name: str, phrase: str):
+        """
+        Render monster saying phrase without cache.
+
+        :param name: monster name
+        :param phrase: monster catch phrase
+        """
+        if name in self.catalogue:
+            return self.catalogue.draw(name, phrase)
+
+    def render(self, name: str, phrase: str):
+        """
+        Return monster saying phrase, render it only on cache miss.
+
+        :param name: monster name
+        :param phrase: monster catch phrase
+        """
+        key = (name, phrase)
+
+        try:
+            picture = self.pictures[key]
+        except KeyError:
+            self.misses += 1
+            picture = self.draw(name, phrase)
+
+            if self.size > 0:
+                self.pictures[key] = picture
+                if len(self.pictures) > self.size:
+                    self.payloads.pop(self.pictures.popitem(last=False)[0], None)
+
+            return picture
+
+        self.hits += 1
+        self.pictures.move_to_end(key)
+        return picture
+
+    def payload(self, name: str, phrase: str):
+        """
+        Return monster saying phrase encoded to UTF-8, encode it only once while picture is cached.
+
+        :param name: monster name
+        :param phrase: monster catch phrase
+        """
+        picture = self.render(name, phrase)
+        key = (name, phrase)
+        data = self.payloads.get(key)
+
+        if data is None and picture is not None:
+            data = picture.encode()
+            if key in self.pictures:
+                self.payloads[key] = data
+
+        return data
+
+    def stats(self):
+        """Return cache counters."""
+        return {"size": len(self.pictures),
+                "capacity": self.size,
+                "hits": self.hits,
+                "misses": self.misses}
+
+    def clear(self):
+        """Drop all cached pictures and reset counters."""
+        self.pictures.clear()
+        self.payloads.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,201 @@
+"""Multi-process server mode, columns of field are split between worker processes."""
+import asyncio
+import multiprocessing
+import os
+import pickle
+import signal
+import struct
+import tempfile
+import zlib
+
+HEADER = struct.Struct("!Ii")
+EVERYONE = -1
+
+
+class Shard:
+    """
+    Connection of worker process to hub that relays messages between workers.
+
+    Worker owns columns x of field with x * count // width == index,
+    only owner changes monsters in its columns. User names are split between
+    workers by checksum, worker keeps claims of its names for the whole cluster.
+
+    :param index: number of this worker
+    :param count: number of workers
+    :param width: field width
+    :param reader: stream from hub
+    :param writer: stream to hub
+    """
+
+    def __init__(self, index: int, count: int, width: int, reader, writer):
+        """Create shard over opened hub connection."""
+        self.index = index
+        self.count = count
+        self.width = width
+        self.reader = reader
+        self.writer = writer
+        self.calls = {}
+        self.counter = 0
+
+    @classmethod
+    async def connect(cls, path: str, index: int, count: int, width: int):
+        """Connect to hub listening on unix socket path."""
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(HEADER.pack(0, index))
+        await writer.drain()
+        return cls(index, count, width, reader, writer)
+
+    def owner(self, x: int):
+        """Return index of worker that owns column x."""
+        return x * self.count // self.width
+
+    def owns(self, x: int):
+        """Check that this worker owns column x."""
+        return self.owner(x) == self.index
+
+    def registrar(self, name: str):
+        """Return index of worker that keeps claim of user name."""
+        return zlib.crc32(name.encode()) % self.count
+
+    def columns(self):
+        """Return first and after last column owned by this worker."""
+        return (-(-self.index * self.width // self.count), -(-(self.index + 1) * self.width // self.count))
+
+    def send(self, dest: int, message):
+        """
+        Send message to other worker without waiting.
+
+        :param dest: index of worker or EVERYONE for all other workers
+        :param message: picklable message
+        """
+        data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        self.writer.write(HEADER.pack(len(data), dest) + data)
+
+    def send_all(self, message):
+        """Send message to all other workers."""
+        self.send(EVERYONE, message)
+
+    async def call(self, dest: int, operation: str, *args):
+        """Run operation on other worker and return its result."""
+        self.counter += 1
+        future = asyncio.get_running_loop().create_future()
+        self.calls[self.counter] = future
+        self.send(dest, ("call", self.index, self.counter, operation, args))
+        return await future
+
+    def cast(self, dest: int, operation: str, *args):
+        """Run operation on other worker, ignore result."""
+        self.send(dest, ("call", self.index, None, operation, args))
+
+    def reply(self, origin: int, number: int, result):
+        """Send result of operation to worker that called it."""
+        self.send(origin, ("reply", number, result))
+
+    async def listen(self, handler):
+        """
+        Receive messages from other workers until hub closes connection.
+
+        :param handler: function that processes every message except replies
+        """
+        while True:
+            try:
+                length, dest = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+                message = pickle.loads(await self.reader.readexactly(length))
+            except asyncio.IncompleteReadError:
+                return
+
+            match message:
+                case ("reply", number, result):
+                    self.calls.pop(number).set_result(result)
+                case _:
+                    handler(message)
+
+            await self.writer.drain()
+
+
+class Hub:
+    """
+    Relay of frames between workers connected to unix socket.
+
+    :param count: number of workers
+    """
+
+    def __init__(self, count: int):
+        """Create hub waiting for count workers."""
+        self.count = count
+        self.writers = {}
+        self.ready = asyncio.Event()
+        self.relays = set()
+        self.server = None
+
+    async def start(self, path: str):
+        """Start listening on unix socket path."""
+        self.server = await asyncio.start_unix_server(self.relay, path)
+
+    async def close(self):
+        """Stop listening and wait until all workers disconnect."""
+        self.server.close()
+        await asyncio.gather(*self.relays)
+
+    async def relay(self, reader, writer):
+        """Forward frames of one worker to their destinations."""
+        self.relays.add(asyncio.current_task())
+        index = HEADER.unpack(await reader.readexactly(HEADER.size))[1]
+        self.writers[index] = writer
+
+        if len(self.writers) == self.count:
+            self.ready.set()
+        await self.ready.wait()
+
+        while True:
+            try:
+                header = await reader.readexactly(HEADER.size)
+                frame = header + await reader.readexactly(HEADER.unpack(header)[0])
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+
+            dest = HEADER.unpack(header)[1]
+            targets = self.writers.items() if dest == EVERYONE else [(dest, self.writers[dest])]
+
+            for other, out in targets:
+                if other != index and not out.is_closing():
+                    out.write(frame)
+                    await out.drain()
+
+        writer.close()
+
+
+async def supervise(count: int, serve):
+    """Start hub and workers, stop all workers when one of them exits."""
+    path = os.path.join(tempfile.mkdtemp(prefix="mood-"), "hub.sock")
+    hub = Hub(count)
+    await hub.start(path)
+    workers = [multiprocessing.Process(target=serve, args=(index, count, path), daemon=True)
+               for index in range(count)]
+
+    for worker in workers:
+        worker.start()
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    joins = [asyncio.create_task(asyncio.to_thread(worker.join)) for worker in workers]
+
+    try:
+        await asyncio.wait(joins + [asyncio.create_task(stop.wait())], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        await asyncio.gather(*joins)
+        await hub.close()
+        os.unlink(path)
+        os.rmdir(os.path.dirname(path))
+
+
+def run(count: int, serve):
+    """
+    Run server in count worker processes.
+
+    :param count: number of workers
+    :param serve: function taking worker index, count and hub path, that runs worker
+    """
+    asyncio.run(supervise(count, serve))
@@ -0,0 +1,72 @@
+"""Attacks on field cells resolved in batches once per tick."""
+import asyncio
+
+_background = set()
+
+
+class Combat:
+    """
+    Queue of attacks resolved together once per tick.
+
+    Attacks submitted during one tick are grouped by cell and every cell is
+    resolved by one call of resolve. Damage of simultaneous attacks is applied
+    in order of submission in one step, so a monster is killed only once and
+    a crowd attacking one monster costs one field change and one notice.
+
+    :param resolve: coroutine function taking cell and list of attacks and returning list of their results
+    :param interval: seconds of tick, 0 resolves attacks on next iteration of event loop
+    """
+
+    def __init__(self, resolve, interval: float = 0):
+        """Create empty queue."""
+        self.resolve = resolve
+        self.interval = interval
+        self.pending = {}
+        self.handle = None
+
+    def __len__(self):
+        """Return number of attacks waiting for resolution."""
+        return sum(map(len, self.pending.values()))
+
+    def submit(self, cell, attack):
+        """
+        Add attack to current tick.
+
+        :param cell: pair of coordinates of attacked cell
+        :param attack: attack description passed to resolve
+        :return: future with result of attack
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.setdefault(cell, []).append((attack, future))
+
+        if self.handle is None:
+            if self.interval > 0:
+                self.handle = loop.call_later(self.interval, self.tick)
+            else:
+                self.handle = loop.call_soon(self.tick)
+
+        return future
+
+    def tick(self):
+        """Start resolution of attacks collected during tick."""
+        pending, self.pending, self.handle = self.pending, {}, None
+
+        for cell, attacks in pending.items():
+            task = asyncio.create_task(self.settle(cell, attacks))
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+
+    async def settle(self, cell, attacks):
+        """Resolve attacks on cell and pass results to their futures."""
+        try:
+            results = await self.resolve(cell, [attack for attack, _ in attacks])
+        except Exception as error:
+            results = None
+            for _, future in attacks:
+                if not future.done():
+                    future.set_exception(error)
+
+        for (_, future), result in zip(attacks, results or ()):
+            if not future.done():
+                future.set_result(result)
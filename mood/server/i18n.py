@@ -0,0 +1,107 @@
+"""Message catalogs loaded on demand with memoized translations."""
+import gettext
+import os
+
+
+def _english(n):
+    """Return plural form of n for messages without translation."""
+    return int(n != 1)
+
+
+class Catalogs:
+    """
+    Translations of server messages for every locale found in directory.
+
+    Locale is available when directory has <locale>/LC_MESSAGES/<domain>.mo,
+    catalog is read on first use of locale. Templates are memoized for each
+    locale, message and plural form, so a message is looked up in catalog
+    once and every next call is a single dict access. Locales are identified
+    by names, which lets broadcasts render message once for each locale.
+
+    :param directory: directory with compiled catalogs
+    :param domain: name of catalog files
+    :param default: locale of untranslated messages, always available
+    """
+
+    def __init__(self, directory: str, domain: str = "mood", default: str = "en_US.UTF-8"):
+        """Create catalogs, directory is not read until a locale is requested."""
+        self.directory = directory
+        self.domain = domain
+        self.default = default
+        self.found = None
+        self.translations = {}
+        self.plurals = {}
+        self.templates = {}
+
+    def scan(self):
+        """Return names of locales that have compiled catalog in directory."""
+        path = os.path.join("LC_MESSAGES", self.domain + ".mo")
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            entries = []
+
+        self.found = {self.default} | {name for name in entries
+                                       if os.path.isfile(os.path.join(self.directory, name, path))}
+        return self.found
+
+    def __contains__(self, name):
+        """Check that locale is available, directory is scanned again for unknown names."""
+        if self.found is not None and name in self.found:
+            return True
+        return name in self.scan()
+
+    def __iter__(self):
+        """Iterate over names of available locales."""
+        return iter(sorted(self.scan() if self.found is None else self.found))
+
+    def translation(self, name: str):
+        """
+        Return translation object of locale, loading catalog on first request.
+
+        :raises KeyError: locale is not available
+        """
+        try:
+            return self.translations[name]
+        except KeyError:
+            pass
+
+        if name not in self:
+            raise KeyError(name)
+
+        if name == self.default:
+            translation = gettext.NullTranslations()
+        else:
+            translation = gettext.translation(self.domain, self.directory, languages=[name])
+
+        self.plurals[name] = getattr(translation, "plural", _english)
+        self.translations[name] = translation
+        return translation
+
+    def gettext(self, name: str, message: str):
+        """Return translation of message for locale."""
+        key = (name, message)
+        template = self.templates.get(key)
+
+        if template is None:
+            template = self.templates[key] = self.translation(name).gettext(message)
+        return template
+
+    def ngettext(self, name: str, singular: str, plural: str, n: int):
+        """
+        Return translation of message for locale in plural form of n.
+
+        Form is taken both by locale rule and by English rule, which is used
+        for messages missing in catalog.
+        """
+        rule = self.plurals.get(name)
+        if rule is None:
+            self.translation(name)
+            rule = self.plurals[name]
+
+        key = (name, singular, rule(n), n == 1)
+        template = self.templates.get(key)
+
+        if template is None:
+            template = self.templates[key] = self.translation(name).ngettext(singular, plural, n)
+        return template
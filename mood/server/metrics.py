@@ -0,0 +1,179 @@
+"""Counters, histograms and admin endpoint with Prometheus text dump."""
+import asyncio
+import random
+import time
+from bisect import bisect_left
+
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+SIZE_BUCKETS = (0, 1, 2, 5, 10, 50, 100, 500, 1000, 5000)
+
+_background = set()
+
+
+def _escape(value):
+    """Return label value with backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    """Return labels in Prometheus format."""
+    pairs = tuple(labels) + tuple(extra)
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets.
+
+    :param buckets: sorted upper bounds of buckets
+    """
+
+    def __init__(self, buckets):
+        """Create empty histogram."""
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """Add value to histogram."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels):
+        """Iterate over lines of histogram in Prometheus format."""
+        total = 0
+
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield f"{name}_bucket{_labels(labels, [('le', bound)])} {total}"
+
+        yield f"{name}_sum{_labels(labels)} {self.sum}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+class Metrics:
+    """
+    Registry of server metrics.
+
+    Counters and histograms are collected only when rate is above zero, timings
+    are taken for part rate of events. Gauges are computed when dump is requested.
+
+    :param rate: part of events that are timed, 0 turns collection off
+    """
+
+    def __init__(self, rate: float = 0):
+        """Create empty registry."""
+        self.rate = rate
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    @property
+    def enabled(self):
+        """Check that metrics are collected."""
+        return self.rate > 0
+
+    def sampled(self):
+        """Check that current event must be timed."""
+        return self.rate >= 1 or (self.rate > 0 and random.random() < self.rate)
+
+    def count(self, name: str, labels=(), value: int = 1):
+        """
+        Increase counter.
+
+        :param name: metric name
+        :param labels: pairs of label name and value
+        :param value: increment
+        """
+        key = (name, tuple(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value, labels=(), buckets=TIME_BUCKETS):
+        """
+        Add value to histogram.
+
+        :param name: metric name
+        :param value: observed value
+        :param labels: pairs of label name and value
+        :param buckets: buckets of histogram created on first observation
+        """
+        key = (name, tuple(labels))
+        histogram = self.histograms.get(key)
+
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def gauge(self, name: str, function):
+        """
+        Register gauge computed on dump.
+
+        :param name: metric name
+        :param function: returns value or dict of label pairs tuples and values
+        """
+        self.gauges[name] = function
+
+    def render(self):
+        """Return all metrics in Prometheus text format."""
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            header(name, "histogram")
+            lines.extend(histogram.lines(name, labels))
+
+        for name, function in self.gauges.items():
+            header(name, "gauge")
+            values = function()
+            for labels, value in values.items() if isinstance(values, dict) else [((), values)]:
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+async def watch_loop(metrics: Metrics, interval: float = 0.5):
+    """Measure how late event loop wakes up after sleep, observe lag in mood_loop_lag_seconds."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.observe("mood_loop_lag_seconds", max(0, time.perf_counter() - start - interval))
+
+
+async def serve(metrics: Metrics, port: int, host: str = "127.0.0.1"):
+    """
+    Start admin server that answers any HTTP request with metrics dump.
+
+    Event loop lag is watched in background while server works if metrics are enabled.
+
+    :return: asyncio server
+    """
+    async def handle(reader, writer):
+        try:
+            while (await reader.readline()).strip():
+                pass
+            body = metrics.render().encode()
+            head = f"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\nContent-Length: {len(body)}\r\n\r\n"
+            writer.write(head.encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if metrics.enabled:
+        watcher = asyncio.create_task(watch_loop(metrics))
+        _background.add(watcher)
+        watcher.add_done_callback(_background.discard)
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,107 @@
+"""Bounded outbound message queue of one client."""
+import asyncio
+from collections import deque
+
+
+class Outbox:
+    """
+    Bounded queue of messages waiting to be sent to client.
+
+    Message put with a key replaces not yet sent message with the same key,
+    so chatty events like monster movements are coalesced. When queue is full
+    the oldest or the new message is dropped according to policy.
+
+    :param limit: maximum number of queued messages
+    :param policy: "oldest" or "newest", which message to drop when queue is full
+    """
+
+    def __init__(self, limit: int = 256, policy: str = "oldest"):
+        """Create empty queue."""
+        if policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop policy: {policy}")
+
+        self.limit = limit
+        self.policy = policy
+        self.messages = deque()
+        self.keys = {}
+        self.waiter = None
+        self.peak = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    def __len__(self):
+        """Return number of queued messages."""
+        return len(self.messages)
+
+    def empty(self):
+        """Check that there are no queued messages."""
+        return not self.messages
+
+    def put_nowait(self, message, key=None):
+        """
+        Queue message without waiting.
+
+        :param message: message to send
+        :param key: messages with the same key replace each other while queued
+        :return: False if message was dropped
+        """
+        if key is not None and (entry := self.keys.get(key)) is not None:
+            entry[0] = message
+            self.coalesced += 1
+            return True
+
+        if len(self.messages) >= self.limit:
+            self.dropped += 1
+            if self.policy == "newest":
+                return False
+            self.forget(self.messages.popleft())
+
+        entry = [message, key]
+        self.messages.append(entry)
+        if key is not None:
+            self.keys[key] = entry
+        self.peak = max(self.peak, len(self.messages))
+
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+        return True
+
+    async def put(self, message, key=None):
+        """Queue message, never blocks, kept for asyncio.Queue compatibility."""
+        return self.put_nowait(message, key)
+
+    def forget(self, entry):
+        """Remove coalescing key of entry that left queue."""
+        if entry[1] is not None and self.keys.get(entry[1]) is entry:
+            del self.keys[entry[1]]
+
+    def get_nowait(self):
+        """Remove and return the oldest message."""
+        if not self.messages:
+            raise asyncio.QueueEmpty
+
+        entry = self.messages.popleft()
+        self.forget(entry)
+        self.sent += 1
+        return entry[0]
+
+    async def get(self):
+        """Wait for message, remove and return it."""
+        while not self.messages:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+
+        return self.get_nowait()
+
+    def stats(self):
+        """Return queue counters."""
+        return {"depth": len(self.messages),
+                "peak": self.peak,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced}
@@ -0,0 +1,286 @@
+"""World snapshots and write-ahead log of field changes."""
+import asyncio
+import itertools
+import mmap
+import os
+import struct
+import time
+from array import array
+from .store import MonsterStore
+
+MAGIC = b"MOOD"
+SNAPSHOT = struct.Struct("=4sIiiIIIII")
+RECORD = struct.Struct("=BI")
+CELL = struct.Struct("=ii")
+CELL_HP = struct.Struct("=iii")
+MONSTER = struct.Struct("=iiiI")
+
+SET, HP, DELETE, MOVES = range(1, 5)
+
+
+def _pack_strings(values):
+    """Return array of utf-8 lengths of strings and their concatenation."""
+    encoded = [value.encode() for value in values]
+    return array('i', map(len, encoded)).tobytes(), b"".join(encoded)
+
+
+def _unpack_strings(view, offset, count, size):
+    """Read strings packed by _pack_strings, return them and offset after them."""
+    lengths = array('i')
+    lengths.frombytes(view[offset:offset + 4 * count])
+    offset += 4 * count
+    blob = bytes(view[offset:offset + size])
+    bounds = itertools.pairwise(itertools.accumulate(lengths, initial=0))
+    return [blob[a:b].decode() for a, b in bounds], offset + size
+
+
+def dump(field, generation: int):
+    """
+    Return snapshot of monsters on field as list of byte strings.
+
+    Numbers are kept in native byte order, snapshot is not meant to be moved between machines.
+
+    :param field: playing field
+    :param generation: number of first log that is not included in snapshot
+    """
+    store = field.monsters
+    columns = (store.x, store.y, store.hp, store.name_id, store.phrase_id)
+
+    if store.free:
+        slots = list(map(field.char_pos.__getitem__, field.cells))
+        columns = [array('i', map(column.__getitem__, slots)) for column in columns]
+
+    names = _pack_strings(store.names.values)
+    phrases = _pack_strings(store.phrases.values)
+    header = SNAPSHOT.pack(MAGIC, generation, field.width, field.height, len(field),
+                           len(store.names.values), len(names[1]), len(store.phrases.values), len(phrases[1]))
+
+    return [header] + [column.tobytes() for column in columns] + [*names, *phrases]
+
+
+def save_snapshot(path: str, chunks):
+    """Atomically replace snapshot file with chunks returned by dump."""
+    temporary = path + ".tmp"
+
+    with open(temporary, "wb") as file:
+        file.writelines(chunks)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary, path)
+    directory = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def load_snapshot(path: str):
+    """
+    Read snapshot file through memory map.
+
+    :return: generation, field width, field height and MonsterStore or None if there is no snapshot
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        with memoryview(data) as view:
+            magic, generation, width, height, count, name_count, name_size, phrase_count, phrase_size = \
+                SNAPSHOT.unpack_from(view)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a world snapshot")
+
+            offset = SNAPSHOT.size
+            columns = []
+            for _ in range(5):
+                column = array('i')
+                column.frombytes(view[offset:offset + 4 * count])
+                columns.append(column)
+                offset += 4 * count
+
+            names, offset = _unpack_strings(view, offset, name_count, name_size)
+            phrases, offset = _unpack_strings(view, offset, phrase_count, phrase_size)
+
+    return generation, width, height, MonsterStore.restore(*columns, names, phrases)
+
+
+def encode(event):
+    """Return log record of field change event."""
+    match event:
+        case ("set", x, y, name, phrase, hp):
+            name = name.encode()
+            kind, payload = SET, MONSTER.pack(x, y, hp, len(name)) + name + phrase.encode()
+        case ("hp", x, y, hp):
+            kind, payload = HP, CELL_HP.pack(x, y, hp)
+        case ("delete", x, y):
+            kind, payload = DELETE, CELL.pack(x, y)
+        case ("moves", moves):
+            steps = itertools.chain.from_iterable(old + new for old, new, *_ in moves)
+            kind, payload = MOVES, array('i', steps).tobytes()
+        case _:
+            raise ValueError(f"Unknown field event {event[0]}")
+
+    return RECORD.pack(kind, len(payload)) + payload
+
+
+def decode(data):
+    """Iterate over field change events in log, incomplete record at the end is ignored."""
+    offset = 0
+
+    while offset + RECORD.size <= len(data):
+        kind, size = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + size > len(data):
+            return
+        payload = data[offset:offset + size]
+        offset += size
+
+        if kind == SET:
+            x, y, hp, length = MONSTER.unpack_from(payload)
+            text = payload[MONSTER.size:]
+            yield ("set", x, y, text[:length].decode(), text[length:].decode(), hp)
+        elif kind == HP:
+            yield ("hp", *CELL_HP.unpack(payload))
+        elif kind == DELETE:
+            yield ("delete", *CELL.unpack(payload))
+        elif kind == MOVES:
+            numbers = array('i')
+            numbers.frombytes(payload)
+            steps = iter(numbers)
+            yield ("moves", [((a, b), (c, d), None) for a, b, c, d in zip(steps, steps, steps, steps)])
+
+
+class Journal:
+    """
+    Persistent world kept in directory as snapshot and write-ahead logs.
+
+    Snapshot of generation g contains all changes written to logs before log g.
+    Changes are collected in memory and written to the current log in batches
+    from a thread, so event loop never waits for disk.
+
+    :param directory: directory with world files, created if missing
+    :param flush_interval: seconds between writes of collected changes to log
+    :param snapshot_interval: seconds between snapshots
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 1, snapshot_interval: float = 300):
+        """Create journal, call recover and start before use."""
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.generation = 0
+        self.pending = []
+        self.log = None
+        self.task = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def snapshot_path(self):
+        """Return path of snapshot file."""
+        return os.path.join(self.directory, "world.snap")
+
+    def log_path(self, generation: int):
+        """Return path of log with number generation."""
+        return os.path.join(self.directory, f"{generation:08d}.wal")
+
+    def logs(self):
+        """Return sorted numbers of logs in directory."""
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".wal"))
+
+    def recover(self, field, apply, compact: bool = True):
+        """
+        Load snapshot to field and replay logs written after it.
+
+        Field size is taken from snapshot.
+
+        :param field: empty playing field
+        :param apply: function taking field and event that applies event to field
+        :param compact: save new snapshot and remove replayed logs
+        """
+        snapshot = load_snapshot(self.snapshot_path)
+        if snapshot is not None:
+            self.generation, field.width, field.height, store = snapshot
+            field.restore(store)
+
+        replayed = [generation for generation in self.logs() if generation >= self.generation]
+        for generation in replayed:
+            with open(self.log_path(generation), "rb") as file:
+                for event in decode(file.read()):
+                    apply(field, event)
+
+        if replayed:
+            self.generation = replayed[-1] + 1
+            if compact:
+                self._rotate(None, b"", dump(field, self.generation), self.generation)
+
+    def append(self, event):
+        """Add field change to next batch written to log."""
+        self.pending.append(encode(event))
+
+    def take(self):
+        """Return and forget collected changes."""
+        data = b"".join(self.pending)
+        self.pending.clear()
+        return data
+
+    @staticmethod
+    def _write(file, data: bytes):
+        """Append data to file and wait until it is on disk."""
+        if data:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _rotate(self, old, data: bytes, chunks, generation: int):
+        """Finish old log, save snapshot and remove logs included in it."""
+        if old is not None:
+            self._write(old, data)
+            old.close()
+
+        save_snapshot(self.snapshot_path, chunks)
+
+        for number in self.logs():
+            if number < generation:
+                os.remove(self.log_path(number))
+
+    async def flush(self):
+        """Write collected changes to log."""
+        await asyncio.to_thread(self._write, self.log, self.take())
+
+    async def snapshot(self, field):
+        """Save snapshot of field and start new log."""
+        chunks = dump(field, self.generation + 1)
+        data = self.take()
+        old = self.log
+        self.generation += 1
+        self.log = open(self.log_path(self.generation), "ab")
+        await asyncio.to_thread(self._rotate, old, data, chunks, self.generation)
+
+    def close(self):
+        """Write collected changes and close log."""
+        if self.log is not None:
+            self._write(self.log, self.take())
+            self.log.close()
+            self.log = None
+
+    def start(self, field):
+        """Open new log and start writing changes of field in background task."""
+        self.log = open(self.log_path(self.generation), "ab")
+        self.task = asyncio.create_task(self.run(field))
+
+    async def run(self, field):
+        """Flush log every flush_interval seconds and save snapshot of field every snapshot_interval seconds."""
+        last = time.monotonic()
+
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+
+                if time.monotonic() - last >= self.snapshot_interval:
+                    last = time.monotonic()
+                    await self.snapshot(field)
+                else:
+                    await self.flush()
+        finally:
+            self.close()
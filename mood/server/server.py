@@ -1,37 +1,83 @@
 """Main functionality of server module."""
-import io
-import shlex
 import asyncio
-import cowsay
-from ..common import custom_monsters
+import functools
+import heapq
+import time
+from .cache import EncounterCache
+from .broadcast import Broadcaster
+from .outbox import Outbox
+from .store import MonsterStore
+from .metrics import Metrics, SIZE_BUCKETS
+from . import simulation
+from .i18n import Catalogs
+from .combat import Combat
+from .sync import StateSync
+from .session import Session
+from ..common.protocol import parse, read_command, CHUNKERS
+from ..common.protocol import Login, Move, AddMonster, Attack, Quit, SayAll, MoveMonsters, Locale, Join, Sync
 import random
-import gettext
 from pathlib import Path
 
 _path = str(Path(__file__).parents[1])
 
-LOCALES = {
-    "ru_RU.UTF-8": gettext.translation("mood", _path, fallback=True),
-    "en_US.UTF-8": gettext.NullTranslations(),
-}
-
+LOCALES = Catalogs(_path)
+ngettext = LOCALES.ngettext
+_ = LOCALES.gettext
 
-def ngettext(local, *args):
-    """Redefine for choose locale."""
-    return local.ngettext(*args)
 
+class Field:
+    """
+    Describe playing field.
 
-def _(local, text):
-    """Redefine for choose locale."""
-    return local.gettext(text)
-
+    Monsters attributes are kept in MonsterStore. Their slots are indexed by cell,
+    cells are indexed by square chunk for area queries and by position in flat
+    list for random sampling.
 
-class Field:
-    """Describe playing field."""
+    :param width: number of cells in row
+    :param height: number of cells in column
+    :param chunk: side of square chunk of spatial index
+    :param cache_size: how many rendered encounter pictures to keep
+    """
 
-    def __init__(self):
+    def __init__(self, width: int = 10, height: int = 10, chunk: int = 16, cache_size: int = 256):
         """Create playing field instance."""
+        self.width = width
+        self.height = height
+        self.chunk = chunk
         self.char_pos = {}
+        self.chunks = {}
+        self.cells = []
+        self.cell_index = {}
+        self.monsters = MonsterStore()
+        self.pictures = EncounterCache(cache_size)
+
+    def __len__(self):
+        """Return number of monsters on field."""
+        return len(self.cells)
+
+    def restore(self, store: MonsterStore):
+        """Replace all monsters on field with monsters kept in store, every slot of store must be in use."""
+        chunk = self.chunk
+        self.monsters = store
+        self.cells = list(zip(store.x, store.y))
+        self.char_pos = dict(zip(self.cells, range(len(self.cells))))
+        self.cell_index = self.char_pos.copy()
+        self.chunks = {}
+
+        for cell in self.cells:
+            key = (cell[0] // chunk, cell[1] // chunk)
+            bucket = self.chunks.get(key)
+            if bucket is None:
+                bucket = self.chunks[key] = set()
+            bucket.add(cell)
+
+    def wrap(self, x: int, y: int):
+        """Return coordinates of cell wrapped around field edges."""
+        return (x % self.width, y % self.height)
+
+    def contains(self, x: int, y: int):
+        """Check that cell with (x, y) coordinates is inside field."""
+        return 0 <= x < self.width and 0 <= y < self.height
 
     def get_character(self, x: int, y: int):
         """
@@ -40,35 +86,139 @@ class Field:
         :param x: horizontal coondinate
         :param y: vertical coordinate
         """
-        return self.char_pos[(x, y)]
+        return Monster.view(self.monsters, self.char_pos[(x, y)])
 
     def get_all_chars(self):
-        """Return list of coondinates of all monsters on field."""
-        return list(self.char_pos.keys())
+        """Return view of coondinates of all monsters on field."""
+        return self.char_pos.keys()
 
     def check_position(self, x: int, y: int):
         """Check for the presence of a monster on cell with (x, y) coordinates."""
-        return (x, y) in self.char_pos.keys()
+        return (x, y) in self.char_pos
 
     def set_character(self, x: int, y: int, other):
-        """Insert monster on cell with (x, y) coordinates."""
-        self.char_pos[(x, y)] = other
+        """Insert monster on cell with (x, y) coordinates, monster that stood there is removed."""
+        cell = (x, y)
+        old = self.char_pos.get(cell)
+
+        if old is None:
+            self.chunks.setdefault((x // self.chunk, y // self.chunk), set()).add(cell)
+            self.cell_index[cell] = len(self.cells)
+            self.cells.append(cell)
+        elif old != other.slot:
+            self.monsters.remove(old)
+
+        self.char_pos[cell] = other.slot
+        other.set_position(x, y)
 
     def delete_character(self, x: int, y: int):
         """Remove monster on sell with (x, y) coordinates."""
-        del self.char_pos[(x, y)]
+        cell = (x, y)
+        self.monsters.remove(self.char_pos.pop(cell))
+
+        key = (x // self.chunk, y // self.chunk)
+        bucket = self.chunks[key]
+        bucket.discard(cell)
+        if not bucket:
+            del self.chunks[key]
+
+        index = self.cell_index.pop(cell)
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[index] = last
+            self.cell_index[last] = index
+
+    def move_characters(self, moves):
+        """
+        Move several monsters at once.
+
+        :param moves: tuples starting with old and new cell, new cells must be free and distinct
+        """
+        char_pos, chunks, cell_index, cells, chunk = self.char_pos, self.chunks, self.cell_index, self.cells, self.chunk
+        xs, ys = self.monsters.x, self.monsters.y
+
+        for old, new, *rest in moves:
+            slot = char_pos.pop(old)
+            char_pos[new] = slot
+            xs[slot], ys[slot] = new
+            index = cell_index.pop(old)
+            cell_index[new] = index
+            cells[index] = new
+
+            old_key = (old[0] // chunk, old[1] // chunk)
+            new_key = (new[0] // chunk, new[1] // chunk)
+            bucket = chunks[old_key]
+            bucket.discard(old)
+
+            if old_key == new_key:
+                bucket.add(new)
+            else:
+                if not bucket:
+                    del chunks[old_key]
+                chunks.setdefault(new_key, set()).add(new)
+
+    def random_cell(self):
+        """Return coordinates of random monster or None if field is empty."""
+        return random.choice(self.cells) if self.cells else None
+
+    def area(self, x0: int, y0: int, x1: int, y1: int):
+        """
+        Iterate over monsters in rectangle x0 <= x < x1, y0 <= y < y1.
+
+        :return: pairs of cell coordinates and monster
+        """
+        for cell in self.area_cells(x0, y0, x1, y1):
+            yield cell, self.get_character(*cell)
+
+    def area_cells(self, x0: int, y0: int, x1: int, y1: int):
+        """Iterate over coordinates of monsters in rectangle x0 <= x < x1, y0 <= y < y1."""
+        keys = range(x0 // self.chunk, (x1 - 1) // self.chunk + 1), \
+            range(y0 // self.chunk, (y1 - 1) // self.chunk + 1)
+
+        if len(keys[0]) * len(keys[1]) <= len(self.chunks):
+            buckets = (self.chunks.get((cx, cy), ()) for cx in keys[0] for cy in keys[1])
+        else:
+            buckets = (bucket for (cx, cy), bucket in self.chunks.items() if cx in keys[0] and cy in keys[1])
+
+        for bucket in buckets:
+            for cell in bucket:
+                if x0 <= cell[0] < x1 and y0 <= cell[1] < y1:
+                    yield cell
+
+    def neighbours(self, x: int, y: int, radius: int = 1):
+        """
+        Iterate over monsters not further than radius cells from (x, y), field edges are wrapped.
+
+        :return: pairs of cell coordinates and monster
+        """
+        for x0, x1 in _spans(x, radius, self.width):
+            for y0, y1 in _spans(y, radius, self.height):
+                yield from self.area(x0, y0, x1, y1)
 
     def encounter(self, x, y):
         """Call when monster and hero stend on same cell with (x, y) coordinates\
         and return cow saying monster catch phrase."""
         monster = self.get_character(x, y)
-        name = monster.get_name()
+        return self.pictures.render(monster.get_name(), monster.get_phrase())
+
+    def encounter_payload(self, x, y):
+        """Return picture of encounter on cell with (x, y) coordinates encoded once for all heroes that meet it."""
+        monster = self.get_character(x, y)
+        return self.pictures.payload(monster.get_name(), monster.get_phrase())
+
+
+def _spans(center: int, radius: int, size: int):
+    """Split segment [center - radius, center + radius] wrapped around size into ranges."""
+    if 2 * radius + 1 >= size:
+        return [(0, size)]
+
+    start, stop = center - radius, center + radius + 1
 
-        if name in cowsay.list_cows():
-            return cowsay.cowsay(monster.get_phrase(), cow=name)
-        elif name in custom_monsters:
-            custom_cow = cowsay.read_dot_cow(io.StringIO(custom_monsters[name]))
-            return cowsay.cowsay(monster.get_phrase(), cowfile=custom_cow)
+    if start < 0:
+        return [(0, stop), (size + start, size)]
+    if stop > size:
+        return [(start, size), (0, stop - size)]
+    return [(start, stop)]
 
 
 class Character:
@@ -78,6 +228,8 @@ class Character:
     :param field: playing field instance
     """
 
+    __slots__ = ()
+
     x = 0
     y = 0
 
@@ -102,9 +254,12 @@ class Hero(Character):
     :param name: user name
     """
 
+    __slots__ = ("field", "x", "y", "name", "weapon", "armory", "locale", "world")
+
     def __init__(self, field: Field, name: str):
         """Create hero with armory on cell with (0, 0) coordinates."""
         super().__init__(field)
+        self.world = None
         self.x = 0
         self.y = 0
         self.name = name
@@ -134,7 +289,7 @@ class Hero(Character):
 
     def set_locale(self, name):
         """Set clients localization."""
-        self.locale = LOCALES[name]
+        self.locale = name
 
     def get_locale(self):
         """Return clients locale."""
@@ -145,6 +300,8 @@ class Monster(Character):
     """
     Describe monster characteristics.
 
+    Monster object is a view of slot in MonsterStore of field.
+
     :param x: horizontal coordinate of cell on which monster will stand
     :param y: vertical coordinate of cell on witch monster will stand
     :param name: monster name
@@ -153,23 +310,46 @@ class Monster(Character):
     :param field: monster playing field
     """
 
+    __slots__ = ("store", "slot")
+
     def __init__(self, x: int, y: int, name: str, phrase: str, hp: int, field: Field):
         """Create monster instance."""
-        super().__init__(field)
-        self.x = x
-        self.y = y
-        self.name = name
-        self.phrase = phrase
-        self.hp = hp
-        self.field.set_character(self.x, self.y, self)
+        self.store = field.monsters
+        self.slot = self.store.add(x, y, name, phrase, hp)
+        field.set_character(x, y, self)
+
+    @classmethod
+    def view(cls, store: MonsterStore, slot: int):
+        """Return monster object for monster already kept in store."""
+        monster = cls.__new__(cls)
+        monster.store = store
+        monster.slot = slot
+        return monster
+
+    def __eq__(self, other):
+        """Check that both objects view the same monster."""
+        return isinstance(other, Monster) and self.store is other.store and self.slot == other.slot
+
+    def __hash__(self):
+        """Return hash of monster slot."""
+        return hash((id(self.store), self.slot))
+
+    def get_position(self):
+        """Return cell coordinates on witch monster stand."""
+        return (self.store.x[self.slot], self.store.y[self.slot])
+
+    def set_position(self, x: int, y: int):
+        """Set monster on cell with (x, y) coordinates."""
+        self.store.x[self.slot] = x
+        self.store.y[self.slot] = y
 
     def get_phrase(self):
         """Return monster catch phrase."""
-        return self.phrase
+        return self.store.phrase(self.slot)
 
     def get_name(self):
         """Return monster name."""
-        return self.name
+        return self.store.name(self.slot)
 
     def set_hp(self, new_hp: int):
         """
@@ -177,57 +357,384 @@ class Monster(Character):
 
         :param new_hp: monster new hp value
         """
-        self.hp = new_hp
+        self.store.hp[self.slot] = new_hp
 
     def get_hp(self):
         """Return monster hp."""
-        return self.hp
+        return self.store.hp[self.slot]
 
 
-clients = {}
-desk = Field()
-task = None
+class World:
+    """
+    Game room with its own field, clients and monster movements.
 
+    Broadcasts of world reach only its clients, monsters of every world
+    are moved by its own task with its own tick interval and fraction.
 
-async def roaming_monster():
-    """Replace monster on one cell in random direction."""
-    while True:
-        monsters = desk.get_all_chars()
+    :param name: world name
+    :param field: playing field of world
+    :param tick_interval: seconds between monster movements, TICK_INTERVAL by default
+    :param tick_fraction: part of monsters moved every tick, TICK_FRACTION by default
+    """
+
+    def __init__(self, name: str, field: Field, tick_interval: float = None, tick_fraction: float = None):
+        """Create world without clients, monsters do not move until roaming is switched on."""
+        self.name = name
+        self.desk = field
+        self.clients = Broadcaster(width=field.width, height=field.height)
+        self.combat = Combat(lambda cell, attacks: strike(self, cell, attacks), COMBAT_INTERVAL)
+        self.sync = StateSync(field, SYNC_INTERVAL)
+        self.task = None
+        self.tick_interval = TICK_INTERVAL if tick_interval is None else tick_interval
+        self.tick_fraction = TICK_FRACTION if tick_fraction is None else tick_fraction
+
+    def __len__(self):
+        """Return number of heroes in world."""
+        return len(self.clients)
+
+    def join(self, hero, queue):
+        """Put hero on cell with (0, 0) coordinates of world and deliver messages of world to his queue."""
+        hero.world = self
+        hero.field = self.desk
+        hero.set_position(0, 0)
+        self.clients.subscribe(hero, queue)
+
+    def leave(self, hero):
+        """Stop delivering messages and field state of world to hero and return his queue."""
+        queue = self.clients[hero]
+        self.clients.unsubscribe(hero)
+        self.sync.unsubscribe(hero)
+        return queue
+
+    def close(self):
+        """Stop monster movements."""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+TICK_INTERVAL = 30
+TICK_FRACTION = None
+COMBAT_INTERVAL = 0
+SYNC_INTERVAL = 0.1
+MAX_SYNC_RADIUS = 20
+QUEUE_LIMIT = 256
+QUEUE_POLICY = "oldest"
+QUEUE_REPORT = 10
+DRAIN_TIMEOUT = 10
+FLUSH_WINDOW = 0
+WRITE_BUFFER = 64 * 1024
+TRANSPORT = "streams"
+LOGIN_TIMEOUT = 10
+MAX_CONNECTIONS = 10000
+ROOM_WIDTH = 10
+ROOM_HEIGHT = 10
+LOBBY = "lobby"
+
+lobby = World(LOBBY, Field())
+worlds = {LOBBY: lobby}
+users = {}
+claims = set()
+connections = 0
+shard = None
+journal = None
+metrics = Metrics()
+
+metrics.gauge("mood_worlds", lambda: len(worlds))
+metrics.gauge("mood_connections", lambda: connections)
+metrics.gauge("mood_clients", lambda: sum(map(len, worlds.values())))
+metrics.gauge("mood_monsters", lambda: sum(len(world.desk) for world in worlds.values()))
+metrics.gauge("mood_queued_messages", lambda: sum(map(len, queues())))
+metrics.gauge("mood_queue_depth_max", lambda: max(map(len, queues()), default=0))
+metrics.gauge("mood_dropped_messages", lambda: sum(queue.dropped for queue in queues()))
+metrics.gauge("mood_encounter_cache", lambda: {
+    (("result", "hit"),): sum(world.desk.pictures.hits for world in worlds.values()),
+    (("result", "miss"),): sum(world.desk.pictures.misses for world in worlds.values())})
+metrics.gauge("mood_client_queue", lambda: {
+    (("user", name), ("counter", counter)): value
+    for name, stats in connection_stats(QUEUE_REPORT).items() for counter, value in stats.items()})
+
+
+def queues():
+    """Iterate over outbound queues of heroes in all worlds."""
+    for world in worlds.values():
+        yield from world.clients.values()
+
+
+def open_world(name: str):
+    """Return world with name, new world of ROOM_WIDTH x ROOM_HEIGHT cells is created if there is no such world."""
+    world = worlds.get(name)
+
+    if world is None:
+        world = worlds[name] = World(name, Field(ROOM_WIDTH, ROOM_HEIGHT))
+    return world
+
+
+def close_world(world: World):
+    """Remove world that has no heroes left, lobby is never removed."""
+    if world is not lobby and not len(world) and worlds.get(world.name) is world:
+        world.close()
+        del worlds[world.name]
+
+
+def connection_stats(limit: int = None):
+    """
+    Return outbound queue counters of connected heroes.
+
+    :param limit: number of heroes with the deepest queues that are reported, None reports every hero
+    """
+    clients = [(hero, queue) for world in worlds.values() for hero, queue in world.clients.items()]
+    if limit is not None:
+        clients = heapq.nlargest(limit, clients, key=lambda client: len(client[1]))
+    return {hero.name: queue.stats() for hero, queue in clients}
 
-        if not monsters:
-            await asyncio.sleep(10)
-            continue
 
-        await asyncio.sleep(30)
+def publish(world: World, message, cell=None, exclude=None, key=None):
+    """Publish message with clients.publish of world and record number of recipients."""
+    count = world.clients.publish(message, cell, exclude, key)
 
-        while True:
-            x, y = random.choice(monsters)
-            if desk.check_position(x, y):
-                monster = desk.get_character(x, y)
-                a, b = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
-                x_new = (x + a) % 10
-                y_new = (y + b) % 10
+    if metrics.enabled:
+        metrics.observe("mood_fanout_recipients", count, buckets=SIZE_BUCKETS)
+    return count
 
-                if not desk.check_position(x_new, y_new):
-                    break
 
-        desk.set_character(x_new, y_new, monster)
+def encounter(world: World, x: int, y: int):
+    """
+    Return encoded picture of monster on cell of world, time rendering.
+
+    Payload is immutable bytes shared by queues of all heroes on the cell, codecs send it without encoding.
+    None is returned for monster that catalogue cannot draw.
+    """
+    if not metrics.sampled():
+        return world.desk.encounter_payload(x, y)
+
+    start = time.perf_counter()
+    picture = world.desk.encounter_payload(x, y)
+    metrics.observe("mood_encounter_render_seconds", time.perf_counter() - start)
+    return picture
+
+
+async def execute(world: World, x: int, operation: str, *args):
+    """
+    Run field operation on shard that owns column x of field and return its result.
+
+    Only lobby is split between shards, other worlds live in one process.
+
+    :param world: world of changed field
+    :param x: horizontal coordinate of cell changed by operation
+    :param operation: name of operation in OPERATIONS
+    """
+    if shard is None or world is not lobby or shard.owns(x):
+        return OPERATIONS[operation](world, *args)
+    return await shard.call(shard.owner(x), operation, *args)
+
+
+def record(event):
+    """Append field change to world journal."""
+    if journal is not None:
+        journal.append(event)
+
+
+def replicate(world: World, *event):
+    """
+    Pass change of field to heroes in sync with world.
+
+    Changes of lobby are also saved to journal and sent to other shards, changes of other worlds are not kept.
+    """
+    world.sync.record(event)
+
+    if world is not lobby:
+        return
+
+    record(event)
+
+    if shard is not None:
+        shard.send_all(("apply", event))
+
+
+def announce(world: World, kind: str, *args, exclude=None):
+    """
+    Publish notice to clients of world, notices of lobby reach clients of other shards too.
+
+    :param world: world where notice is published
+    :param kind: name of notice in NOTICES
+    :param exclude: hero or set of heroes that must not receive notice
+    """
+    NOTICES[kind](world, *args, exclude=exclude)
+
+    if shard is not None and world is lobby:
+        shard.send_all(("notice", kind, args, getattr(exclude, "name", None)))
+
+
+def put_monster(world, x, y, name, phrase, hp):
+    """Add monster on field of world, return True if it replaced the old one."""
+    desk = world.desk
+    replaced = desk.check_position(x, y)
+    Monster(x, y, name, phrase, hp, desk)
+    replicate(world, "set", x, y, name, phrase, hp)
+    return replaced
+
+
+def hit_monster(world, x, y, hits):
+    """
+    Damage monster on cell of world by hits in their order.
+
+    Field is changed once for all hits, hits after death of monster miss.
+
+    :param hits: pairs of monster name and damage
+    :return: damage and hp left for every hit, None for hits that missed
+    """
+    desk = world.desk
+    monster = desk.get_character(x, y) if desk.check_position(x, y) else None
+    hp = 0 if monster is None else monster.get_hp()
+    results = []
+
+    for name, damage in hits:
+        if hp == 0 or monster.get_name() != name:
+            results.append(None)
+            continue
+
+        damage = min(damage, hp)
+        hp -= damage
+        results.append((damage, hp))
+
+    if not any(results):
+        return results
+
+    if hp == 0:
         desk.delete_character(x, y)
-        direction = ""
+        replicate(world, "delete", x, y)
+    else:
+        monster.set_hp(hp)
+        replicate(world, "hp", x, y, hp)
+
+    return results
 
-        match (a, b):
-            case (0, -1): direction = "up"
-            case (0, 1): direction = "down"
-            case (1, 0): direction = "right"
-            case (-1, 0): direction = "left"
 
-        for el in clients.values():
-            await el.put(f'{monster.get_name()} moved one cell {direction}')
+def migrate_monster(world, old, new, direction):
+    """Move monster from region of other shard, return True on success."""
+    if not world.desk.check_position(*old) or world.desk.check_position(*new):
+        return False
 
-        for char in clients.keys():
-            if char.get_position() == (x_new, y_new):
-                msg = desk.encounter(x_new, y_new)
-                await clients[char].put(msg)
+    commit_moves(world, [(old, new, direction)])
+    return True
+
+
+def claim_name(world, name):
+    """Claim user name for the whole cluster, return False if it is already taken, world is not used."""
+    if name in claims:
+        return False
+    claims.add(name)
+    return True
+
+
+def release_name(world, name):
+    """Release user name claimed with claim_name, world is not used."""
+    claims.discard(name)
+
+
+OPERATIONS = {
+    "addmon": put_monster,
+    "attack": hit_monster,
+    "migrate": migrate_monster,
+    "claim": claim_name,
+    "release": release_name,
+}
+
+
+def report_moves(world, moves):
+    """Tell local clients of world about moved monsters, one message per region."""
+    regions = {}
+    clients = world.clients
+
+    for old, new, direction in moves:
+        lines = regions.setdefault(clients.region(*new), (new, []))[1]
+        lines.append(f'{world.desk.get_character(*new).get_name()} moved one cell {direction}')
+
+    for region, (cell, lines) in regions.items():
+        publish(world, '\n'.join(lines), cell=cell, key=("moved", region))
+
+    for old, new, direction in moves:
+        queues = clients.at(*new).values()
+        payload = encounter(world, *new) if queues else None
+        if payload is not None:
+            for queue in queues:
+                queue.put_nowait(payload)
+
+
+def commit_moves(world, moves):
+    """Apply monster moves planned by this shard."""
+    world.desk.move_characters(moves)
+    replicate(world, "moves", moves)
+    report_moves(world, moves)
+
+
+def change_field(field, event):
+    """
+    Apply field change event to field.
+
+    :return: event, moves that can not be done are removed from it
+    """
+    match event:
+        case ("set", x, y, name, phrase, hp):
+            Monster(x, y, name, phrase, hp, field)
+        case ("hp", x, y, hp) if field.check_position(x, y):
+            field.get_character(x, y).set_hp(hp)
+        case ("delete", x, y) if field.check_position(x, y):
+            field.delete_character(x, y)
+        case ("moves", moves):
+            moves = [move for move in moves if move[0] in field.char_pos and move[1] not in field.char_pos]
+            field.move_characters(moves)
+            event = ("moves", moves)
+
+    return event
+
+
+def apply_event(event):
+    """Apply change of lobby field made by other shard."""
+    event = change_field(lobby.desk, event)
+    record(event)
+    lobby.sync.record(event)
+
+    if event[0] == "moves":
+        report_moves(lobby, event[1])
+
+
+def handle_shard_message(message):
+    """Process message received from other shard."""
+    match message:
+        case ("call", origin, number, operation, args):
+            result = OPERATIONS[operation](lobby, *args)
+            if number is not None:
+                shard.reply(origin, number, result)
+        case ("apply", event):
+            apply_event(event)
+        case ("notice", kind, args, name):
+            NOTICES[kind](lobby, *args, exclude=lobby.clients.find(name))
+
+
+async def roaming_monster(world: World):
+    """Move monsters of world one cell in random direction every tick."""
+    desk = world.desk
+
+    while True:
+        if not len(desk):
+            await asyncio.sleep(10)
+            continue
+
+        await asyncio.sleep(world.tick_interval)
+
+        if shard is None or world is not lobby:
+            commit_moves(world, simulation.plan_moves(desk, world.tick_fraction))
+            continue
+
+        x0, x1 = shard.columns()
+        moves = simulation.plan_moves(desk, world.tick_fraction, list(desk.area_cells(x0, 0, x1, desk.height)))
+        commit_moves(world, [move for move in moves if shard.owns(move[1][0])])
+
+        for old, new, direction in moves:
+            if not shard.owns(new[0]):
+                shard.cast(shard.owner(new[0]), "migrate", old, new, direction)
 
 
 async def move(a, b, hero):
@@ -238,16 +745,19 @@ async def move(a, b, hero):
     :param b: value that is added to coordinate y
     :param hero: moved hero
     """
+    world = hero.world
     x, y = hero.get_position()
-    x = (x + int(a)) % 10
-    y = (y + int(b)) % 10
+    x, y = world.desk.wrap(x + a, y + b)
     hero.set_position(x, y)
+    world.clients.relocate(hero)
+    world.sync.relocate(hero)
 
-    await clients[hero].put(f"Moved to ({x}, {y})")
+    await world.clients[hero].put(f"Moved to ({x}, {y})")
 
-    if desk.check_position(x, y):
-        msg = desk.encounter(x, y)
-        await clients[hero].put(msg)
+    if world.desk.check_position(x, y):
+        msg = encounter(world, x, y)
+        if msg is not None:
+            await world.clients[hero].put(msg)
 
 
 async def addmon(name, phrase, hp, x, y, hero, me):
@@ -262,83 +772,274 @@ async def addmon(name, phrase, hp, x, y, hero, me):
     :param hero: hero instance that add monster
     :param me: hero name
     """
-    x, y = int(x), int(y)
-    hp = int(hp)
+    world = hero.world
+    if not world.desk.pictures.known(name):
+        await world.clients[hero].put(_(hero.get_locale(), 'Cannot add unknown monster {}').format(name))
+        return
 
-    flag = desk.check_position(x, y)
+    x, y = world.desk.wrap(x, y)
 
-    Monster(x, y, name, phrase, hp, desk)
-    await clients[hero].put(
+    flag = await execute(world, x, "addmon", x, y, name, phrase, hp)
+
+    await world.clients[hero].put(
             _(hero.get_locale(), 'Added monster {} to ({}, {}) saying: "{}"').format(name, x, y, phrase))
 
-    for cli, el in clients.items():
-        if el is not clients[hero]:
-            await el.put(ngettext(cli.get_locale(), 'User {} added monster {} with {} hp',
-                                  'User {} added monster {} with {} hps', hp).format(me, name, hp))
+    announce(world, "added", me, name, hp, exclude=hero)
 
     if flag:
-        await clients[hero].put(_(hero.get_locale(), 'Replaced the old monster'))
+        await world.clients[hero].put(_(hero.get_locale(), 'Replaced the old monster'))
 
 
 async def attack(name, weapon, me, hero):
     """
     Hero attacks monster on cell, that he staying.
 
+    Attack is resolved together with other attacks on the same cell made in this tick.
+
     :param name: monster name
     :param weamon: weapon name with which hero will attack
     :param me: hero name
     :param hero: hero instance
     """
-    x, y = hero.get_position()
+    hero.choose_weapon(weapon)
+    clients = hero.world.clients
+    result = await hero.world.combat.submit(hero.get_position(), (hero, name, weapon, hero.get_damage()))
 
-    if desk.check_position(x, y)\
-            and (monster := desk.get_character(x, y)).get_name() == name:
-        hero.choose_weapon(weapon)
-        damage = hero.get_damage() if monster.get_hp() >= hero.get_damage()\
-            else monster.get_hp()
-        monster.set_hp(monster.get_hp() - damage)
-        await clients[hero].put(ngettext(hero.get_locale(), "Attacked {}, damage {} hp",
-                                         "Attacked {}, damage {} hps", damage).format(monster.get_name(), damage))
-
-        if monster.get_hp() == 0:
-            await clients[hero].put(_(hero.get_locale(), "{} died").format(monster.get_name()))
-            desk.delete_character(x, y)
-        else:
-            await clients[hero].put(ngettext(hero.get_locale(), "{} now has {} hp",
-                                             "{} now has {} hps", monster.get_hp()).format(monster.get_name(),
-                                                                                           monster.get_hp()))
-
-        for cli, el in clients.items():
-            if el is not clients[hero]:
-                tmp1 = ngettext(cli.get_locale(), "User {} attacked monster {} with {}, damage {} hp",
-                                "User {} attacked monster {} with {}, damage {} hps",
-                                damage).format(me, name, weapon, damage)
-                tmp2 = "\n" + ngettext(cli.get_locale(), "{} now has {} hp",
-                                       "{} now has {} hps", monster.get_hp()).format(name, monster.get_hp())\
-                    if monster.get_hp() != 0 else "\n" + _(cli.get_locale(), "{} died").format(name)
-                await el.put(tmp1 + tmp2)
+    if result is None or hero not in clients:
+        if hero in clients:
+            await clients[hero].put(_(hero.get_locale(), "No {} here").format(name))
+        return
+
+    damage, hp = result
+    await clients[hero].put(ngettext(hero.get_locale(), "Attacked {}, damage {} hp",
+                                     "Attacked {}, damage {} hps", damage).format(name, damage))
+
+    if hp == 0:
+        await clients[hero].put(_(hero.get_locale(), "{} died").format(name))
+    else:
+        await clients[hero].put(ngettext(hero.get_locale(), "{} now has {} hp",
+                                         "{} now has {} hps", hp).format(name, hp))
+
+
+async def strike(world, cell, attacks):
+    """
+    Resolve attacks on cell made during one tick and tell other clients about them.
+
+    :param world: world of attacked cell
+    :param cell: pair of coordinates of attacked cell
+    :param attacks: tuples of hero, monster name, weapon name and damage
+    :return: damage and hp left for every attack, None for attacks that missed
+    """
+    x, y = cell
+    results = await execute(world, x, "attack", x, y, [(name, damage) for _, name, _, damage in attacks])
+    hits = [(hero, name, weapon, *result) for (hero, name, weapon, _), result in zip(attacks, results) if result]
+
+    if len(hits) == 1:
+        hero, name, weapon, damage, hp = hits[0]
+        announce(world, "attacked", hero.name, name, weapon, damage, hp, exclude=hero)
+    elif hits:
+        blows = [(hero.name, weapon, damage, hp) for hero, _, weapon, damage, hp in hits]
+        announce(world, "fought", hits[0][1], blows, exclude={hero for hero, *_ in hits})
+
+    return results
+
+
+async def join(name, me, hero):
+    """
+    Move hero to world with name, world is created if there is no such world.
+
+    Joining the world hero is already in keeps hero, his position and the world as they are.
+
+    :param name: world name
+    :param me: hero name
+    :param hero: hero instance
+    """
+    old = hero.world
+    if name == old.name:
+        await old.clients[hero].put(f"Joined world {name}")
+        return
+
+    radius = old.sync.radius(hero)
+    queue = old.leave(hero)
+    announce(old, "disconnected", me)
+    close_world(old)
+
+    world = open_world(name)
+    world.join(hero, queue)
+    await queue.put(f"Joined world {name}")
+    announce(world, "connected", me, exclude=hero)
+
+    if radius is not None:
+        world.sync.subscribe(hero, queue, radius)
+
+
+async def sync(radius, hero):
+    """
+    Send snapshot of field around hero and then keep him in sync with its changes.
+
+    :param radius: half of side of square area, it is limited by MAX_SYNC_RADIUS, None stops sync
+    :param hero: hero instance
+    """
+    world = hero.world
+    queue = world.clients[hero]
+
+    if radius is None:
+        world.sync.unsubscribe(hero)
+        await queue.put("Sync stopped")
     else:
-        await clients[hero].put(_(hero.get_locale(), "No {} here").format(name))
+        world.sync.subscribe(hero, queue, min(radius, MAX_SYNC_RADIUS))
 
 
-async def roaming_monster_switch(flag, task):
-    """Turn random mosters movements on/off."""
+def roaming_monster_switch(world, flag):
+    """Turn random mosters movements in world on/off."""
     match flag:
         case "on":
-            try:
-                task.cancel()
-                await asyncio.sleep(0)
-            except Exception:
-                pass
+            world.close()
+            print(f"movemonsters on in {world.name}")
+            world.task = asyncio.create_task(roaming_monster(world))
+        case "off":
+            print(f"movemonsters off in {world.name}")
+            world.close()
 
-            print("movemonsters on")
 
-            task = asyncio.create_task(roaming_monster())
-            await asyncio.sleep(0)
-        case "off":
-            print("movemonsters off")
-            task.cancel()
-            await asyncio.sleep(0)
+def notify_connected(world, me, exclude=None):
+    """Tell clients of world that user connected."""
+    publish(world, lambda locale: _(locale, "User {} connected").format(me), exclude=exclude)
+
+
+def notify_disconnected(world, me, exclude=None):
+    """Tell clients of world that user disconnected."""
+    publish(world, lambda locale: _(locale, "{} disconnected").format(me), exclude=exclude)
+
+
+def notify_said(world, me, text, exclude=None):
+    """Send user message to clients of world."""
+    publish(world, f"{me}: {text}", exclude=exclude)
+
+
+def notify_added(world, me, name, hp, exclude=None):
+    """Tell clients of world that user added monster."""
+    publish(world, lambda locale: ngettext(locale, 'User {} added monster {} with {} hp',
+                                           'User {} added monster {} with {} hps', hp).format(me, name, hp),
+            exclude=exclude)
+
+
+def notify_attacked(world, me, name, weapon, damage, hp, exclude=None):
+    """Tell clients of world that user attacked monster."""
+    def notice(locale):
+        tmp1 = ngettext(locale, "User {} attacked monster {} with {}, damage {} hp",
+                        "User {} attacked monster {} with {}, damage {} hps",
+                        damage).format(me, name, weapon, damage)
+        tmp2 = "\n" + ngettext(locale, "{} now has {} hp",
+                               "{} now has {} hps", hp).format(name, hp)\
+            if hp != 0 else "\n" + _(locale, "{} died").format(name)
+        return tmp1 + tmp2
+
+    publish(world, notice, exclude=exclude)
+
+
+def notify_fought(world, name, blows, exclude=None):
+    """
+    Tell clients of world about several users that attacked monster in one tick.
+
+    :param name: monster name
+    :param blows: tuples of user name, weapon, damage and hp left in order of attacks
+    """
+    def notice(locale):
+        lines = []
+        for me, weapon, damage, hp in blows:
+            lines.append(ngettext(locale, "User {} attacked monster {} with {}, damage {} hp",
+                                  "User {} attacked monster {} with {}, damage {} hps",
+                                  damage).format(me, name, weapon, damage))
+        hp = blows[-1][3]
+        lines.append(ngettext(locale, "{} now has {} hp", "{} now has {} hps", hp).format(name, hp)
+                     if hp != 0 else _(locale, "{} died").format(name))
+        return "\n".join(lines)
+
+    publish(world, notice, exclude=exclude)
+
+
+def notify_roaming(world, flag, exclude=None):
+    """Turn random monsters movements in world on/off and tell its clients about it."""
+    roaming_monster_switch(world, flag)
+    publish(world, f"Moving monsters: {flag}", exclude=exclude)
+
+
+NOTICES = {
+    "connected": notify_connected,
+    "disconnected": notify_disconnected,
+    "said": notify_said,
+    "added": notify_added,
+    "attacked": notify_attacked,
+    "fought": notify_fought,
+    "roaming": notify_roaming,
+}
+
+
+async def claim(name: str):
+    """
+    Reserve user name, return False if it is used.
+
+    In multi-process mode name is claimed on worker chosen by shard.registrar,
+    so the same name cannot log in on two workers.
+    """
+    if name in users:
+        return False
+    if shard is None:
+        return True
+    if shard.registrar(name) == shard.index:
+        return claim_name(lobby, name)
+    return await shard.call(shard.registrar(name), "claim", name)
+
+
+def release(name: str):
+    """Make user name free for other logins."""
+    if shard is None:
+        return
+    if shard.registrar(name) == shard.index:
+        release_name(lobby, name)
+    else:
+        shard.cast(shard.registrar(name), "release", name)
+
+
+async def admit(reader, writer):
+    """
+    Read login of new connection.
+
+    Connections over MAX_CONNECTIONS, sessions that do not log in within
+    LOGIN_TIMEOUT seconds and names that are already used on any worker are
+    closed before any hero or queue is created for them.
+
+    :param reader: stream from client
+    :param writer: stream to client
+    :return: user name and codec or None if connection is rejected
+    """
+    if connections > MAX_CONNECTIONS:
+        reason = "full"
+    else:
+        try:
+            line = await asyncio.wait_for(reader.readline(), LOGIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            reason = "timeout"
+        except (ConnectionError, ValueError):
+            reason = "invalid"
+        else:
+            match parse(line.decode(errors="replace").strip()):
+                case Login(name, codec):
+                    if await claim(name):
+                        return name, codec
+                    reason = "duplicate"
+                case _:
+                    reason = "invalid"
+
+    if metrics.enabled:
+        metrics.count("mood_rejected_connections_total", [("reason", reason)])
+
+    if reason == "duplicate":
+        writer.write(b"0\n")
+        writer.close()
+    else:
+        writer.transport.abort()
 
 
 async def mud(reader, writer):
@@ -348,90 +1049,203 @@ async def mud(reader, writer):
     :param reader: Represents a reader object that provides APIs to read data from the IO stream
     :param writer: Represents a writer object that provides APIs to write data to the IO stream
     """
-    log_in = asyncio.create_task(reader.readline())
-    log_res = await log_in
-    res_arr = log_res.decode().strip().split()
-    me = ''
-
-    match res_arr:
-        case ["login", name]:
-            if name in clients:
-                writer.write(f'{0}\n'.encode())
-                await writer.drain()
-                reader.feed_eof()
-                await reader.read()
+    global connections
+    connections += 1
+
+    try:
+        login = await admit(reader, writer)
+        if login is not None:
+            await play(reader, writer, *login)
+    finally:
+        connections -= 1
+
+
+async def collect(queue):
+    """
+    Wait for messages in queue and return all of them.
+
+    After the first message sender waits FLUSH_WINDOW seconds, so messages
+    coming during that time are written together.
+    """
+    messages = [await queue.get()]
+
+    if FLUSH_WINDOW > 0:
+        await asyncio.sleep(FLUSH_WINDOW)
+
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+async def dispatch(text: str, me: str, hero):
+    """
+    Run command line of user.
+
+    :param text: command line
+    :param me: user name
+    :param hero: hero of user
+    :return: False if user quits
+    """
+    command = parse(text)
+    start = time.perf_counter() if metrics.sampled() else None
+
+    if metrics.enabled:
+        metrics.count("mood_commands_total", [("command", type(command).__name__.lower())])
+
+    match command:
+        case Move(a, b):
+            await move(a, b, hero)
+        case AddMonster(name, phrase, hp, x, y):
+            await addmon(name, phrase, hp, x, y, hero, me)
+        case Attack(name, weapon):
+            await attack(name, weapon, me, hero)
+        case Quit():
+            return False
+        case SayAll(text):
+            announce(hero.world, "said", me, text, exclude=hero)
+        case MoveMonsters(flag):
+            announce(hero.world, "roaming", flag)
+        case Join(name):
+            await join(name, me, hero)
+        case Sync(radius):
+            await sync(radius, hero)
+        case Locale(name):
+            queue = hero.world.clients[hero]
+            if name not in LOCALES:
+                hero.set_locale("en_US.UTF-8")
+                await queue.put(_(hero.get_locale(), "Locale {} does not exist").format(name))
             else:
-                me = name
-                writer.write(f'{1}\n'.encode())
-                print(f"log in user: {me}")
+                hero.set_locale(name)
+                await queue.put(_(hero.get_locale(), "Set up locale: {}".format(name)))
+        case _:
+            print(text)
 
-    hero = Hero(desk, me)
-    hero.set_locale("en_US.UTF-8")
-    clients[hero] = asyncio.Queue()
-    send = asyncio.create_task(reader.readline())
-    receive = asyncio.create_task(clients[hero].get())
+    if start is not None:
+        metrics.observe("mood_command_seconds", time.perf_counter() - start,
+                        [("command", type(command).__name__.lower())])
+    return True
 
-    if me:
-        for cli, el in clients.items():
-            if el is not clients[hero]:
-                await el.put(_(cli.get_locale(), "User {} connected").format(me))
+
+async def read_commands(reader, codec: str, me: str, hero):
+    """
+    Run commands of user one by one until he quits or stream ends.
+
+    :param reader: stream from client
+    :param codec: messages format chosen at login
+    :param me: user name
+    :param hero: hero of user
+    :return: True if connection was broken or line was too long
+    """
+    readline = reader.readline if codec == "text" else functools.partial(read_command, reader)
 
     while not reader.at_eof():
-        done, pending = await asyncio.wait([send, receive], return_when=asyncio.FIRST_COMPLETED)
-
-        for q in done:
-            if q is send:
-                send = asyncio.create_task(reader.readline())
-                text = q.result().decode().strip()
-
-                match shlex.split(text):
-                    case ["move", a, b]:
-                        await move(a, b, hero)
-                    case ["addmon", name, "phrase", phrase, "hp", hp, "coords", x, y]:
-                        await addmon(name, phrase, hp, x, y, hero, me)
-                    case ["attack", name, weapon]:
-                        await attack(name, weapon, me, hero)
-                    case ["quit"]:
-                        reader.feed_eof()
-                        await reader.read()
-                        break
-                    case ["sayall", text]:
-                        for el in clients.values():
-                            if el is not clients[hero]:
-                                await el.put(f"{me}: {text}")
-                    case ["movemonsters", flag]:
-                        await roaming_monster_switch(flag, task)
-
-                        for el in clients.values():
-                            await el.put(f"Moving monsters: {flag}")
-                    case ["locale", name]:
-                        if name not in LOCALES.keys():
-                            hero.set_locale("en_US.UTF-8")
-                            await clients[hero].put(_(hero.get_locale(), "Locale {} does not exist").format(name))
-                        else:
-                            hero.set_locale(name)
-                            await clients[hero].put(_(hero.get_locale(), "Set up locale: {}".format(name)))
-                    case _:
-                        print(text)
-            elif q is receive:
-                res = q.result()
-
-                while not clients[hero].empty():
-                    res += '\n' + await clients[hero].get()
-
-                receive = asyncio.create_task(clients[hero].get())
-                writer.write((res).encode())
-                await writer.drain()
-
-    send.cancel()
-    receive.cancel()
-
-    if me:
+        try:
+            text = (await readline()).decode(errors="replace").strip()
+        except (ConnectionError, ValueError):
+            return True
+
+        if not await dispatch(text, me, hero):
+            return False
+
+    return False
+
+
+async def write_messages(writer, queue, codec: str, me: str):
+    """
+    Send messages from queue to client until connection is broken.
+
+    Client is waited for only when more than WRITE_BUFFER bytes are not sent yet.
+
+    :param writer: stream to client
+    :param queue: outbound queue of user
+    :param codec: messages format chosen at login
+    :param me: user name
+    :return: True, as sending stops only when client does not read messages for DRAIN_TIMEOUT or disconnects
+    """
+    chunks = CHUNKERS[codec]
+
+    while True:
+        writer.writelines(chunks(await collect(queue)))
+
+        if writer.transport.get_write_buffer_size() < WRITE_BUFFER:
+            continue
+
+        try:
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"{me} evicted: {queue.stats()}")
+            return True
+        except ConnectionError:
+            return True
+
+
+async def play(reader, writer, me: str, codec: str):
+    """
+    Handle commands of logged in user and send him messages.
+
+    Commands are read and messages are written by two long-lived tasks,
+    session ends when any of them stops. User is logged out and connection
+    is closed even if one of them fails.
+
+    :param reader: stream from client
+    :param writer: stream to client
+    :param me: user name
+    :param codec: messages format chosen at login
+    """
+    writer.write(b"1\n")
+    print(f"log in user: {me}")
+
+    hero = Hero(lobby.desk, me)
+    hero.set_locale("en_US.UTF-8")
+    queue = Outbox(QUEUE_LIMIT, QUEUE_POLICY)
+    users[me] = hero
+    lobby.join(hero, queue)
+    reading = asyncio.create_task(read_commands(reader, codec, me, hero))
+    writing = asyncio.create_task(write_messages(writer, queue, codec, me))
+
+    announce(lobby, "connected", me, exclude=hero)
+
+    evicted = True
+
+    try:
+        done, pending = await asyncio.wait([reading, writing], return_when=asyncio.FIRST_COMPLETED)
+        evicted = any(task.result() for task in done)
+    finally:
+        reading.cancel()
+        writing.cancel()
+
+        world = hero.world
         print(f"{me} disconnected")
-        for cli, el in clients.items():
-            if el is not clients[hero]:
-                await el.put(_(cli.get_locale(), "{} disconnected").format(me))
+        announce(world, "disconnected", me, exclude=hero)
+        world.leave(hero)
+        close_world(world)
+        del users[me]
+        release(me)
+
+        if evicted:
+            writer.transport.abort()
+        else:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def listen(host: str, port: int, transport: str = None, handler=None, **options):
+    """
+    Start accepting clients on address, return asyncio server.
+
+    With transport "streams" connections get StreamReader and StreamWriter,
+    with "protocol" they are served by Session protocol without them.
+
+    :param transport: "streams" or "protocol", TRANSPORT by default
+    :param handler: coroutine function taking reader and writer, mud by default
+    :param options: options of loop.create_server
+    """
+    transport = TRANSPORT if transport is None else transport
+    handler = mud if handler is None else handler
 
-    del clients[hero]
-    writer.close()
-    await writer.wait_closed()
+    if transport == "streams":
+        return await asyncio.start_server(handler, host, port, **options)
+    return await asyncio.get_running_loop().create_server(lambda: Session(handler), host, port, **options)
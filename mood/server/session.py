@@ -0,0 +1,179 @@
+"""Client connection served by asyncio.Protocol without StreamReader and StreamWriter."""
+import asyncio
+
+_background = set()
+
+
+class Session(asyncio.Protocol):
+    """
+    Connection that is both reader and writer of MUD session.
+
+    Implements the part of StreamReader and StreamWriter interface that
+    server uses: readline, readexactly, feed_eof, at_eof, write, writelines,
+    drain, close, wait_closed, get_extra_info and transport. Incoming data
+    is kept in one buffer, reading from socket is paused while buffer is over
+    limit.
+
+    :param handler: coroutine function taking reader and writer, like callback of asyncio.start_server
+    :param limit: buffered bytes after which reading from socket is paused, longer lines are rejected
+    """
+
+    def __init__(self, handler, limit: int = 64 * 1024):
+        """Create session, handler is started when connection is made."""
+        self.handler = handler
+        self.limit = limit
+        self.buffer = bytearray()
+        self.eof = False
+        self.lost = False
+        self.paused = False
+        self.waiter = None
+        self.drained = None
+        self.closed = None
+        self.transport = None
+
+    def connection_made(self, transport):
+        """Start handler of connection."""
+        self.transport = transport
+        self.closed = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(self.handler(self, self))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+    def data_received(self, data):
+        """Add data to buffer and wake reader."""
+        self.buffer += data
+        self._wake()
+
+        if len(self.buffer) > self.limit and not self.paused:
+            self.paused = True
+            self.transport.pause_reading()
+
+    def eof_received(self):
+        """Mark end of stream, connection stays open for writing."""
+        self.feed_eof()
+        return True
+
+    def connection_lost(self, exc):
+        """Wake reader and writer waiting for connection."""
+        self.lost = True
+        self.feed_eof()
+        self.resume_writing()
+
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    def pause_writing(self):
+        """Make drain wait until transport buffer is written to socket."""
+        if self.drained is None or self.drained.done():
+            self.drained = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        """Release writer waiting in drain."""
+        if self.drained is not None and not self.drained.done():
+            self.drained.set_result(None)
+
+    def _wake(self):
+        """Release reader waiting for data."""
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def _wait(self):
+        """Wait for more data, reading from socket is resumed first."""
+        if self.paused:
+            self.paused = False
+            self.transport.resume_reading()
+
+        self.waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self.waiter
+        finally:
+            self.waiter = None
+
+    async def readline(self):
+        """
+        Return next line with trailing newline, rest of data without it at the end of stream.
+
+        :raises ValueError: line is longer than limit
+        """
+        while True:
+            end = self.buffer.find(b"\n")
+            if end >= self.limit:
+                del self.buffer[:end + 1]
+                raise ValueError("Line is too long")
+            if end >= 0:
+                line = bytes(self.buffer[:end + 1])
+                del self.buffer[:end + 1]
+                return line
+
+            if self.eof:
+                line = bytes(self.buffer)
+                self.buffer.clear()
+                return line
+
+            if len(self.buffer) > self.limit:
+                self.buffer.clear()
+                raise ValueError("Line is too long")
+
+            await self._wait()
+
+    async def readexactly(self, n: int):
+        """
+        Return next n bytes.
+
+        :raises asyncio.IncompleteReadError: stream ended before n bytes
+        """
+        while len(self.buffer) < n:
+            if self.eof:
+                partial = bytes(self.buffer)
+                self.buffer.clear()
+                raise asyncio.IncompleteReadError(partial, n)
+            await self._wait()
+
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def feed_eof(self):
+        """Mark end of stream."""
+        self.eof = True
+        self._wake()
+
+    def at_eof(self):
+        """Check that stream ended and all data was read."""
+        return self.eof and not self.buffer
+
+    def write(self, data):
+        """Send data without waiting."""
+        self.transport.write(data)
+
+    def writelines(self, chunks):
+        """Send list of byte chunks without waiting."""
+        self.transport.writelines(chunks)
+
+    async def drain(self):
+        """
+        Wait until transport buffer is below high water mark.
+
+        :raises ConnectionResetError: connection is lost
+        """
+        if self.drained is not None and not self.drained.done():
+            await asyncio.shield(self.drained)
+
+        if self.lost:
+            raise ConnectionResetError("Connection lost")
+
+    def get_extra_info(self, name: str, default=None):
+        """Return information about connection from transport, like StreamWriter.get_extra_info."""
+        return self.transport.get_extra_info(name, default)
+
+    def is_closing(self):
+        """Check that connection is closed or closing."""
+        return self.transport.is_closing()
+
+    def close(self):
+        """Close connection after buffered data is sent."""
+        self.transport.close()
+
+    async def wait_closed(self):
+        """Wait until connection is closed."""
+        await self.closed
@@ -0,0 +1,89 @@
+"""Batch movement of monsters on field."""
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DIRECTIONS = ("up", "down", "right", "left")
+STEPS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+GRID_LIMIT = 1 << 24
+
+_rng = numpy.random.default_rng() if numpy is not None else None
+
+
+def plan_moves(field, fraction=None, cells=None):
+    """
+    Choose monsters to move on this tick and cells they move to.
+
+    Every chosen monster steps one cell in random direction. Move is
+    cancelled if target cell was occupied at the start of tick or if
+    another monster already goes there.
+
+    :param field: playing field
+    :param fraction: part of monsters to move, None moves one monster
+    :param cells: coordinates of monsters that may move, all monsters by default
+    :return: list of (old cell, new cell, direction name)
+    """
+    cells = field.cells if cells is None else cells
+    count = len(cells)
+
+    if not count:
+        return []
+
+    size = 1 if fraction is None else min(count, max(1, round(count * fraction)))
+
+    if numpy is None or size == 1:
+        return _plan_python(field, cells, size)
+    return _plan_numpy(field, cells, size)
+
+
+def _plan_python(field, cells, size):
+    """Choose moves using random module."""
+    moves = []
+    taken = set()
+
+    for x, y in cells if size == len(cells) else random.sample(cells, size):
+        direction = random.randrange(4)
+        a, b = STEPS[direction]
+        target = field.wrap(x + a, y + b)
+
+        if target not in taken and not field.check_position(*target):
+            taken.add(target)
+            moves.append(((x, y), target, DIRECTIONS[direction]))
+
+    return moves
+
+
+def _plan_numpy(field, cells, size):
+    """Choose moves with vectorized operations over arrays of positions."""
+    width, height = field.width, field.height
+    positions = numpy.array(cells, dtype=numpy.int64)
+    count = len(positions)
+
+    chosen = numpy.arange(count) if size == count else _rng.choice(count, size, replace=False)
+    directions = _rng.integers(0, 4, size)
+    old = positions[chosen]
+    new = old + numpy.array(STEPS, dtype=numpy.int64)[directions]
+    new[:, 0] %= width
+    new[:, 1] %= height
+
+    target = new[:, 0] + new[:, 1] * width
+    occupied = positions if cells is field.cells else numpy.array(field.cells, dtype=numpy.int64)
+    occupied_ids = occupied[:, 0] + occupied[:, 1] * width
+
+    if width * height <= GRID_LIMIT:
+        grid = numpy.zeros(width * height, dtype=bool)
+        grid[occupied_ids] = True
+        free = numpy.flatnonzero(~grid[target])
+    else:
+        free = numpy.flatnonzero(~numpy.isin(target, occupied_ids))
+
+    _, first = numpy.unique(target[free], return_index=True)
+    keep = numpy.sort(free[first])
+
+    old_x, old_y = old[keep].T.tolist()
+    new_x, new_y = new[keep].T.tolist()
+
+    return list(zip(zip(old_x, old_y), zip(new_x, new_y), map(DIRECTIONS.__getitem__, directions[keep].tolist())))
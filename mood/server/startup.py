@@ -0,0 +1,133 @@
+"""Event loop selection, listening socket options and timing of server start."""
+import asyncio
+import functools
+import socket
+import time
+from typing import NamedTuple
+from .server import listen
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+LOOPS = ("auto", "asyncio", "uvloop")
+
+
+class Startup(NamedTuple):
+    """
+    How server process runs event loop and accepts connections.
+
+    Loop "auto" is uvloop when it is installed and asyncio loop otherwise.
+    Buffer sizes are set on listening socket before listen, so accepted
+    connections inherit them, no delay option is set on every connection.
+
+    :param host: bind address
+    :param port: listening port, 0 picks free port
+    :param backlog: length of queue of connections not accepted yet
+    :param loop: "auto", "asyncio" or "uvloop"
+    :param transport: "streams" or "protocol", see server.listen
+    :param nodelay: send small writes at once without Nagle algorithm
+    :param send_buffer: SO_SNDBUF in bytes, None keeps system default
+    :param receive_buffer: SO_RCVBUF in bytes, None keeps system default
+    :param reuse_port: let worker processes listen on the same port
+    """
+
+    host: str = "0.0.0.0"
+    port: int = 1337
+    backlog: int = 100
+    loop: str = "auto"
+    transport: str = "streams"
+    nodelay: bool = True
+    send_buffer: int = None
+    receive_buffer: int = None
+    reuse_port: bool = False
+
+    def loop_name(self):
+        """Return name of event loop that will be used."""
+        if self.loop == "auto":
+            return "asyncio" if uvloop is None else "uvloop"
+        return self.loop
+
+    def loop_factory(self):
+        """
+        Return function creating event loop.
+
+        :raises RuntimeError: uvloop is requested but not installed
+        """
+        if self.loop_name() == "asyncio":
+            return asyncio.new_event_loop
+        if uvloop is None:
+            raise RuntimeError("uvloop is not installed, pip install mood[fast]")
+        return uvloop.new_event_loop
+
+    def run(self, main):
+        """Run coroutine function main in new event loop and return its result."""
+        with asyncio.Runner(loop_factory=self.loop_factory()) as runner:
+            return runner.run(main())
+
+    def _buffers(self, sock):
+        """Set buffer sizes of socket."""
+        if self.send_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        if self.receive_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+
+    def socket(self):
+        """Return listening socket bound to host and port."""
+        family, kind, proto, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM,
+                                                             flags=socket.AI_PASSIVE)[0]
+        sock = socket.socket(family, kind, proto)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self._buffers(sock)
+            sock.bind(address)
+            sock.listen(self.backlog)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+
+        return sock
+
+    def tune(self, handler):
+        """Return connection handler that sets no delay option of connection socket before calling handler."""
+        @functools.wraps(handler)
+        def tuned(reader, writer):
+            sock = writer.get_extra_info("socket")
+            if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self.nodelay))
+            return handler(reader, writer)
+
+        return tuned
+
+    async def listen(self, handler):
+        """Start accepting connections with handler, return asyncio server."""
+        return await listen(None, None, self.transport, self.tune(handler), sock=self.socket(), backlog=self.backlog)
+
+
+class Timing:
+    """Durations of phases of server start."""
+
+    def __init__(self):
+        """Start measuring, the first phase begins now."""
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase: str):
+        """End phase with name, the next phase begins now."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        """Return seconds since start of measuring."""
+        return self.last - self.start
+
+    def report(self):
+        """Return line with total time and durations of phases in milliseconds."""
+        phases = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.phases)
+        return f"started in {self.total() * 1000:.1f} ms ({phases})"
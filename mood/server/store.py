@@ -0,0 +1,144 @@
+"""Compact storage of monsters attributes."""
+from array import array
+from collections import Counter
+
+
+class Interner:
+    """Table of unique strings with reference counters, string is addressed by integer id."""
+
+    def __init__(self):
+        """Create empty table."""
+        self.values = []
+        self.refs = array('i')
+        self.ids = {}
+        self.free = []
+
+    @classmethod
+    def restore(cls, values, *columns):
+        """
+        Create table with strings loaded from disk.
+
+        :param values: strings, position in list is string id
+        :param columns: arrays of ids that refer to strings
+        """
+        table = cls()
+        table.values = list(values)
+        table.refs = array('i', bytes(4 * len(table.values)))
+
+        for column in columns:
+            for index, count in Counter(column).items():
+                table.refs[index] += count
+
+        for index, value in enumerate(table.values):
+            if table.refs[index]:
+                table.ids[value] = index
+            else:
+                table.free.append(index)
+
+        return table
+
+    def __len__(self):
+        """Return number of strings in use."""
+        return len(self.ids)
+
+    def acquire(self, value: str):
+        """Return id of string and increase its reference counter."""
+        index = self.ids.get(value)
+
+        if index is None:
+            if self.free:
+                index = self.free.pop()
+                self.values[index] = value
+            else:
+                index = len(self.values)
+                self.values.append(value)
+                self.refs.append(0)
+            self.ids[value] = index
+
+        self.refs[index] += 1
+        return index
+
+    def release(self, index: int):
+        """Decrease reference counter of string, forget string that is not used anymore."""
+        self.refs[index] -= 1
+
+        if not self.refs[index]:
+            del self.ids[self.values[index]]
+            self.free.append(index)
+
+
+class MonsterStore:
+    """
+    Struct of arrays with coordinates, hp, name and phrase ids of all monsters.
+
+    Monster is addressed by slot, slots of removed monsters are reused.
+    Attributes of removed monster stay readable until its slot is reused.
+    """
+
+    def __init__(self):
+        """Create empty storage."""
+        self.x = array('i')
+        self.y = array('i')
+        self.hp = array('i')
+        self.name_id = array('i')
+        self.phrase_id = array('i')
+        self.names = Interner()
+        self.phrases = Interner()
+        self.free = []
+
+    @classmethod
+    def restore(cls, x, y, hp, name_id, phrase_id, names, phrases):
+        """
+        Create storage from arrays loaded from disk, every slot is in use.
+
+        :param names: monster names, position in list is name id
+        :param phrases: catch phrases, position in list is phrase id
+        """
+        store = cls()
+        store.x, store.y, store.hp, store.name_id, store.phrase_id = x, y, hp, name_id, phrase_id
+        store.names = Interner.restore(names, name_id)
+        store.phrases = Interner.restore(phrases, phrase_id)
+        return store
+
+    def __len__(self):
+        """Return number of stored monsters."""
+        return len(self.x) - len(self.free)
+
+    def add(self, x: int, y: int, name: str, phrase: str, hp: int):
+        """
+        Store monster and return its slot.
+
+        :param x: horizontal coordinate
+        :param y: vertical coordinate
+        :param name: monster name
+        :param phrase: monster catch phrase
+        :param hp: monster health points
+        :raises OverflowError: number does not fit into column, nothing is stored
+        """
+        values = (*array('i', (x, y, hp)), self.names.acquire(name), self.phrases.acquire(phrase))
+        columns = (self.x, self.y, self.hp, self.name_id, self.phrase_id)
+
+        if self.free:
+            slot = self.free.pop()
+            for column, value in zip(columns, values):
+                column[slot] = value
+        else:
+            slot = len(self.x)
+            for column, value in zip(columns, values):
+                column.append(value)
+
+        return slot
+
+    def remove(self, slot: int):
+        """Free slot of removed monster."""
+        self.names.release(self.name_id[slot])
+        self.phrases.release(self.phrase_id[slot])
+        self.free.append(slot)
+
+    def name(self, slot: int):
+        """Return name of monster in slot."""
+        return self.names.values[self.name_id[slot]]
+
+    def phrase(self, slot: int):
+        """Return catch phrase of monster in slot."""
+        return self.phrases.values[self.phrase_id[slot]]
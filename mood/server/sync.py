@@ -0,0 +1,246 @@
+"""Versioned snapshots and diffs of field state for clients that keep their own board."""
+import asyncio
+import json
+
+PREFIX = "sync "
+DIFF = PREFIX + '{"from":'
+CHUNK = 16
+
+
+def _dropped(queue):
+    """Return number of messages dropped by queue, queues without limit never drop."""
+    return getattr(queue, "dropped", 0)
+
+
+def _distance(a: int, b: int, size: int):
+    """Return distance between coordinates on axis wrapped around size."""
+    offset = abs(a - b) % size
+    return min(offset, size - offset)
+
+
+def _chunks(center: int, radius: int, size: int):
+    """Return indexes of chunks covering segment [center - radius, center + radius] wrapped around size."""
+    radius = min(radius, size)
+    return {(center + offset) % size // CHUNK for offset in range(-radius, radius + 1)}
+
+
+def index(changes):
+    """Return dict of chunks and sorted positions of changes touching cells in them."""
+    chunks = {}
+
+    for number, change in enumerate(changes):
+        cells = (change[1:3], change[3:5]) if change[0] == "move" else (change[1:3],)
+        for x, y in cells:
+            numbers = chunks.setdefault((x // CHUNK, y // CHUNK), [])
+            if not numbers or numbers[-1] != number:
+                numbers.append(number)
+
+    return chunks
+
+
+def compact(changes):
+    """
+    Remove changes overwritten later in the same batch.
+
+    Any earlier change of a cell is dropped when the cell is set or cleared
+    later, earlier change of hp is dropped when hp changes again. Moves keep
+    changes of both their cells, order of changes is preserved.
+
+    :param changes: list of ("set", x, y, name, phrase, hp), ("hp", x, y, hp),
+        ("delete", x, y) and ("move", x, y, new_x, new_y) changes in order
+    """
+    replaced = set()
+    damaged = set()
+    kept = []
+
+    for change in reversed(changes):
+        kind, cell = change[0], change[1:3]
+
+        if kind == "move":
+            for moved in (cell, change[3:5]):
+                replaced.discard(moved)
+                damaged.discard(moved)
+        elif cell in replaced or kind == "hp" and cell in damaged:
+            continue
+        elif kind == "hp":
+            damaged.add(cell)
+        else:
+            replaced.add(cell)
+        kept.append(change)
+
+    kept.reverse()
+    return kept
+
+
+class StateSync:
+    """
+    Field state delivered to heroes that keep their own copy of board.
+
+    Subscriber receives snapshot of square area around his hero and then diffs
+    with changes of monsters inside it. Changes are collected during tick and
+    sent together, every batch gets next version number, diff names version
+    subscriber had before it. A hero that moved, or whose area was crossed by
+    a moving monster, gets a new snapshot instead of diff, so does a hero whose
+    queue dropped any message since the previous diff was queued, whichever
+    message the queue policy dropped. Subscribers with the same area and
+    version share one encoded message. Changes of tick are indexed by square
+    chunks, so a subscriber looks only at changes near his area.
+
+    :param field: playing field
+    :param interval: seconds of tick, 0 sends changes on next iteration of event loop
+    """
+
+    def __init__(self, field, interval: float = 0.1):
+        """Create sync without subscribers."""
+        self.field = field
+        self.interval = interval
+        self.version = 0
+        self.changes = []
+        self.moved = False
+        self.subscribers = {}
+        self.handle = None
+
+    def __len__(self):
+        """Return number of subscribed heroes."""
+        return len(self.subscribers)
+
+    def subscribe(self, hero, queue, radius: int):
+        """
+        Send snapshot of area around hero and then keep him in sync.
+
+        :param hero: hero instance
+        :param queue: hero outbound queue
+        :param radius: half of side of visible square area
+        """
+        self.flush()
+        center = hero.get_position()
+        if queue.put_nowait(self.snapshot(center, radius)) is False:
+            center = None
+        self.subscribers[hero] = [queue, radius, center, self.version, _dropped(queue)]
+
+    def unsubscribe(self, hero):
+        """Stop sending field state to hero."""
+        self.subscribers.pop(hero, None)
+
+    def radius(self, hero):
+        """Return radius of area sent to hero, None if hero is not subscribed."""
+        subscription = self.subscribers.get(hero)
+        return None if subscription is None else subscription[1]
+
+    def _schedule(self):
+        """Plan sending of changes at the end of tick."""
+        if self.handle is None:
+            loop = asyncio.get_running_loop()
+            self.handle = loop.call_later(self.interval, self.flush) if self.interval > 0 \
+                else loop.call_soon(self.flush)
+
+    def relocate(self, hero):
+        """Send snapshot of new area to hero that moved, together with next changes."""
+        if hero in self.subscribers:
+            self.moved = True
+            self._schedule()
+
+    def record(self, event):
+        """Add field change event to current tick, events are ignored while nobody is subscribed."""
+        if not self.subscribers:
+            return
+
+        match event:
+            case ("moves", moves):
+                self.changes.extend(("move", *old, *new) for old, new, *_ in moves)
+            case _:
+                self.changes.append(event)
+
+        self._schedule()
+
+    def inside(self, x: int, y: int, center, radius: int):
+        """Check that cell is in square area around center."""
+        return _distance(x, center[0], self.field.width) <= radius and \
+            _distance(y, center[1], self.field.height) <= radius
+
+    def snapshot(self, center, radius: int):
+        """Return message with all monsters in area around center and current version."""
+        monsters = [[*cell, monster.get_name(), monster.get_phrase(), monster.get_hp()]
+                    for cell, monster in self.field.neighbours(*center, radius)]
+        return PREFIX + json.dumps({"version": self.version, "center": list(center), "radius": radius,
+                                    "monsters": monsters}, separators=(",", ":"))
+
+    def delta(self, changes, chunks, center, radius: int, base: int):
+        """
+        Return message with changes inside area around center.
+
+        :param changes: compacted changes of tick
+        :param chunks: index of changes by chunk
+        :return: diff message, snapshot if a monster crossed border of area, None if area has not changed
+        """
+        numbers = set()
+        for cx in _chunks(center[0], radius, self.field.width):
+            for cy in _chunks(center[1], radius, self.field.height):
+                numbers.update(chunks.get((cx, cy), ()))
+
+        visible = []
+
+        for number in sorted(numbers):
+            change = changes[number]
+            if change[0] == "move":
+                start, end = self.inside(*change[1:3], center, radius), self.inside(*change[3:5], center, radius)
+                if start != end:
+                    return self.snapshot(center, radius)
+                if not start:
+                    continue
+            elif not self.inside(*change[1:3], center, radius):
+                continue
+            visible.append(change)
+
+        if not visible:
+            return None
+
+        return PREFIX + json.dumps({"from": base, "version": self.version, "changes": visible},
+                                   separators=(",", ":"))
+
+    def flush(self):
+        """Send changes collected during tick to subscribers."""
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+        if not self.changes and not self.moved:
+            return
+
+        changes = compact(self.changes)
+        chunks = index(changes)
+        self.changes = []
+        self.moved = False
+        if changes:
+            self.version += 1
+        messages = {}
+
+        for hero, subscription in self.subscribers.items():
+            queue, radius, center, base, dropped = subscription
+            if _dropped(queue) != dropped:
+                center = None
+            position = hero.get_position()
+            key = (center, position, radius, base)
+
+            try:
+                message = messages[key]
+            except KeyError:
+                if position != center:
+                    message = self.snapshot(position, radius)
+                elif changes:
+                    message = self.delta(changes, chunks, center, radius, base)
+                else:
+                    message = None
+                messages[key] = message
+
+            if message is None:
+                continue
+
+            # snapshot does not depend on messages before it, a diff does
+            dropped = _dropped(queue)
+            if queue.put_nowait(message) is False or message.startswith(DIFF) and _dropped(queue) != dropped:
+                subscription[2] = None
+            else:
+                subscription[2] = position
+                subscription[3] = self.version
+            subscription[4] = _dropped(queue)
@@ -0,0 +1,81 @@
+import asyncio
+import sys
+import unittest
+from unittest.mock import patch
+from mood.server import server as srv
+
+
+async def with_server(scenario):
+    lobby = srv.World(srv.LOBBY, srv.Field())
+    with patch.object(srv, "lobby", lobby), patch.object(srv, "worlds", {srv.LOBBY: lobby}):
+        server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            await asyncio.sleep(0.1)
+            server.close()
+
+
+class TestAdmission(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def setUp(self):
+        self.limits = srv.LOGIN_TIMEOUT, srv.MAX_CONNECTIONS
+
+    def tearDown(self):
+        srv.LOGIN_TIMEOUT, srv.MAX_CONNECTIONS = self.limits
+
+    def test_1_rejected_before_queue(self):
+        async def scenario(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"move 1 0\n")
+            reply = await reader.read()
+            return reply, len(srv.lobby), len(srv.users)
+
+        self.assertEqual(asyncio.run(with_server(scenario)), (b"", 0, 0))
+
+    def test_2_login_timeout(self):
+        srv.LOGIN_TIMEOUT = 0.1
+
+        async def scenario(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            return await asyncio.wait_for(reader.read(), 1)
+
+        self.assertEqual(asyncio.run(with_server(scenario)), b"")
+
+    def test_3_duplicate_name(self):
+        async def scenario(port):
+            first = await asyncio.open_connection("127.0.0.1", port)
+            first[1].write(b"login alice\n")
+            accepted = await first[0].readline()
+            second = await asyncio.open_connection("127.0.0.1", port)
+            second[1].write(b"login alice\n")
+            rejected = await second[0].read()
+            users = list(srv.users)
+            first[1].write(b"quit\n")
+            await first[0].read()
+            return accepted, rejected, users, list(srv.users)
+
+        self.assertEqual(asyncio.run(with_server(scenario)), (b"1\n", b"0\n", ["alice"], []))
+
+    def test_4_connection_cap(self):
+        srv.MAX_CONNECTIONS = 2
+
+        async def scenario(port):
+            idle = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"login bob\n")
+            try:
+                refused = await asyncio.wait_for(reader.read(), 1)
+            except ConnectionError:
+                refused = b""
+            for _, idle_writer in idle:
+                idle_writer.close()
+            await asyncio.sleep(0.05)
+            return refused, srv.connections
+
+        self.assertEqual(asyncio.run(with_server(scenario)), (b"", 0))
@@ -0,0 +1,54 @@
+import unittest
+from mood.server import server as srv
+from mood.server.broadcast import Broadcaster
+from mood.server.outbox import Outbox
+
+
+def make_hero(clients, desk, name, x, y):
+    hero = srv.Hero(desk, name)
+    hero.set_locale("en_US.UTF-8")
+    hero.set_position(x, y)
+    clients.subscribe(hero, Outbox())
+    return hero
+
+
+class TestBroadcaster(unittest.TestCase):
+    def test_1_cell_index(self):
+        desk = srv.Field(100, 100)
+        clients = Broadcaster(width=100, height=100)
+        alice = make_hero(clients, desk, "alice", 3, 4)
+        bob = make_hero(clients, desk, "bob", 3, 4)
+        self.assertEqual(set(clients.at(3, 4)), {alice, bob})
+
+        alice.set_position(50, 4)
+        clients.relocate(alice)
+        self.assertEqual(list(clients.at(3, 4)), [bob])
+        self.assertEqual(list(clients.at(50, 4)), [alice])
+
+        clients.unsubscribe(bob)
+        self.assertEqual(clients.at(3, 4), {})
+        self.assertEqual(set(clients.cells), {(50, 4)})
+
+    def test_2_encounter_after_monster_move(self):
+        world = srv.World("arena", srv.Field(10, 10))
+        hunter = make_hero(world.clients, world.desk, "hunter", 1, 0)
+        idler = make_hero(world.clients, world.desk, "idler", 5, 5)
+        srv.Monster(0, 0, "tux", "Hello", 5, world.desk)
+        srv.commit_moves(world, [((0, 0), (1, 0), "right")])
+
+        messages = [world.clients[hunter].get_nowait() for _ in range(len(world.clients[hunter]))]
+        self.assertEqual(messages[0], b"tux moved one cell right")
+        self.assertIn(b"Hello", messages[1])
+        self.assertEqual([world.clients[idler].get_nowait() for _ in range(len(world.clients[idler]))],
+                         [b"tux moved one cell right"])
+
+    def test_3_encounter_payload_shared(self):
+        world = srv.World("arena", srv.Field(10, 10))
+        heroes = [make_hero(world.clients, world.desk, f"bot{i}", 1, 0) for i in range(3)]
+        srv.Monster(0, 0, "tux", "Hello", 5, world.desk)
+        srv.commit_moves(world, [((0, 0), (1, 0), "right")])
+
+        payloads = [world.clients[hero].get_nowait() for hero in heroes for _ in range(2)][1::2]
+        self.assertIsInstance(payloads[0], bytes)
+        self.assertTrue(all(payload is payloads[0] for payload in payloads))
+        self.assertEqual(world.desk.pictures.misses, 1)
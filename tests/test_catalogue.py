@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+import cowsay
+from mood.common.catalogue import Catalogue
+from mood.server.cache import EncounterCache
+
+TUX = open(os.path.join(cowsay.COW_PEN, "tux.cow")).read()
+
+
+class TestCatalogue(unittest.TestCase):
+    def setUp(self):
+        self.cows = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        with open(os.path.join(self.cows, "zed.cow"), "w") as file:
+            file.write(TUX)
+
+    def tearDown(self):
+        shutil.rmtree(self.cows)
+        shutil.rmtree(self.cache)
+
+    def test_1_lazy_names(self):
+        catalogue = Catalogue([self.cows], self.cache)
+        self.assertIsNone(catalogue.paths)
+        self.assertIn("zed", catalogue)
+        self.assertIn("jgsbat", catalogue)
+        self.assertNotIn("unicorn", catalogue)
+        self.assertEqual(catalogue.complete("ze"), ["zed"])
+        self.assertEqual(catalogue.cows, {})
+        self.assertEqual(catalogue.draw("zed", "Hi"), cowsay.cowsay("Hi", cow="tux"))
+        self.assertEqual(catalogue.draw("default", "Hi"), cowsay.cowsay("Hi"))
+        self.assertEqual(list(catalogue.cows), ["zed", "default"])
+
+    def test_2_disk_cache(self):
+        Catalogue([self.cows], self.cache).index()
+        cached = Catalogue([self.cows], self.cache)
+        cached.scan = lambda: self.fail("index must be read from cache")
+        self.assertIn("zed", cached)
+
+        with open(os.path.join(self.cows, "yak.cow"), "w") as file:
+            file.write(TUX)
+        self.assertIn("yak", Catalogue([self.cows], self.cache))
+        self.assertEqual(len(os.listdir(self.cache)), 1)
+
+    def test_3_later_directory_wins(self):
+        with open(os.path.join(self.cows, "default.cow"), "w") as file:
+            file.write(TUX)
+        pictures = EncounterCache(catalogue=Catalogue([self.cows], None))
+        self.assertEqual(pictures.render("default", "Hi"), cowsay.cowsay("Hi", cow="tux"))
+        self.assertIsNone(pictures.draw("unicorn", "Hi"))
@@ -43,3 +43,10 @@ class TestClient(unittest.TestCase):
                 patch('builtins.print') as res, patch('mood.client.client.read_chat')):
             cli.client()
             self.assertEqual(res.mock_calls[1].args[0], "Cannot add unknown monster")
+
+    def test_6_default_codec(self):
+        for engine, replay, codec, chosen in [("thread", False, None, "text"), ("asyncio", False, None, "binary"),
+                                              ("thread", True, None, "binary"), ("asyncio", False, "text", "text")]:
+            options = ["--replay"] * replay + ["--codec", codec] * (codec is not None)
+            args = cli.argparser.parse_args(["hero", "--engine", engine] + options)
+            self.assertEqual(cli.choose_codec(args), chosen)
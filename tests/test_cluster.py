@@ -0,0 +1,75 @@
+import time
+import unittest
+from unittest.mock import patch
+import mood.server.__main__ as server
+import multiprocessing
+import socket
+import sys
+
+
+def read_until(sock, expected, timeout=2):
+    sock.settimeout(0.1)
+    data = ""
+    end = time.time() + timeout
+    while expected not in data and time.time() < end:
+        try:
+            data += sock.recv(4096).decode()
+        except socket.timeout:
+            pass
+    return data
+
+
+class TestCluster(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+        cls.proc = multiprocessing.Process(target=server.server, args=[])
+        with patch.object(sys, "argv", ["start_server", "--port", "1338", "--workers", "2"]):
+            cls.proc.start()
+        time.sleep(0.5)
+        cls.socks = []
+        for i in range(6):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.connect(("localhost", 1338))
+            s.sendall(f"login client{i}\n".encode())
+            read_until(s, "1")
+            cls.socks.append(s)
+        cls.socks[0].sendall(b"movemonsters off\n")
+        for s in cls.socks:
+            read_until(s, "Moving monsters: off")
+
+    def test_1_notice_reaches_all_workers(self):
+        self.socks[0].sendall(b"addmon daemon phrase 'Hello' hp 15 coords 9 0\n")
+        for s in self.socks[1:]:
+            self.assertIn("User client0 added monster daemon with 15 hps", read_until(s, "daemon with 15"))
+
+    def test_2_attack_on_other_column(self):
+        for s in self.socks[1:]:
+            s.sendall(b"move -1 0\n")
+            read_until(s, "Moved to (9, 0)")
+        self.socks[1].sendall(b"attack daemon spear\n")
+        self.assertIn("daemon died", read_until(self.socks[1], "died"))
+        self.socks[2].sendall(b"attack daemon spear\n")
+        self.assertIn("No daemon here", read_until(self.socks[2], "here"))
+
+    def test_3_name_taken_on_all_workers(self):
+        socks = [socket.create_connection(("localhost", 1338)) for _ in range(6)]
+        replies = []
+        for s in socks:
+            s.sendall(b"login twin\n")
+            replies.append(read_until(s, "\n").strip())
+        for s in socks[1:]:
+            s.close()
+        socks[0].close()
+        time.sleep(0.2)
+        with socket.create_connection(("localhost", 1338)) as s:
+            s.sendall(b"login twin\n")
+            replies.append(read_until(s, "\n").strip())
+        self.assertEqual(replies, ["1"] + ["0"] * 5 + ["1"])
+
+    @classmethod
+    def tearDownClass(cls):
+        for s in cls.socks:
+            s.close()
+        cls.proc.terminate()
+        cls.proc.join()
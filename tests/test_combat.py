@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import unittest
+from mood.client.engine import Connection
+from mood.common import protocol
+from mood.server import server as srv
+from mood.server.combat import Combat
+
+TIMEOUT = 5
+
+
+class TestCombat(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def setUp(self):
+        self.state = srv.lobby, srv.worlds
+
+    def tearDown(self):
+        srv.lobby, srv.worlds = self.state
+
+    def test_1_batches_per_cell(self):
+        calls = []
+
+        async def resolve(cell, attacks):
+            calls.append((cell, attacks))
+            return [f"{cell} {attack}" for attack in attacks]
+
+        async def scenario():
+            combat = Combat(resolve)
+            futures = [combat.submit((0, 0), "a"), combat.submit((1, 0), "b"), combat.submit((0, 0), "c")]
+            self.assertEqual(len(combat), 3)
+            return await asyncio.gather(*futures)
+
+        self.assertEqual(asyncio.run(scenario()), ["(0, 0) a", "(1, 0) b", "(0, 0) c"])
+        self.assertEqual(calls, [((0, 0), ["a", "c"]), ((1, 0), ["b"])])
+
+    def test_2_hits_after_death_miss(self):
+        world = srv.World("arena", srv.Field())
+        srv.Monster(2, 3, "tux", "Hi", 25, world.desk)
+        results = srv.hit_monster(world, 2, 3, [("tux", 10), ("cow", 10), ("tux", 10), ("tux", 10), ("tux", 10)])
+        self.assertEqual(results, [(10, 15), None, (10, 5), (5, 0), None])
+        self.assertFalse(world.desk.check_position(2, 3))
+        self.assertEqual(srv.hit_monster(world, 2, 3, [("tux", 10)]), [None])
+
+    def test_3_simultaneous_attacks(self):
+        async def scenario():
+            srv.lobby = srv.World(srv.LOBBY, srv.Field())
+            srv.worlds = {srv.LOBBY: srv.lobby}
+            server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            heroes = [await Connection.open("127.0.0.1", port, f"bot{i}") for i in range(30)]
+            heroes[0].send(protocol.MoveMonsters("off"))
+            heroes[0].send(protocol.AddMonster("daemon", "Hi", 100, 0, 0))
+            await heroes[0].expect("Added monster", timeout=TIMEOUT)
+
+            for hero in heroes:
+                hero.send(protocol.Attack("daemon", "sword"))
+            replies = [await hero.expect("Attacked", "No daemon", timeout=TIMEOUT) for hero in heroes]
+            deaths = [await hero.expect("daemon died", "daemon now has", timeout=TIMEOUT)
+                      for hero in heroes if hero.name == "bot0"]
+
+            for hero in heroes:
+                await hero.close()
+            await asyncio.sleep(0.1)
+            server.close()
+            return replies, deaths
+
+        replies, deaths = asyncio.run(scenario())
+        self.assertEqual(sum(reply.startswith("Attacked") for reply in replies), 10)
+        self.assertEqual(len(deaths), 1)
+        self.assertFalse(srv.lobby.desk.check_position(0, 0))
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import unittest
+from mood.client.engine import Connection
+from mood.client.client import replay
+from mood.common import protocol
+from mood.server import server as srv
+
+TIMEOUT = 5
+
+
+async def with_server(scenario):
+    server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await scenario(port)
+    finally:
+        await asyncio.sleep(0.1)
+        server.close()
+
+
+class TestEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def test_1_messages_between_connections(self):
+        async def scenario(port):
+            alice = await Connection.open("127.0.0.1", port, "alice", "zlib")
+            bob = await Connection.open("127.0.0.1", port, "bob", "text")
+            alice.send(protocol.MoveMonsters("off"))
+            alice.send(protocol.AddMonster("tux", "Hi " * 100, 5, 1, 0))
+            alice.send(protocol.Move(1, 0))
+            result = [await alice.expect("Moved to", timeout=TIMEOUT),
+                      (await alice.receive(timeout=TIMEOUT)).count("Hi"),
+                      await bob.expect("User alice added", timeout=TIMEOUT)]
+            await alice.close()
+            await bob.close()
+            return result
+
+        self.assertEqual(asyncio.run(with_server(scenario)),
+                         ["Moved to (1, 0)", 100, "User alice added monster tux with 5 hps"])
+
+    def test_2_cancelled_receive(self):
+        async def scenario(port):
+            carol = await Connection.open("127.0.0.1", port, "carol")
+            with self.assertRaises(asyncio.TimeoutError):
+                await carol.receive(timeout=0.05)
+            carol.send(protocol.Move(0, 1))
+            with self.assertRaises(asyncio.TimeoutError):
+                await carol.expect("Never", timeout=0.05)
+            carol.send(protocol.Move(0, 1))
+            message = await carol.expect("Moved", timeout=TIMEOUT)
+            await carol.close()
+            return message
+
+        self.assertEqual(asyncio.run(with_server(scenario)), "Moved to (0, 2)")
+
+    def test_3_replay(self):
+        async def scenario(port):
+            dave = await Connection.open("127.0.0.1", port, "dave")
+            lines = ["addmon tux hello Hi hp 50 coords 0 0", "", "right", "left", "attack tux", "dance"] * 10
+            stats = await replay(dave, lines, batch=7, ack=True)
+            await dave.close()
+            return stats
+
+        stats = asyncio.run(with_server(scenario))
+        self.assertEqual((stats["commands"], stats["missing_replies"]), (41, 0))
+        self.assertIsNotNone(stats["p99_ms"])
@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+from mood.server.server import Field, Monster
+from mood.server import simulation
+
+
+class TestEncounterCache(unittest.TestCase):
+    def setUp(self):
+        self.desk = Field(cache_size=2)
+
+    def test_1_hits_and_misses(self):
+        Monster(0, 0, "daemon", "Hello", 10, self.desk)
+        first = self.desk.encounter(0, 0)
+        self.assertIs(self.desk.encounter(0, 0), first)
+        self.assertEqual((self.desk.pictures.hits, self.desk.pictures.misses), (1, 1))
+
+    def test_2_custom_monster(self):
+        Monster(1, 1, "jgsbat", "Boo", 10, self.desk)
+        self.assertIn("< Boo >", self.desk.encounter(1, 1))
+
+    def test_3_lru_eviction(self):
+        for i, phrase in enumerate(["a", "b", "a", "c"]):
+            Monster(i, 0, "cheese", phrase, 10, self.desk)
+            self.desk.encounter(i, 0)
+        self.assertEqual(list(self.desk.pictures.pictures), [("cheese", "a"), ("cheese", "c")])
+        self.assertEqual(self.desk.pictures.stats()["misses"], 3)
+
+    def test_4_encoded_payload(self):
+        Monster(0, 0, "daemon", "Hello", 10, self.desk)
+        payload = self.desk.encounter_payload(0, 0)
+        self.assertEqual(payload, self.desk.encounter(0, 0).encode())
+        self.assertIs(self.desk.encounter_payload(0, 0), payload)
+
+        for phrase in ["a", "b"]:
+            Monster(1, 0, "daemon", phrase, 10, self.desk)
+            self.desk.encounter_payload(1, 0)
+        self.assertEqual(list(self.desk.pictures.payloads), [("daemon", "a"), ("daemon", "b")])
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.desk = Field(width=100, height=50, chunk=8)
+        for x, y in [(0, 0), (5, 5), (20, 20), (99, 49), (50, 10)]:
+            Monster(x, y, "cheese", "Hi", 10, self.desk)
+
+    def test_1_wrap(self):
+        self.assertEqual(self.desk.wrap(100, -1), (0, 49))
+
+    def test_2_area(self):
+        self.assertEqual(sorted(cell for cell, _ in self.desk.area(0, 0, 21, 21)), [(0, 0), (5, 5), (20, 20)])
+
+    def test_3_neighbours_wrap(self):
+        self.assertEqual(sorted(cell for cell, _ in self.desk.neighbours(0, 0, 1)), [(0, 0), (99, 49)])
+
+    def test_4_delete_and_sample(self):
+        self.desk.delete_character(5, 5)
+        self.desk.delete_character(0, 0)
+        self.assertEqual(len(self.desk), 3)
+        self.assertEqual(sorted(self.desk.cells), sorted(self.desk.get_all_chars()))
+        self.assertIn(self.desk.random_cell(), self.desk.get_all_chars())
+        self.assertEqual(list(self.desk.area(0, 0, 8, 8)), [])
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.desk = Field(width=20, height=20)
+        for x in range(20):
+            for y in range(0, 20, 2):
+                Monster(x, y, "cheese", "Hi", 10, self.desk)
+
+    def check_tick(self, fraction):
+        before = set(self.desk.get_all_chars())
+        moves = simulation.plan_moves(self.desk, fraction)
+        self.desk.move_characters(moves)
+        targets = [new for old, new, direction in moves]
+        self.assertEqual(len(targets), len(set(targets)))
+        self.assertFalse(before & set(targets))
+        self.assertEqual(len(self.desk), len(before))
+        for cell in self.desk.get_all_chars():
+            self.assertEqual(self.desk.get_character(*cell).get_position(), cell)
+            self.assertEqual(self.desk.cells[self.desk.cell_index[cell]], cell)
+        return moves
+
+    def test_1_numpy_tick(self):
+        self.assertTrue(self.check_tick(1.0))
+        self.assertTrue(self.check_tick(1.0))
+
+    def test_2_python_tick(self):
+        with patch.object(simulation, "numpy", None):
+            self.assertTrue(self.check_tick(0.5))
+
+    def test_3_single_monster(self):
+        self.assertLessEqual(len(self.check_tick(None)), 1)
+
+
+class TestMonsterStore(unittest.TestCase):
+    def setUp(self):
+        self.desk = Field()
+
+    def test_1_view(self):
+        Monster(2, 3, "daemon", "Hello", 15, self.desk)
+        monster = self.desk.get_character(2, 3)
+        monster.set_hp(5)
+        self.assertEqual(self.desk.get_character(2, 3).get_hp(), 5)
+        self.assertEqual((monster.get_name(), monster.get_phrase(), monster.get_position()),
+                         ("daemon", "Hello", (2, 3)))
+
+    def test_2_interning(self):
+        for x in range(3):
+            Monster(x, 0, "daemon", "Hello", 15, self.desk)
+        store = self.desk.monsters
+        self.assertEqual((len(store.names), len(store.phrases)), (1, 1))
+        self.desk.delete_character(0, 0)
+        self.desk.delete_character(1, 0)
+        self.desk.delete_character(2, 0)
+        self.assertEqual((len(store), len(store.names)), (0, 0))
+
+    def test_3_replace_reuses_slot(self):
+        Monster(0, 0, "daemon", "Hello", 15, self.desk)
+        Monster(0, 0, "cheese", "Papaya", 10, self.desk)
+        self.assertEqual(len(self.desk.monsters), 1)
+        self.assertEqual(len(self.desk.monsters.x), 2)
+        Monster(1, 1, "tux", "Hi", 10, self.desk)
+        self.assertEqual(len(self.desk.monsters.x), 2)
+        self.assertEqual(self.desk.get_character(0, 0).get_name(), "cheese")
+
+    def test_4_overflow_keeps_references(self):
+        with self.assertRaises(OverflowError):
+            Monster(0, 0, "cow", "hi", 9999999999, self.desk)
+        store = self.desk.monsters
+        self.assertEqual((len(store), store.names.ids, store.phrases.ids), (0, {}, {}))
+        self.assertFalse(self.desk.check_position(0, 0))
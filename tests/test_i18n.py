@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po
+from mood.server.broadcast import Broadcaster
+from mood.server.i18n import Catalogs
+from mood.server.outbox import Outbox
+from mood.server.server import Field, Hero
+
+SOURCE = os.path.join(os.path.dirname(__file__), "..", "locale", "ru_RU.UTF-8", "LC_MESSAGES", "mood.po")
+
+
+def compile_catalog(directory, name):
+    """Compile Russian catalog of repository as locale name in directory."""
+    path = os.path.join(directory, name, "LC_MESSAGES")
+    os.makedirs(path)
+    with open(SOURCE, "rb") as source, open(os.path.join(path, "mood.mo"), "wb") as target:
+        write_mo(target, read_po(source))
+
+
+class TestCatalogs(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        compile_catalog(self.directory, "ru_RU.UTF-8")
+        self.catalogs = Catalogs(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_1_discover(self):
+        self.assertEqual(list(self.catalogs), ["en_US.UTF-8", "ru_RU.UTF-8"])
+        self.assertNotIn("uk_UA.UTF-8", self.catalogs)
+        compile_catalog(self.directory, "uk_UA.UTF-8")
+        self.assertIn("uk_UA.UTF-8", self.catalogs)
+        self.assertEqual(self.catalogs.translations, {})
+
+    def test_2_translate(self):
+        self.assertEqual(self.catalogs.gettext("ru_RU.UTF-8", "{} died"), "{} умер")
+        self.assertEqual(self.catalogs.gettext("en_US.UTF-8", "{} died"), "{} died")
+        forms = [self.catalogs.ngettext("ru_RU.UTF-8", "{} now has {} hp", "{} now has {} hps", n)
+                 for n in (1, 3, 5, 21)]
+        self.assertEqual(forms, ["{} теперь имеет {} очко здоровья", "{} теперь имеет {} очка здоровья",
+                                 "{} теперь имеет {} очков здоровья", "{} теперь имеет {} очко здоровья"])
+        self.assertEqual(self.catalogs.ngettext("ru_RU.UTF-8", "{} hp", "{} hps", 21), "{} hps")
+        self.assertRaises(KeyError, self.catalogs.gettext, "uk_UA.UTF-8", "{} died")
+
+    def test_3_memoized(self):
+        for n in range(1, 100):
+            self.catalogs.ngettext("ru_RU.UTF-8", "{} now has {} hp", "{} now has {} hps", n)
+        self.assertEqual(len(self.catalogs.templates), 4)
+        self.assertEqual(list(self.catalogs.translations), ["ru_RU.UTF-8"])
+
+    def test_4_broadcast(self):
+        desk = Field()
+        clients = Broadcaster()
+        for i in range(10):
+            hero = Hero(desk, f"bot{i}")
+            hero.set_locale("ru_RU.UTF-8" if i % 2 else "en_US.UTF-8")
+            clients.subscribe(hero, Outbox())
+
+        rendered = []
+
+        def notice(locale):
+            rendered.append(locale)
+            return self.catalogs.gettext(locale, "{} died").format("daemon")
+
+        self.assertEqual(clients.publish(notice), 10)
+        self.assertEqual(sorted(rendered), ["en_US.UTF-8", "ru_RU.UTF-8"])
+        self.assertEqual({queue.get_nowait() for queue in clients.values()},
+                         {"daemon died".encode(), "daemon умер".encode()})
@@ -0,0 +1,73 @@
+import asyncio
+import unittest
+from mood.server import server as srv
+from mood.server.metrics import Metrics, serve
+from mood.server.outbox import Outbox
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.state = srv.lobby, srv.worlds
+
+    def tearDown(self):
+        srv.lobby, srv.worlds = self.state
+
+    def test_1_disabled(self):
+        metrics = Metrics()
+        self.assertFalse(metrics.enabled)
+        self.assertFalse(any(metrics.sampled() for _ in range(100)))
+
+    def test_2_render(self):
+        metrics = Metrics(1)
+        metrics.count("mood_commands_total", [("command", "move")], 2)
+        metrics.observe("mood_fanout_recipients", 3, buckets=(1, 5))
+        metrics.gauge("mood_clients", lambda: 4)
+        self.assertEqual(metrics.render().splitlines(), [
+            '# TYPE mood_commands_total counter',
+            'mood_commands_total{command="move"} 2',
+            '# TYPE mood_fanout_recipients histogram',
+            'mood_fanout_recipients_bucket{le="1"} 0',
+            'mood_fanout_recipients_bucket{le="5"} 1',
+            'mood_fanout_recipients_bucket{le="+Inf"} 1',
+            'mood_fanout_recipients_sum 3',
+            'mood_fanout_recipients_count 1',
+            '# TYPE mood_clients gauge',
+            'mood_clients 4',
+        ])
+
+    def test_3_admin_port(self):
+        async def scrape():
+            metrics = Metrics()
+            metrics.gauge("mood_monsters", lambda: 7)
+            server = await serve(metrics, 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            server.close()
+            return response.decode()
+
+        response = asyncio.run(scrape())
+        self.assertTrue(response.startswith("HTTP/1.0 200 OK"))
+        self.assertTrue(response.endswith("mood_monsters 7\n"))
+
+    def test_4_client_queues(self):
+        srv.lobby = srv.World(srv.LOBBY, srv.Field())
+        srv.worlds = {srv.LOBBY: srv.lobby}
+        for number in range(srv.QUEUE_REPORT + 5):
+            queue = Outbox()
+            srv.lobby.join(srv.Hero(srv.lobby.desk, f"user{number}"), queue)
+            for _ in range(number):
+                queue.put_nowait("hi")
+
+        lines = [line for line in srv.metrics.render().splitlines() if line.startswith("mood_client_queue{")]
+        self.assertEqual(len(lines), srv.QUEUE_REPORT * 5)
+        self.assertIn('mood_client_queue{user="user14",counter="depth"} 14', lines)
+        self.assertNotIn('mood_client_queue{user="user2",counter="depth"} 2', lines)
+        self.assertEqual(len(srv.connection_stats()), srv.QUEUE_REPORT + 5)
+
+    def test_5_escaped_labels(self):
+        metrics = Metrics(1)
+        metrics.count("mood_logins_total", [("user", 'a"b\\c\n')])
+        self.assertIn('mood_logins_total{user="a\\"b\\\\c\\n"} 1', metrics.render().splitlines())
@@ -0,0 +1,35 @@
+import asyncio
+import unittest
+from mood.server.outbox import Outbox
+
+
+class TestOutbox(unittest.TestCase):
+    def test_1_coalesce(self):
+        box = Outbox()
+        box.put_nowait("daemon moved one cell up", key="daemon")
+        box.put_nowait("hello")
+        box.put_nowait("daemon moved one cell left", key="daemon")
+        self.assertEqual([box.get_nowait(), box.get_nowait()], ["daemon moved one cell left", "hello"])
+        self.assertEqual(box.stats()["coalesced"], 1)
+
+    def test_2_drop_oldest(self):
+        box = Outbox(limit=2)
+        for msg in "abc":
+            box.put_nowait(msg)
+        self.assertEqual([box.get_nowait(), box.get_nowait()], ["b", "c"])
+        self.assertEqual(box.stats()["dropped"], 1)
+
+    def test_3_drop_newest(self):
+        box = Outbox(limit=2, policy="newest")
+        self.assertFalse([box.put_nowait(msg) for msg in "abc"][-1])
+        self.assertEqual([box.get_nowait(), box.get_nowait()], ["a", "b"])
+
+    def test_4_get_waits(self):
+        async def scenario():
+            box = Outbox()
+            waiting = asyncio.create_task(box.get())
+            await asyncio.sleep(0)
+            box.put_nowait("hello")
+            return await waiting
+
+        self.assertEqual(asyncio.run(scenario()), "hello")
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from mood.server.server import Field, Monster, change_field
+from mood.server import persist
+
+
+def monsters(field):
+    return sorted((cell, char.get_name(), char.get_phrase(), char.get_hp()) for cell, char in field.area(
+        0, 0, field.width, field.height))
+
+
+class TestPersist(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.desk = Field(20, 30)
+        Monster(0, 0, "daemon", "Hello", 10, self.desk)
+        Monster(5, 7, "cheese", "Привет", 3, self.desk)
+        Monster(19, 29, "tux", "Hello", 7, self.desk)
+        self.desk.delete_character(0, 0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_1_snapshot(self):
+        path = os.path.join(self.directory.name, "world.snap")
+        persist.save_snapshot(path, persist.dump(self.desk, 3))
+        generation, width, height, store = persist.load_snapshot(path)
+        field = Field(width, height)
+        field.restore(store)
+        self.assertEqual((generation, width, height), (3, 20, 30))
+        self.assertEqual(monsters(field), monsters(self.desk))
+        self.assertEqual(len(store.phrases), 2)
+
+    def test_2_replay_log(self):
+        async def play():
+            journal = persist.Journal(self.directory.name)
+            journal.recover(Field(20, 30), change_field)
+            journal.start(self.desk)
+            await journal.snapshot(self.desk)
+            for event in [("set", 1, 1, "dragon", "Grr", 50), ("hp", 5, 7, 1), ("delete", 19, 29),
+                          ("moves", [((1, 1), (1, 2), "down")])]:
+                change_field(self.desk, event)
+                journal.append(event)
+            await journal.flush()
+            journal.task.cancel()
+
+        asyncio.run(play())
+        field = Field()
+        persist.Journal(self.directory.name).recover(field, change_field)
+        self.assertEqual(monsters(field), [((1, 2), "dragon", "Grr", 50), ((5, 7), "cheese", "Привет", 1)])
+        self.assertEqual(os.listdir(self.directory.name), ["world.snap"])
+
+    def test_3_torn_record(self):
+        data = persist.encode(("hp", 1, 2, 3)) + persist.encode(("set", 1, 1, "tux", "Hi", 5))
+        self.assertEqual(list(persist.decode(data[:-1])), [("hp", 1, 2, 3)])
@@ -0,0 +1,77 @@
+import asyncio
+import shlex
+import socket
+import unittest
+import zlib
+from mood.common import protocol
+
+
+class TestProtocol(unittest.TestCase):
+    def test_1_split_like_shlex(self):
+        for line in ['move 1 -1', "addmon daemon phrase 'What a hell' hp 100 coords 0 1",
+                     'sayall "" x', 'x ab"cd"e', 'a \\"q', '  attack  tux  axe  ']:
+            self.assertEqual(protocol.split(line), shlex.split(line))
+
+    def test_2_typed_commands(self):
+        self.assertEqual(protocol.parse("move 0 -1"), protocol.Move(0, -1))
+        self.assertEqual(protocol.parse("addmon daemon phrase 'What a hell' hp 100 coords 0 1"),
+                         protocol.AddMonster("daemon", "What a hell", 100, 0, 1))
+        self.assertEqual(protocol.parse("attack tux axe"), protocol.Attack("tux", "axe"))
+        self.assertEqual(protocol.parse("quit"), protocol.Quit())
+        self.assertEqual(protocol.parse("login hero zlib"), protocol.Login("hero", "zlib"))
+        self.assertEqual(protocol.parse("sync 3"), protocol.Sync(3))
+        self.assertEqual(protocol.parse("sync off"), protocol.Sync(None))
+
+    def test_3_invalid_commands(self):
+        for line in ["move a b", "", "login", "attack tux", "dance", "sync -1",
+                     "addmon cow phrase hi hp 9999999999 coords 0 0", "addmon cow phrase hi hp 0 coords 0 0"]:
+            self.assertEqual(protocol.parse(line), protocol.Unknown(line))
+
+    def test_4_encode(self):
+        command = protocol.AddMonster("cheese", "Papaya", 15, 0, 1)
+        self.assertEqual(command.encode(), b"addmon cheese phrase 'Papaya' hp 15 coords 0 1\n")
+        self.assertEqual(protocol.parse(command.encode().decode().strip()), command)
+        self.assertEqual(protocol.encode_text(["hi", "мир".encode()]), "hi\nмир".encode())
+
+    def test_5_message_frames(self):
+        messages = ["Moved to (1, 0)", "cow " * 200]
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(protocol.encode_messages(messages, compress=True) + protocol.encode_messages(["hi"]))
+            framed = protocol.FramedSocket(right)
+            self.assertEqual(framed.recv_messages(), messages)
+            self.assertEqual(framed.recv(), b"hi")
+        self.assertTrue(protocol.encode_messages(messages, compress=True)[0] & protocol.COMPRESSED)
+
+    def test_6_read_command(self):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(protocol.pack(protocol.COMMAND, b"move 0 1") + b"\x01\x00")
+            reader.feed_eof()
+            return [await protocol.read_command(reader), await protocol.read_command(reader), reader.at_eof()]
+
+        self.assertEqual(asyncio.run(read()), [b"move 0 1", b"", True])
+
+    def test_7_chunks(self):
+        messages = ["Moved to (1, 0)", ("cow " * 200).encode(), "мир"]
+        for chunker, encoder in [(protocol.CHUNKERS[codec], protocol.ENCODERS[codec]) for codec in protocol.CODECS]:
+            chunks = chunker(messages)
+            self.assertEqual(b"".join(chunks), encoder(messages))
+        self.assertIs(protocol.chunk_messages(messages)[4], messages[1])
+
+    def test_8_compressed_limit(self):
+        async def read(frame):
+            reader = asyncio.StreamReader()
+            reader.feed_data(frame)
+            reader.feed_eof()
+            return await protocol.read_command(reader)
+
+        command = protocol.pack(protocol.COMMAND, b"move 0 1" + b" " * 300, compress=True)
+        self.assertTrue(command[0] & protocol.COMPRESSED)
+        self.assertEqual(asyncio.run(read(command)), b"")
+
+        bomb = protocol.pack(protocol.MESSAGES, bytes(protocol.MAX_FRAME + 1), compress=True)
+        with self.assertRaises(ValueError):
+            protocol.unpack(bomb[0], bomb[protocol.HEADER.size:])
+        kind, payload = protocol.unpack(protocol.MESSAGES | protocol.COMPRESSED, zlib.compress(bytes(100)))
+        self.assertEqual((kind, len(payload)), (protocol.MESSAGES, 100))
@@ -1,5 +1,6 @@
 import time
 import unittest
+from unittest.mock import patch
 import mood.server.__main__ as server
 import multiprocessing
 import socket
@@ -16,7 +17,8 @@ class TestServer(unittest.TestCase):
     def setUpClass(cls):
         sys.stdout = open('/dev/null', 'w')
         cls.proc = multiprocessing.Process(target=server.server, args=[])
-        cls.proc.start()
+        with patch.object(sys, "argv", ["start_server"]):
+            cls.proc.start()
         time.sleep(0.05)
         cls.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         cls.s.connect(("localhost", 1337))
@@ -61,6 +63,16 @@ class TestServer(unittest.TestCase):
         self.assertEqual(try_function(self.s, "attack", "daemon spear"),
                          'Атакован daemon, урон 15 очков здоровья\ndaemon умер')
 
+    def test_5_unknown_monster(self):
+        self.assertEqual(try_function(self.s, "addmon", "petrovich phrase 'Hello' hp 15 coords 0 2"),
+                         'Нельзя добавить неизвестного монстра petrovich')
+        self.assertEqual(try_function(self.s, "move", "0 0"), 'Moved to (0, 2)')
+
+    def test_6_unknown_option(self):
+        with patch.object(sys, "argv", ["start_server", "--queue-limt", "10"]), patch.object(sys, "stderr"):
+            with self.assertRaises(SystemExit):
+                server.server()
+
     @classmethod
     def tearDownClass(cls):
         cls.s.close()
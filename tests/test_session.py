@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import unittest
+from unittest.mock import patch
+from mood.client.engine import Connection
+from mood.common import protocol
+from mood.server import server as srv
+
+TIMEOUT = 5
+
+
+async def with_server(transport, scenario):
+    lobby = srv.World(srv.LOBBY, srv.Field())
+    with (patch.object(srv, "lobby", lobby), patch.object(srv, "worlds", {srv.LOBBY: lobby}),
+          patch.object(srv, "TRANSPORT", transport)):
+        server = await srv.listen("127.0.0.1", 0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1])
+        finally:
+            await asyncio.sleep(0.1)
+            server.close()
+
+
+async def chat(port):
+    alice = await Connection.open("127.0.0.1", port, "alice", "binary")
+    bob = await Connection.open("127.0.0.1", port, "bob", "text")
+    alice.send(protocol.MoveMonsters("off"))
+    for _ in range(50):
+        alice.send(protocol.Move(1, 0))
+    bob.send(protocol.SayAll("hi"))
+    result = [await alice.expect("bob:", timeout=TIMEOUT), await alice.expect("Moved to (0, 0)", timeout=TIMEOUT),
+              len(srv.users)]
+    await alice.close()
+    await bob.close()
+    await asyncio.sleep(0.1)
+    return result + [len(srv.users)]
+
+
+class TestSession(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def test_1_transports(self):
+        for transport in ("streams", "protocol"):
+            with self.subTest(transport=transport):
+                self.assertEqual(asyncio.run(with_server(transport, chat)), ["bob: hi", "Moved to (0, 0)", 2, 0])
+
+    def test_2_protocol_reader(self):
+        async def scenario(port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"login carol binary\n" + protocol.pack(protocol.COMMAND, b"move 0 1")[:3])
+            await reader.readline()
+            await asyncio.sleep(0.05)
+            writer.write(protocol.pack(protocol.COMMAND, b"move 0 1")[3:] + b"\x01\x00")
+            kind, payload = await protocol.read_frame(reader)
+            writer.write_eof()
+            await reader.read()
+            writer.close()
+            await asyncio.sleep(0.05)
+            return protocol.decode_messages(payload), "carol" in srv.users
+
+        self.assertEqual(asyncio.run(with_server("protocol", scenario)), (["Moved to (0, 1)"], False))
+
+    def test_3_failed_session_logs_out(self):
+        async def login(port, name):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"login {name}\n".encode())
+            return reader, writer, await reader.readline()
+
+        async def scenario(port):
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: None)
+            reader, writer, _ = await login(port, "bob")
+            writer.write(b"sayall \xff\xfe\nmove 1 0\n")
+            moved = await reader.readuntil(b"Moved to (1, 0)")
+            writer.write(b"sayall " + b"x" * 70000 + b"\n")
+            closed = await reader.read()
+
+            reader, writer, again = await login(port, "bob")
+            with patch.object(srv, "move", side_effect=RuntimeError):
+                writer.write(b"move 1 0\n")
+                failed = await reader.read()
+            return moved.endswith(b"(1, 0)"), closed, again, failed, list(srv.users), len(srv.lobby)
+
+        for transport in ("streams", "protocol"):
+            with self.subTest(transport=transport):
+                self.assertEqual(asyncio.run(with_server(transport, scenario)), (True, b"", b"1\n", b"", [], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
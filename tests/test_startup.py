@@ -0,0 +1,53 @@
+import asyncio
+import socket
+import unittest
+from mood.server import startup as st
+from mood.server.startup import Startup, Timing
+
+
+class TestStartup(unittest.TestCase):
+    def test_1_loop_selection(self):
+        self.assertIs(Startup(loop="asyncio").loop_factory(), asyncio.new_event_loop)
+        self.assertEqual(Startup().loop_name(), "asyncio" if st.uvloop is None else "uvloop")
+        if st.uvloop is None:
+            with self.assertRaises(RuntimeError):
+                Startup(loop="uvloop").loop_factory()
+        self.assertEqual(Startup(loop="asyncio").run(lambda: asyncio.sleep(0, "done")), "done")
+
+    def test_2_socket_options(self):
+        async def handler(reader, writer):
+            sock = writer.get_extra_info("socket")
+            options.append((sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY),
+                            sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)))
+            writer.write(b"1\n")
+            await writer.drain()
+            writer.close()
+
+        async def scenario(startup):
+            server = await startup.listen(handler)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            reply = await reader.readline()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return reply
+
+        for transport in ("streams", "protocol"):
+            for nodelay in (True, False):
+                options = []
+                startup = Startup("127.0.0.1", 0, 5, "asyncio", transport, nodelay, receive_buffer=1 << 17)
+                self.assertEqual(startup.run(lambda: scenario(startup)), b"1\n")
+                self.assertEqual(bool(options[0][0]), nodelay)
+                self.assertGreaterEqual(options[0][1], 1 << 17)
+
+    def test_3_timing(self):
+        timing = Timing()
+        timing.mark("configure")
+        timing.mark("listen")
+        self.assertEqual([phase for phase, _ in timing.phases], ["configure", "listen"])
+        self.assertRegex(timing.report(), r"^started in [\d.]+ ms \(configure [\d.]+ ms, listen [\d.]+ ms\)$")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import random
+import sys
+import unittest
+from mood.client.board import Board
+from mood.client.engine import Connection
+from mood.common import protocol
+from mood.server import server as srv
+from mood.server.outbox import Outbox
+from mood.server.sync import compact
+
+TIMEOUT = 5
+
+
+def visible(world, hero, radius):
+    return {cell: (monster.get_name(), monster.get_phrase(), monster.get_hp())
+            for cell, monster in world.desk.neighbours(*hero.get_position(), radius)}
+
+
+class TestSync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def setUp(self):
+        self.state = srv.lobby, srv.worlds
+
+    def tearDown(self):
+        srv.lobby, srv.worlds = self.state
+
+    def test_1_compact(self):
+        changes = [("set", 1, 1, "tux", "Hi", 5), ("hp", 1, 1, 3), ("hp", 1, 1, 2), ("hp", 2, 2, 7),
+                   ("move", 2, 2, 3, 3), ("hp", 2, 2, 1), ("set", 4, 4, "cow", "Mu", 1), ("delete", 4, 4)]
+        self.assertEqual(compact(changes), [("set", 1, 1, "tux", "Hi", 5), ("hp", 1, 1, 2), ("hp", 2, 2, 7),
+                                            ("move", 2, 2, 3, 3), ("hp", 2, 2, 1), ("delete", 4, 4)])
+
+    def test_2_board_follows_field(self):
+        generator = random.Random(21)
+
+        async def scenario():
+            world = srv.World("arena", srv.Field(40, 40))
+            world.sync.interval = 0
+            hero = srv.Hero(world.desk, "hero")
+            queue = asyncio.Queue()
+            board = Board()
+            world.sync.subscribe(hero, queue, 9)
+            messages = 0
+
+            for step in range(600):
+                cell = world.desk.random_cell() if len(world.desk) and generator.random() < 0.6 else None
+                match generator.randrange(4) if cell else 0:
+                    case 0:
+                        srv.put_monster(world, generator.randrange(40), generator.randrange(40), "tux", "Hi", 9)
+                    case 1:
+                        srv.hit_monster(world, *cell, [("tux", generator.randrange(1, 6))])
+                    case 2:
+                        new = world.desk.wrap(cell[0] + 1, cell[1])
+                        if not world.desk.check_position(*new):
+                            srv.commit_moves(world, [(cell, new, "right")])
+                    case 3:
+                        hero.set_position(*world.desk.wrap(hero.x + 1, hero.y + generator.randrange(-1, 2)))
+                        world.sync.relocate(hero)
+
+                if step % 3 == 0:
+                    await asyncio.sleep(0)
+                    while not queue.empty():
+                        self.assertTrue(board.apply(queue.get_nowait()))
+                        messages += 1
+                    self.assertEqual(board.monsters, visible(world, hero, 9))
+
+            return messages
+
+        self.assertGreater(asyncio.run(scenario()), 20)
+
+    def test_3_sync_command(self):
+        async def scenario():
+            srv.lobby = srv.World(srv.LOBBY, srv.Field())
+            srv.worlds = {srv.LOBBY: srv.lobby}
+            srv.lobby.sync.interval = 0
+            server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            alice = await Connection.open("127.0.0.1", port, "alice")
+            bob = await Connection.open("127.0.0.1", port, "bob")
+            board = Board()
+
+            alice.send(protocol.MoveMonsters("off"))
+            alice.send(protocol.Sync(1))
+            board.apply(await alice.expect("sync ", timeout=TIMEOUT))
+            bob.send(protocol.AddMonster("tux", "Hi", 5, 5, 5))
+            bob.send(protocol.AddMonster("cheese", "Mu", 7, 1, 9))
+            board.apply(await alice.expect("sync ", timeout=TIMEOUT))
+            alice.send(protocol.Sync(None))
+            stopped = await alice.expect("Sync stopped", timeout=TIMEOUT)
+
+            await alice.close()
+            await bob.close()
+            await asyncio.sleep(0.1)
+            server.close()
+            return board.version > 0, board.monsters, stopped, len(srv.lobby.sync)
+
+        self.assertEqual(asyncio.run(scenario()), (True, {(1, 9): ("cheese", "Mu", 7)}, "Sync stopped", 0))
+
+    def test_4_snapshot_after_drop(self):
+        async def scenario(policy):
+            world = srv.World("arena", srv.Field(40, 40))
+            hero = srv.Hero(world.desk, "hero")
+            queue = Outbox(2, policy)
+            board = Board()
+            world.sync.subscribe(hero, queue, 9)
+            applied = [board.apply(queue.get_nowait())]
+
+            for x in range(5):
+                srv.put_monster(world, x, 0, "tux", "Hi", 9)
+                world.sync.flush()
+                if x % 2 == 0 and x:
+                    while not queue.empty():
+                        applied.append(board.apply(queue.get_nowait()))
+
+            return applied[-1], board.monsters == visible(world, hero, 9)
+
+        for policy in ("oldest", "newest"):
+            with self.subTest(policy=policy):
+                self.assertEqual(asyncio.run(scenario(policy)), (True, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
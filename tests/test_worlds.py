@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import unittest
+from mood.client.engine import Connection
+from mood.common import protocol
+from mood.server import server as srv
+
+TIMEOUT = 5
+
+
+class TestWorlds(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sys.stdout = open('/dev/null', 'w')
+
+    def setUp(self):
+        self.state = srv.lobby, srv.worlds
+
+    def tearDown(self):
+        srv.lobby, srv.worlds = self.state
+
+    def test_1_open_and_close(self):
+        srv.worlds = {srv.LOBBY: srv.lobby}
+        room = srv.open_world("den")
+        self.assertIs(srv.open_world("den"), room)
+        self.assertEqual((room.desk.width, room.desk.height), (srv.ROOM_WIDTH, srv.ROOM_HEIGHT))
+        srv.close_world(room)
+        srv.close_world(srv.lobby)
+        self.assertEqual(list(srv.worlds), [srv.LOBBY])
+
+    def test_2_messages_stay_in_world(self):
+        async def scenario():
+            srv.lobby = srv.World(srv.LOBBY, srv.Field())
+            srv.worlds = {srv.LOBBY: srv.lobby}
+            server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            alice, bob, carol = [await Connection.open("127.0.0.1", port, name) for name in ("alice", "bob", "carol")]
+
+            alice.send(protocol.Join("den"))
+            joined = await alice.expect("Joined world", timeout=TIMEOUT)
+            left = await bob.expect("alice disconnected", timeout=TIMEOUT)
+            carol.send(protocol.Join("den"))
+            met = await alice.expect("User carol", timeout=TIMEOUT)
+
+            carol.send(protocol.AddMonster("tux", "Hi", 5, 0, 0))
+            await carol.expect("Added monster", timeout=TIMEOUT)
+            carol.send(protocol.SayAll("howdy"))
+            heard = await alice.expect("carol:", timeout=TIMEOUT)
+            bob.send(protocol.SayAll("hello"))
+            await asyncio.sleep(0.1)
+            unheard = alice.inbox.qsize()
+            monsters = (len(srv.lobby.desk), len(srv.worlds["den"].desk))
+
+            for connection in (alice, bob, carol):
+                await connection.close()
+            await asyncio.sleep(0.1)
+            server.close()
+            return joined, left, met, heard, unheard, monsters
+
+        joined, left, met, heard, unheard, monsters = asyncio.run(scenario())
+        self.assertEqual(joined, "Joined world den")
+        self.assertEqual(left, "alice disconnected")
+        self.assertEqual(met, "User carol connected")
+        self.assertEqual(heard, "carol: howdy")
+        self.assertEqual(unheard, 0)
+        self.assertEqual(monsters, (0, 1))
+        self.assertEqual(list(srv.worlds), [srv.LOBBY])
+
+    def test_3_join_same_world(self):
+        async def scenario():
+            srv.lobby = srv.World(srv.LOBBY, srv.Field())
+            srv.worlds = {srv.LOBBY: srv.lobby}
+            server = await asyncio.start_server(srv.mud, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            alice = await Connection.open("127.0.0.1", port, "alice")
+
+            replies = []
+            for world in (srv.LOBBY, "den"):
+                alice.send(protocol.Join(world))
+                await alice.expect("Joined world", timeout=TIMEOUT)
+                alice.send(protocol.AddMonster("tux", "Hi", 5, 0, 0))
+                await alice.expect("Added monster", timeout=TIMEOUT)
+                alice.send(protocol.Move(1, 0))
+                await alice.expect("Moved to", timeout=TIMEOUT)
+                alice.send(protocol.Join(world))
+                replies.append(await alice.expect("Joined world", timeout=TIMEOUT))
+                alice.send(protocol.Move(0, 1))
+                replies.append(await alice.expect("Moved to", timeout=TIMEOUT))
+                replies.append(len(srv.worlds[world].desk))
+
+            await alice.close()
+            await asyncio.sleep(0.1)
+            server.close()
+            return replies
+
+        self.assertEqual(asyncio.run(scenario()), [f"Joined world {srv.LOBBY}", "Moved to (1, 1)", 1,
+                                                   "Joined world den", "Moved to (1, 1)", 1])